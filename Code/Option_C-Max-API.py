@@ -1,20 +1,69 @@
-import ntpath
+import asyncio
+import json
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import List, Literal, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Set, Tuple, Union
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
+from caption_index import CaptionIndex
 from dataset_actions_core import (
+    CaptionCopyPlan,
     copy_captions,
-    load_caption_rows,
     make_blank_txts,
+    plan_caption_copy,
     preview_caption_rows,
-    restore_snapshot,
+    restore_snapshot_files,
     run_caption_prefix_suffix,
+    stream_caption_rows,
+)
+from dataset_dirs import BOOKKEEPING_DIRS, UNDO_DIR
+from face_jobs import JobStatus, count_images, job_manager
+from folder_index import Fingerprint, FolderListing, folder_fingerprint, folder_index
+from folder_watch import FolderChange, folder_watcher
+from fs_paths import normalize_fs_path, resolve_folder
+from json_codec import dumps, mapping_payload
+from rename_core import (
+    DELIMS,
+    CollisionIndex,
+    RenamePlan,
+    apply_add_prefix,
+    apply_add_suffix,
+    apply_remove_prefix,
+    apply_remove_suffix,
+)
+from preview_memo import StepColumns, preview_memo
+from rename_columnar import MIN_COLUMNAR_NAMES, columnar_available, resolve_columnar
+from rename_executor import CANCELLED, RenameResult, execute_chains, plan_chains
+from rename_journal import (
+    JournalState,
+    RenameJournal,
+    list_journal_ids,
+    mark_undone,
+    read_journal,
+    resume_points,
+    touched_dirs,
+    undo_pairs,
+)
+from report_writer import GZIP_SUFFIX, resolve_report
+from snapshot_gc import snapshot_collector
+from snapshot_store import (
+    PruneResult,
+    RetentionPolicy,
+    load_catalog,
+    load_retention,
+    pack_sizes,
+    prune_snapshots,
+    save_retention,
 )
-from face_jobs import count_images, job_manager
 
 app = FastAPI(title="NeuraMax Smart Renamer API")
 
@@ -34,8 +83,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
-DELIMS = ['_', '-', '.', ',']
+# NDJSON lines buffered per chunk on /preview/stream
+STREAM_CHUNK_LINES = 1000
+# Reviewed previews kept for /run (oldest dropped first) and their lifetime
+MAX_STORED_PLANS = 8
+PLAN_TTL_SECONDS = 30 * 60
+# Directories holding this tool's own bookkeeping; never walked or renamed
+RESERVED_DIRS = BOOKKEEPING_DIRS
 
 
 class Operation(BaseModel):
@@ -47,6 +101,12 @@ class Operation(BaseModel):
 class PreviewRequest(BaseModel):
     folder: str
     operations: List[Operation]
+    recursive: bool = False
+    # "columnar" evaluates large folders on NumPy string arrays when available
+    engine: Literal["python", "columnar"] = "python"
+    # "columns"/"changes" return parallel name arrays instead of per-row
+    # objects (see json_codec.mapping_payload)
+    format: Literal["rows", "columns", "changes"] = "rows"
 
 
 class FileMapping(BaseModel):
@@ -63,12 +123,52 @@ class Summary(BaseModel):
 class PreviewResponse(BaseModel):
     files: List[FileMapping]
     summary: Summary
+    plan_id: Optional[str] = None
+
+
+class RenameError(BaseModel):
+    original: str
+    new: str
+    error: str
 
 
 class RunResponse(PreviewResponse):
-    pass
+    errors: List[RenameError] = Field(default_factory=list)
+    # rename journal written for this run; pass to /run/journals/{id}/undo
+    journal_id: Optional[str] = None
 class RunRequest(PreviewRequest):
+    operations: List[Operation] = Field(default_factory=list)
     include_files: Optional[List[str]] = None
+    plan_id: Optional[str] = None
+
+
+class IOStrategyResponse(BaseModel):
+    folder: str
+    mount_point: Optional[str]
+    fstype: Optional[str]
+    kind: str
+    io_workers: int
+    rename_workers: int
+    walk_workers: int
+    batch_size: int
+    read_chunk_bytes: int
+    read_ahead: int
+
+
+class JournalRequest(BaseModel):
+    folder: str
+
+
+class JournalInfo(BaseModel):
+    journal_id: str
+    # running | interrupted | completed | cancelled
+    status: str
+    created_at: float
+    total: int
+    done: int
+    failed: int
+    undo_of: Optional[str] = None
+    undone_by: Optional[str] = None
 
 
 class CaptionEntry(BaseModel):
@@ -81,6 +181,8 @@ class CaptionEntry(BaseModel):
 class CaptionLoadRequest(BaseModel):
     folder: str
     recursive: bool = False
+    # serve rows from the dataset's caption index, re-reading only changed files
+    use_index: bool = False
 
 
 class CaptionLoadResponse(BaseModel):
@@ -88,6 +190,56 @@ class CaptionLoadResponse(BaseModel):
     count: int
 
 
+class CaptionIndexRequest(BaseModel):
+    folder: str
+    recursive: bool = True
+
+
+class CaptionIndexResponse(BaseModel):
+    count: int
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+    full_text: bool
+
+
+class CaptionSearchRequest(BaseModel):
+    folder: str
+    query: str
+    recursive: bool = True
+    limit: int = Field(default=100, ge=1, le=10_000)
+    # re-check files on disk first; otherwise the index is searched as is
+    refresh: bool = False
+
+
+class CaptionSearchResponse(BaseModel):
+    rows: List[CaptionEntry]
+    count: int
+
+
+class CaptionPageRequest(BaseModel):
+    folder: str
+    recursive: bool = True
+    limit: int = Field(default=200, ge=1, le=5000)
+    # next_cursor of the previous page; omitted for the first page
+    cursor: Optional[str] = None
+    sort: Literal["path", "filename", "length"] = "path"
+    descending: bool = False
+    # True: blank captions only, False: hide blank captions
+    empty: Optional[bool] = None
+    contains: Optional[str] = None
+    subfolder: Optional[str] = None
+    # re-check files on disk before the first page
+    refresh: bool = True
+
+
+class CaptionPageResponse(BaseModel):
+    rows: List[CaptionEntry]
+    total: int
+    next_cursor: Optional[str] = None
+
+
 class CaptionPreviewRequest(BaseModel):
     entries: List[CaptionEntry]
     prefix: str = ""
@@ -108,6 +260,8 @@ class CaptionRunRequest(BaseModel):
     make_backup: bool = False
     entries: List[CaptionEntry]
     operations: List[Operation] = Field(default_factory=list)
+    # write the report as .csv.gz
+    compress_report: bool = False
 
 
 class CaptionRunResponse(BaseModel):
@@ -115,12 +269,58 @@ class CaptionRunResponse(BaseModel):
     log: List[str]
     csv_path: str
     snapshot_id: Optional[str]
+    # download via GET /dataset/reports/{report_id}?folder=...
+    report_id: Optional[str] = None
 
 
 class CaptionSnapshotRequest(BaseModel):
     folder: str
     snapshot_id: str
     mode: Literal["before", "after"]
+    # restore only these relative ids and/or the ids matching this glob
+    files: Optional[List[str]] = None
+    pattern: Optional[str] = None
+
+
+class SnapshotListRequest(BaseModel):
+    folder: str
+
+
+class SnapshotRow(BaseModel):
+    snapshot_id: str
+    created_at: str
+    version: int
+    files: int
+    # snapshot folder plus the pack it wrote (shared packs count once, at their writer)
+    bytes: int
+    raw_bytes: int
+
+
+class SnapshotRetention(BaseModel):
+    # None lifts that limit; the newest snapshot is always kept
+    keep_last: Optional[int] = Field(default=None, ge=1)
+    max_bytes: Optional[int] = Field(default=None, ge=0)
+    max_age_days: Optional[float] = Field(default=None, gt=0)
+
+
+class SnapshotListResponse(BaseModel):
+    snapshots: List[SnapshotRow]
+    # everything under __undo that snapshots use: folders and all packs
+    total_bytes: int
+    retention: SnapshotRetention
+
+
+class SnapshotRetentionRequest(SnapshotRetention):
+    folder: str
+    # apply the new policy now instead of on the next collection
+    prune: bool = True
+
+
+class SnapshotPruneResponse(BaseModel):
+    removed: List[str]
+    removed_packs: List[str]
+    freed_bytes: int
+    retention: SnapshotRetention
 
 
 class CopyCaptionsRequest(BaseModel):
@@ -128,12 +328,19 @@ class CopyCaptionsRequest(BaseModel):
     dest: str
     allow_overwrite: bool = False
     dry_run: bool = True
+    compress_report: bool = False
+    # plan_id of a dry run with the same src/dest/allow_overwrite to carry out
+    plan_id: Optional[str] = None
 
 
 class CopyCaptionsResponse(BaseModel):
     summary: dict
     log: List[str]
     csv_path: str
+    # the report is written into `dest`
+    report_id: Optional[str] = None
+    # set by dry runs: pass it back to copy exactly what was reported
+    plan_id: Optional[str] = None
 
 
 class MakeBlankRequest(BaseModel):
@@ -141,12 +348,14 @@ class MakeBlankRequest(BaseModel):
     recursive: bool = False
     dry_run: bool = True
     extensions: Optional[List[str]] = None
+    compress_report: bool = False
 
 
 class MakeBlankResponse(BaseModel):
     summary: dict
     log: List[str]
     csv_path: str
+    report_id: Optional[str] = None
 
 class FaceJobResponse(BaseModel):
     job_id: str
@@ -162,6 +371,7 @@ class FaceJobStatusResponse(BaseModel):
     logs: List[str]
     started_at: float
     finished_at: Optional[float]
+    result: Optional[dict] = None
 
 class FaceStep1Request(BaseModel):
     folder: str
@@ -185,194 +395,523 @@ class FaceCropRequest(BaseModel):
 
 # ---------- Core rename logic (mirrors your script) ----------
 
-def normalize_fs_path(path: str) -> str:
+def iter_new_names(
+    files_in_folder: Sequence[str],
+    plan: RenamePlan,
+    summary: Summary,
+    collided: Optional[Set[str]] = None,
+    engine: str = "python",
+    memo: Optional[StepColumns] = None,
+) -> Iterator[Tuple[str, str]]:
     """
-    Convert incoming Windows-style paths (e.g., E:\\foo\\bar) to WSL mounts
-    so os.path calls work when the API runs inside WSL.
+    Yield (original, new) pairs one file at a time. The counters on `summary`
+    are filled in once the last pair has been produced; names that needed a
+    `_N` suffix are added to `collided` when given. With `memo` (the step
+    columns of this listing) steps shared with the previous preview are not
+    recomputed. Pairs are produced lazily, but not in constant memory: a
+    name may only take a target no unchanged file holds, so every candidate
+    and the set of unchanged names are computed before the first pair.
     """
-    if not path:
-        return path
-
-    sanitized = path.strip()
-    if not sanitized:
-        return sanitized
+    result = None
+    if engine == "columnar" and len(files_in_folder) >= MIN_COLUMNAR_NAMES and columnar_available():
+        try:
+            result = resolve_columnar(files_in_folder, plan)
+        except (UnicodeEncodeError, ValueError):
+            # undecodable names (surrogate escapes) cannot live in the arrays
+            result = None
+    elif memo is not None:
+        result = memo.resolve(plan)
+    if result is not None:
+        yield from zip(files_in_folder, result.new_names)
+        if collided is not None:
+            collided.update(result.collided)
+        summary.renamed = result.renamed
+        summary.unchanged = len(files_in_folder) - result.renamed
+        summary.collisions = result.collisions
+        return
+
+    candidate_for = plan.candidate
+    candidates = [candidate_for(fname) for fname in files_in_folder]
+    # A name that is itself renamed away in this batch is free to take (the
+    # executor orders the chain); only files keeping their name block it.
+    staying = {
+        fname for fname, candidate in zip(files_in_folder, candidates)
+        if candidate == fname
+    }
+    resolve = CollisionIndex(staying).resolve
+    renamed_count = 0
+    collision_count = 0
+
+    for fname, candidate in zip(files_in_folder, candidates):
+        final_name, was_collision = resolve(fname, candidate)
+        if was_collision:
+            collision_count += 1
+            if collided is not None:
+                collided.add(fname)
+        if final_name != fname:
+            renamed_count += 1
+        yield fname, final_name
+
+    summary.renamed = renamed_count
+    summary.unchanged = len(files_in_folder) - renamed_count
+    summary.collisions = collision_count
+
+
+def compute_new_names(folder: str, operations: Union[List[Operation], RenamePlan]):
+    plan = operations if isinstance(operations, RenamePlan) else RenamePlan(operations)
+    summary = Summary(renamed=0, unchanged=0, collisions=0)
+    mapping = dict(iter_tree_names(normalize_fs_path(folder), plan, summary))
+    return list(mapping), mapping, summary
+
+
+def iter_tree_names(
+    folder: str,
+    plan: RenamePlan,
+    summary: Summary,
+    recursive: bool = False,
+    collided: Optional[Set[str]] = None,
+    fingerprints: Optional[Dict[str, Fingerprint]] = None,
+    engine: str = "python",
+    memoize: bool = True,
+) -> Iterator[Tuple[str, str]]:
+    """
+    iter_new_names over `folder` or, when recursive, over every directory
+    below it as listed by folder_index.walk. Each directory is its own
+    collision domain; names are relative to `folder` with "/" separators.
+    The python engine works from each directory's memoized step columns
+    unless `memoize` is False.
+    """
+    if recursive:
+        listings = folder_index.walk(folder, skip_dirs=RESERVED_DIRS)
+    else:
+        listings = iter([("", folder_index.get(folder))])
+    for rel, listing in listings:
+        if fingerprints is not None:
+            fingerprints[rel] = listing.fingerprint
+        dir_summary = Summary(renamed=0, unchanged=0, collisions=0)
+        memo = preview_memo.columns_for(listing.folder, listing) if memoize and engine == "python" else None
+        if not rel:
+            yield from iter_new_names(listing.files, plan, dir_summary, collided, engine, memo)
+        else:
+            prefix = rel + "/"
+            dir_collided: Optional[Set[str]] = set() if collided is not None else None
+            names = iter_new_names(listing.files, plan, dir_summary, dir_collided, engine, memo)
+            for fname, new_name in names:
+                yield prefix + fname, prefix + new_name
+            if dir_collided:
+                collided.update(prefix + fname for fname in dir_collided)
+        summary.renamed += dir_summary.renamed
+        summary.unchanged += dir_summary.unchanged
+        summary.collisions += dir_summary.collisions
+
+
+@dataclass
+class StoredPlan:
+    plan_id: str
+    folder: str
+    # relative directory ("" for `folder` itself) -> listing fingerprint
+    fingerprints: Dict[str, Fingerprint]
+    files: List[str]
+    mapping: Dict[str, str]
+    collided: Set[str]
+    summary: Summary
+    created_at: float = field(default_factory=time.time)
+
+
+def build_stored_plan(
+    folder: str,
+    plan: RenamePlan,
+    recursive: bool = False,
+    engine: str = "python",
+) -> StoredPlan:
+    """Compute a folder's mapping together with the listing fingerprints it was based on."""
+    summary = Summary(renamed=0, unchanged=0, collisions=0)
+    collided: Set[str] = set()
+    fingerprints: Dict[str, Fingerprint] = {}
+    mapping = dict(
+        iter_tree_names(folder, plan, summary, recursive, collided, fingerprints, engine)
+    )
+    return StoredPlan(
+        plan_id=uuid.uuid4().hex,
+        folder=folder,
+        fingerprints=fingerprints,
+        files=list(mapping),
+        mapping=mapping,
+        collided=collided,
+        summary=summary,
+    )
 
-    # strip wrapping quotes from paths copied via “Copy as path”
-    if sanitized[0] in {"'", '"'} and sanitized[-1] == sanitized[0]:
-        sanitized = sanitized[1:-1].strip()
-        if not sanitized:
-            return sanitized
 
-    if sanitized.startswith("\\\\?\\"):
-        sanitized = sanitized[4:]
+@dataclass
+class StoredCopyPlan:
+    plan_id: str
+    plan: CaptionCopyPlan
+    created_at: float = field(default_factory=time.time)
 
-    drive, remainder = ntpath.splitdrive(sanitized)
 
-    if os.name == "posix" and drive:
-        drive_letter = drive.replace(":", "").lower()
-        remainder = remainder.replace("\\", "/").lstrip("/")
-        return f"/mnt/{drive_letter}/{remainder}" if remainder else f"/mnt/{drive_letter}"
+class PlanStore:
+    """Previews handed out as plan ids so /run (or a caption copy) can commit them without recomputing."""
 
-    return sanitized
+    def __init__(self, max_plans: int = MAX_STORED_PLANS, ttl: float = PLAN_TTL_SECONDS):
+        self._plans: "OrderedDict[str, Union[StoredPlan, StoredCopyPlan]]" = OrderedDict()
+        self._max_plans = max_plans
+        self._ttl = ttl
+        self._lock = threading.Lock()
 
-def apply_add_prefix(base: str, prefix: str) -> str:
-    if not prefix:
-        return base
-    if prefix[-1] in DELIMS:
-        return prefix + base
-    return prefix + "-" + base
+    def put(self, stored: Union[StoredPlan, StoredCopyPlan]) -> None:
+        with self._lock:
+            self._plans[stored.plan_id] = stored
+            while len(self._plans) > self._max_plans:
+                self._plans.popitem(last=False)
 
+    def get(self, plan_id: str) -> Optional[Union[StoredPlan, StoredCopyPlan]]:
+        with self._lock:
+            stored = self._plans.get(plan_id)
+            if stored is not None and time.time() - stored.created_at > self._ttl:
+                del self._plans[plan_id]
+                return None
+            return stored
 
-def apply_remove_prefix(base: str, prefix: str) -> str:
-    if not prefix:
-        return base
-    if base.startswith(prefix):
-        new_base = base[len(prefix):]
-        if new_base and new_base[0] in DELIMS:
-            new_base = new_base[1:]
-        return new_base
-    return base
+    def discard(self, plan_id: str) -> None:
+        with self._lock:
+            self._plans.pop(plan_id, None)
 
 
-def apply_add_suffix(base: str, suffix: str) -> str:
-    if not suffix:
-        return base
-    if suffix[0] in DELIMS:
-        return base + suffix
-    return base + "-" + suffix
+plan_store = PlanStore()
+copy_plan_store = PlanStore()
+# /preview/watch frames; each watch holds one plan here, so a busy watch
+# never evicts plans handed out by /preview
+watch_plan_store = PlanStore()
 
 
-def apply_remove_suffix(base: str, suffix: str) -> str:
-    if not suffix:
-        return base
-    if base.endswith(suffix):
-        new_base = base[:-len(suffix)]
-        if new_base and new_base[-1] in DELIMS:
-            new_base = new_base[:-1]
-        return new_base
-    return base
+def _discard_plan(plan_id: str) -> None:
+    plan_store.discard(plan_id)
+    watch_plan_store.discard(plan_id)
 
 
-def compute_new_names(folder: str, operations: List[Operation]):
-    folder = normalize_fs_path(folder)
-    if not os.path.isdir(folder):
-        raise FileNotFoundError(f"Folder not found: {folder}")
+# ---------- API endpoints ----------
 
-    files_in_folder = sorted(
-        [
-            f for f in os.listdir(folder)
-            if os.path.isfile(os.path.join(folder, f))
-        ]
+@app.post("/preview", response_model=PreviewResponse)
+def preview(req: PreviewRequest):
+    try:
+        stored = build_stored_plan(
+            normalize_fs_path(req.folder), RenamePlan(req.operations), req.recursive, req.engine
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    plan_store.put(stored)
+    return mapping_response(
+        req.format, stored.files, stored.mapping, PreviewResponse,
+        summary=stored.summary, plan_id=stored.plan_id,
     )
 
-    # sort operations by step (1–4)
-    ops_sorted = sorted(operations, key=lambda o: o.step)
-
-    existing_names = set(files_in_folder)
-    mapping = {}
-    used_targets = set()
-    renamed_count = 0
-    collision_count = 0
-
-    for fname in files_in_folder:
-        base, ext = os.path.splitext(fname)
-        for op in ops_sorted:
-            if op.type == "add_prefix":
-                base = apply_add_prefix(base, op.value)
-            elif op.type == "remove_prefix":
-                base = apply_remove_prefix(base, op.value)
-            elif op.type == "add_suffix":
-                base = apply_add_suffix(base, op.value)
-            elif op.type == "remove_suffix":
-                base = apply_remove_suffix(base, op.value)
 
-        candidate = base + ext
-        final_name = candidate
-
-        if final_name != fname:
-            if final_name in used_targets or (
-                final_name in existing_names and final_name != fname
-            ):
-                collision_count += 1
-                root, ex = os.path.splitext(candidate)
-                counter = 1
-                new_candidate = f"{root}_{counter}{ex}"
-                while new_candidate in used_targets or (
-                    new_candidate in existing_names and new_candidate != fname
-                ):
-                    counter += 1
-                    new_candidate = f"{root}_{counter}{ex}"
-                final_name = new_candidate
+def mapping_response(
+    fmt: str,
+    names: Sequence[str],
+    mapping: Dict[str, str],
+    model: type,
+    **fields,
+) -> Union[BaseModel, Response]:
+    """
+    Build `model` with one FileMapping per name for the "rows" format. The
+    compact formats skip per-row models and are encoded straight to bytes.
+    """
+    if fmt == "rows":
+        files = [FileMapping(original=fname, new=mapping[fname]) for fname in names]
+        return model(files=files, **fields)
+    payload = mapping_payload(fmt, names, mapping, _plain_fields(fields))
+    return Response(content=dumps(payload), media_type="application/json")
 
-        if final_name != fname:
-            renamed_count += 1
 
-        used_targets.add(final_name)
-        mapping[fname] = final_name
+def _plain_fields(fields: Dict) -> Dict:
+    def plain(value):
+        if isinstance(value, BaseModel):
+            return value.dict()
+        if isinstance(value, list):
+            return [plain(item) for item in value]
+        return value
 
-    unchanged_count = len(files_in_folder) - renamed_count
+    return {key: plain(value) for key, value in fields.items()}
 
-    summary = Summary(
-        renamed=renamed_count,
-        unchanged=unchanged_count,
-        collisions=collision_count,
-    )
-    return files_in_folder, mapping, summary
 
+@app.post("/preview/stream")
+def preview_stream(req: PreviewRequest):
+    """
+    NDJSON variant of /preview for very large folders: one
+    {"original", "new"} object per line, sent in chunks, followed by a
+    single {"summary": {...}} trailer line. No mapping, response models or
+    JSON document are built, but memory still grows with the folder: its
+    listing and every candidate name are held while the lines go out
+    (see iter_new_names).
+    """
+    folder = normalize_fs_path(req.folder)
+    if not os.path.isdir(folder):
+        raise HTTPException(status_code=404, detail=f"Folder not found: {folder}")
+
+    def lines():
+        summary = Summary(renamed=0, unchanged=0, collisions=0)
+        chunk: List[str] = []
+        plan = RenamePlan(req.operations)
+        # step columns hold every name of a directory; the stream stays per-name
+        names = iter_tree_names(folder, plan, summary, req.recursive, engine=req.engine, memoize=False)
+        for fname, new_name in names:
+            chunk.append(json.dumps({"original": fname, "new": new_name}))
+            if len(chunk) >= STREAM_CHUNK_LINES:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        chunk.append(json.dumps({"summary": summary.dict()}))
+        yield "\n".join(chunk) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+class PreviewWatch:
+    """
+    The last preview of a watched folder. Each update recomputes the
+    mapping from a listing the folder watcher already holds (no rescan) and
+    reports only the rows whose new name differs from the previous update.
+    """
 
-# ---------- API endpoints ----------
+    def __init__(self, folder: str, plan: RenamePlan, engine: str = "python"):
+        self.folder = folder
+        self.plan = plan
+        self.engine = engine
+        self.mapping: Dict[str, str] = {}
+        self.plan_id: Optional[str] = None
+
+    def update(self, listing: FolderListing, kind: str = "delta") -> Optional[Dict]:
+        summary = Summary(renamed=0, unchanged=0, collisions=0)
+        collided: Set[str] = set()
+        memo = preview_memo.columns_for(listing.folder, listing) if self.engine == "python" else None
+        mapping = dict(iter_new_names(listing.files, self.plan, summary, collided, self.engine, memo))
+        previous = self.mapping
+        original = [name for name, new_name in mapping.items() if previous.get(name) != new_name]
+        removed = [name for name in previous if name not in mapping]
+        self.mapping = mapping
+        if kind == "delta" and not original and not removed:
+            return None
+        # the pushed preview can be committed with /run like a POSTed one
+        stored = StoredPlan(
+            plan_id=uuid.uuid4().hex,
+            folder=self.folder,
+            fingerprints={"": listing.fingerprint},
+            files=list(mapping),
+            mapping=mapping,
+            collided=collided,
+            summary=summary,
+        )
+        if self.plan_id is not None:
+            watch_plan_store.discard(self.plan_id)
+        watch_plan_store.put(stored)
+        self.plan_id = stored.plan_id
+        return {
+            "type": kind,
+            "original": original,
+            "new": [mapping[name] for name in original],
+            "removed": removed,
+            "summary": summary.dict(),
+            "plan_id": stored.plan_id,
+        }
+
+
+async def _send_payload(websocket: WebSocket, payload: Dict) -> None:
+    await websocket.send_text(dumps(payload).decode("utf-8"))
+
+
+@app.websocket("/preview/watch")
+async def preview_watch(websocket: WebSocket):
+    """
+    Live /preview. The first message is a PreviewRequest (non-recursive);
+    the reply is a "snapshot" frame with every row, then a "delta" frame
+    whenever files appear in or leave the folder, carrying only the rows
+    whose new name changed plus the originals that were removed. Sending
+    {"operations": [...]} later swaps the plan and yields a delta too. Each
+    frame has a fresh plan_id for /run, replacing the previous frame's. A
+    "gone" frame ends the stream when the folder is deleted or moved.
+    """
+    await websocket.accept()
+    try:
+        req = PreviewRequest(**await websocket.receive_json())
+    except (ValueError, ValidationError) as e:
+        await _send_payload(websocket, {"type": "error", "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+    if req.recursive:
+        await _send_payload(websocket, {"type": "error", "detail": "recursive watch is not supported"})
+        await websocket.close(code=1003)
+        return
+
+    folder = normalize_fs_path(req.folder)
+    loop = asyncio.get_running_loop()
+    changes: "asyncio.Queue[FolderChange]" = asyncio.Queue()
+
+    def on_change(change: FolderChange) -> None:
+        loop.call_soon_threadsafe(changes.put_nowait, change)
 
-@app.post("/preview", response_model=PreviewResponse)
-def preview(req: PreviewRequest):
     try:
-        files_in_folder, mapping, summary = compute_new_names(
-            normalize_fs_path(req.folder),
-            req.operations,
-        )
+        token = await run_in_threadpool(folder_watcher.subscribe, folder, on_change)
     except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        await _send_payload(websocket, {"type": "error", "detail": str(e)})
+        await websocket.close(code=1008)
+        return
 
-    files = [
-        FileMapping(original=fname, new=mapping[fname])
-        for fname in files_in_folder
-    ]
-    return PreviewResponse(files=files, summary=summary)
+    watch = PreviewWatch(folder, RenamePlan(req.operations), req.engine)
+    receiver = getter = None
+    try:
+        listing = await run_in_threadpool(folder_index.get, folder)
+        await _send_payload(websocket, await run_in_threadpool(watch.update, listing, "snapshot"))
+        receiver = asyncio.ensure_future(websocket.receive_json())
+        getter = asyncio.ensure_future(changes.get())
+        while True:
+            done, _ = await asyncio.wait({receiver, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                change = getter.result()
+                # only the newest listing matters once several changes queued up
+                while not changes.empty() and not change.gone:
+                    change = changes.get_nowait()
+                if change.gone:
+                    await _send_payload(websocket, {"type": "gone", "removed": list(watch.mapping)})
+                    break
+                listing = change.listing
+                payload = await run_in_threadpool(watch.update, listing)
+                if payload is not None:
+                    await _send_payload(websocket, payload)
+                getter = asyncio.ensure_future(changes.get())
+            if receiver in done:
+                message = receiver.result()
+                try:
+                    operations = [Operation(**op) for op in message.get("operations", [])]
+                except (AttributeError, TypeError, ValidationError) as e:
+                    await _send_payload(websocket, {"type": "error", "detail": str(e)})
+                else:
+                    watch.plan = RenamePlan(operations)
+                    payload = await run_in_threadpool(watch.update, listing)
+                    if payload is not None:
+                        await _send_payload(websocket, payload)
+                receiver = asyncio.ensure_future(websocket.receive_json())
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in (receiver, getter):
+            if task is not None:
+                task.cancel()
+        folder_watcher.unsubscribe(token)
 
 
 @app.post("/run", response_model=RunResponse)
 def run(req: RunRequest):
-    include_set = set(req.include_files) if req.include_files else None
-    try:
-        files_in_folder, mapping, summary = compute_new_names(
-            normalize_fs_path(req.folder),
-            req.operations,
+    """
+    Apply a rename. With `plan_id` the mapping reviewed in /preview is
+    committed as-is, provided the folder has not changed since; otherwise
+    the mapping is computed from `operations`.
+    """
+    return execute_run(req).response(req.format)
+
+
+@dataclass
+class RunOutcome:
+    names: List[str]
+    mapping: Dict[str, str]
+    summary: Summary
+    errors: List[RenameError] = field(default_factory=list)
+    journal_id: Optional[str] = None
+
+    def response(self, fmt: str) -> Union[RunResponse, Response]:
+        return mapping_response(
+            fmt, self.names, self.mapping, RunResponse,
+            summary=self.summary, errors=self.errors, journal_id=self.journal_id,
         )
-    except FileNotFoundError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+
+    def result(self, fmt: str) -> dict:
+        """The response body as plain data, for job results."""
+        fields = {"summary": self.summary, "errors": self.errors, "journal_id": self.journal_id}
+        if fmt == "rows":
+            return mapping_response(fmt, self.names, self.mapping, RunResponse, **fields).dict()
+        return mapping_payload(fmt, self.names, self.mapping, _plain_fields(fields))
+
+
+def execute_run(
+    req: RunRequest,
+    progress: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> RunOutcome:
+    """
+    Body of /run; `progress(done, total)` is called as renames complete.
+    Once `should_stop()` is True the remaining renames are not started and
+    are listed in `errors` as cancelled.
+    """
+    resolved = resolve_folder(req.folder)
+    folder = resolved.path
+    include_set = set(req.include_files) if req.include_files else None
+    if req.plan_id:
+        stored = _load_stored_plan(req.plan_id, folder)
+    else:
+        try:
+            stored = build_stored_plan(
+                folder, RenamePlan(req.operations), req.recursive, req.engine
+            )
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    files_in_folder = stored.files
+    mapping = stored.mapping
 
     # actually apply renames
     if include_set is not None:
         include_set = {fname for fname in include_set if fname in mapping}
         if not include_set:
-            return RunResponse(files=[], summary=Summary(renamed=0, unchanged=0, collisions=0))
-    errors = []
-    for old_name, new_name in mapping.items():
-        if include_set is not None and old_name not in include_set:
-            continue
-        if old_name == new_name:
-            continue
-        src = os.path.join(normalize_fs_path(req.folder), old_name)
-        dst = os.path.join(normalize_fs_path(req.folder), new_name)
-        try:
-            os.rename(src, dst)
-        except OSError as e:
-            errors.append((old_name, new_name, str(e)))
+            return RunOutcome(names=[], mapping={}, summary=Summary(renamed=0, unchanged=0, collisions=0))
+    pairs = [
+        (old_name, new_name)
+        for old_name, new_name in mapping.items()
+        if old_name != new_name and (include_set is None or old_name in include_set)
+    ]
+    done = 0
+
+    def advance(count: int) -> None:
+        nonlocal done
+        done += count
+        if progress:
+            progress(done, len(pairs))
+
+    advance(0)
+    chains = plan_chains(pairs)
+    journal = RenameJournal.create(folder, chains) if pairs else None
+    if journal is not None:
+        _claim_journal(journal.journal_id)
+    try:
+        by_src = execute_chains(
+            folder,
+            chains,
+            [0] * len(chains),
+            workers=resolved.strategy.rename_workers,
+            occupied=set(files_in_folder),
+            progress=advance,
+            should_stop=should_stop,
+            journal=journal,
+        )
+    except BaseException:
+        if journal is not None:
+            journal.abandon()
+        raise
+    else:
+        if journal is not None:
+            skipped = any(res.error == CANCELLED for res in by_src.values())
+            journal.close("cancelled" if skipped else "completed")
+    finally:
+        if journal is not None:
+            _active_journals.discard(journal.journal_id)
+    errors = _rename_errors(by_src[src] for src, _ in pairs)
+    for rel in stored.fingerprints:
+        path = os.path.join(folder, rel) if rel else folder
+        folder_index.invalidate(path)
+        preview_memo.invalidate(path)
+    _discard_plan(stored.plan_id)
 
-    # You could add errors to response later if we want
     def recompute_summary():
         if include_set is None:
-            return summary
-        ops_sorted = sorted(req.operations, key=lambda o: o.step)
+            return stored.summary
         renamed_count = 0
         collision_count = 0
         total = 0
@@ -380,34 +919,200 @@ def run(req: RunRequest):
             if fname not in include_set:
                 continue
             total += 1
-            new_name = mapping.get(fname, fname)
-            if new_name == fname:
+            if mapping[fname] == fname:
                 continue
             renamed_count += 1
-            base, ext = os.path.splitext(fname)
-            for op in ops_sorted:
-                if op.type == "add_prefix":
-                    base = apply_add_prefix(base, op.value)
-                elif op.type == "remove_prefix":
-                    base = apply_remove_prefix(base, op.value)
-                elif op.type == "add_suffix":
-                    base = apply_add_suffix(base, op.value)
-                elif op.type == "remove_suffix":
-                    base = apply_remove_suffix(base, op.value)
-            candidate = base + ext
-            if candidate != new_name:
+            if fname in stored.collided:
                 collision_count += 1
         unchanged_count = total - renamed_count
         return Summary(renamed=renamed_count, unchanged=unchanged_count, collisions=collision_count)
 
     effective_summary = recompute_summary()
 
-    files = [
-        FileMapping(original=fname, new=mapping[fname])
-        for fname in files_in_folder
+    names = [
+        fname for fname in files_in_folder
         if include_set is None or fname in include_set
     ]
-    return RunResponse(files=files, summary=effective_summary)
+    return RunOutcome(
+        names=names,
+        mapping=mapping,
+        summary=effective_summary,
+        errors=errors,
+        journal_id=journal.journal_id if journal else None,
+    )
+
+
+def _rename_errors(results: Iterable[RenameResult]) -> List[RenameError]:
+    return [
+        RenameError(original=res.src, new=res.dst, error=res.error)
+        for res in results
+        if not res.ok
+    ]
+
+
+def _load_stored_plan(plan_id: str, folder: str) -> StoredPlan:
+    stored = plan_store.get(plan_id) or watch_plan_store.get(plan_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Plan not found or expired: {plan_id}")
+    if stored.folder != folder:
+        raise HTTPException(status_code=409, detail="Plan was previewed for a different folder")
+    for rel, expected in stored.fingerprints.items():
+        try:
+            fingerprint = folder_fingerprint(os.path.join(folder, rel) if rel else folder)
+        except FileNotFoundError:
+            if not rel:
+                raise HTTPException(status_code=404, detail=f"Folder not found: {folder}")
+            fingerprint = None
+        if fingerprint != expected:
+            _discard_plan(plan_id)
+            raise HTTPException(status_code=409, detail="Folder changed since preview; preview again")
+    return stored
+
+
+# ---------- Rename Journals ----------
+
+# Journals being written by a run in this process; the rest without an end
+# record were interrupted and can be resumed.
+_active_journals: Set[str] = set()
+_active_journals_lock = threading.Lock()
+
+
+def _read_journal_or_404(folder: str, journal_id: str) -> JournalState:
+    try:
+        return read_journal(folder, journal_id)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _journal_info(state: JournalState) -> JournalInfo:
+    status = state.status
+    if status == "running" and state.journal_id not in _active_journals:
+        status = "interrupted"
+    done = 0
+    for chain, point in zip(state.chains, resume_points(state)):
+        done += sum(1 for step in chain[:point] if step.final)
+    return JournalInfo(
+        journal_id=state.journal_id,
+        status=status,
+        created_at=state.created_at,
+        total=state.total,
+        done=done,
+        failed=len(state.failed),
+        undo_of=state.undo_of,
+        undone_by=state.undone_by,
+    )
+
+
+def _journal_response(folder: str, state: JournalState, by_src: Dict[str, RenameResult]) -> RunResponse:
+    for rel in touched_dirs(state):
+        path = os.path.join(folder, rel) if rel else folder
+        folder_index.invalidate(path)
+        preview_memo.invalidate(path)
+    results = [by_src[step.pair[0]] for chain in state.chains for step in chain if step.final]
+    errors = _rename_errors(results)
+    return RunResponse(
+        files=[FileMapping(original=res.src, new=res.dst) for res in results],
+        summary=Summary(renamed=len(results) - len(errors), unchanged=0, collisions=0),
+        errors=errors,
+        journal_id=state.journal_id,
+    )
+
+
+def _claim_journal(journal_id: str) -> None:
+    with _active_journals_lock:
+        if journal_id in _active_journals:
+            raise HTTPException(status_code=409, detail=f"Journal is in use: {journal_id}")
+        _active_journals.add(journal_id)
+
+
+@app.get("/run/journals", response_model=List[JournalInfo])
+def list_journals(folder: str):
+    folder = normalize_fs_path(folder)
+    if not os.path.isdir(folder):
+        raise HTTPException(status_code=404, detail=f"Folder not found: {folder}")
+    return [_journal_info(read_journal(folder, jid)) for jid in list_journal_ids(folder)]
+
+
+@app.post("/run/journals/{journal_id}/resume", response_model=RunResponse)
+def resume_journal(journal_id: str, req: JournalRequest):
+    """
+    Finish a run that was interrupted or cancelled. Steps already done are
+    worked out from the journal and the files on disk, then the rest run.
+    """
+    folder = normalize_fs_path(req.folder)
+    state = _read_journal_or_404(folder, journal_id)
+    if state.undone_by:
+        raise HTTPException(status_code=409, detail=f"Run was undone by {state.undone_by}")
+    _claim_journal(journal_id)
+    try:
+        points = resume_points(state)
+        occupied = {
+            chain[point].dst
+            for chain, point in zip(state.chains, points)
+            if point < len(chain) and os.path.lexists(os.path.join(folder, chain[point].dst))
+        }
+        journal = RenameJournal.reopen(folder, journal_id)
+        try:
+            by_src = execute_chains(folder, state.chains, points, occupied=occupied, journal=journal)
+        except BaseException:
+            journal.abandon()
+            raise
+        journal.close()
+    finally:
+        _active_journals.discard(journal_id)
+    return _journal_response(folder, state, by_src)
+
+
+@app.post("/run/journals/{journal_id}/undo", response_model=RunResponse)
+def undo_journal(journal_id: str, req: JournalRequest):
+    """
+    Move every file the run renamed back to its original name, on the
+    parallel executor. The undo is journaled itself, so it can be resumed;
+    the returned journal_id is the undo's.
+    """
+    folder = normalize_fs_path(req.folder)
+    state = _read_journal_or_404(folder, journal_id)
+    if state.undone_by:
+        raise HTTPException(status_code=409, detail=f"Run was already undone by {state.undone_by}")
+    _claim_journal(journal_id)
+    try:
+        pairs = undo_pairs(state, resume_points(state))
+        sources = {src for src, _ in pairs}
+        occupied = {
+            dst for _, dst in pairs
+            if dst not in sources and os.path.lexists(os.path.join(folder, dst))
+        }
+        chains = plan_chains(pairs)
+        undo = RenameJournal.create(folder, chains, undo_of=journal_id)
+        try:
+            by_src = execute_chains(folder, chains, [0] * len(chains), occupied=occupied, journal=undo)
+        except BaseException:
+            undo.abandon()
+            raise
+        undo.close()
+        undo_state = read_journal(folder, undo.journal_id)
+        response = _journal_response(folder, undo_state, by_src)
+        if not response.errors:
+            mark_undone(folder, journal_id, undo.journal_id)
+    finally:
+        _active_journals.discard(journal_id)
+    return response
+
+
+# ---------- Filesystem ----------
+
+@app.get("/fs/strategy", response_model=IOStrategyResponse)
+def fs_strategy(folder: str):
+    """Mount holding `folder` and the I/O strategy the rename/dataset/face paths use for it."""
+    resolved = resolve_folder(folder)
+    if not os.path.isdir(resolved.path):
+        raise HTTPException(status_code=404, detail=f"Folder not found: {resolved.path}")
+    return IOStrategyResponse(
+        folder=resolved.path,
+        mount_point=resolved.mount.mount_point if resolved.mount else None,
+        fstype=resolved.mount.fstype if resolved.mount else None,
+        **asdict(resolved.strategy),
+    )
 
 
 # ---------- Dataset Actions Endpoints ----------
@@ -415,15 +1120,94 @@ def run(req: RunRequest):
 
 @app.post("/dataset/captions/load", response_model=CaptionLoadResponse)
 def dataset_load_captions(req: CaptionLoadRequest):
+    """
+    The CaptionLoadResponse document, streamed: `count` is known once the
+    captions are listed, then rows are written in chunks while the rest are
+    still being read (dataset_actions_core.stream_caption_rows).
+    """
+    folder = normalize_fs_path(req.folder)
     try:
-        data = load_caption_rows(normalize_fs_path(req.folder), req.recursive)
+        if req.use_index:
+            index = CaptionIndex(folder)
+            count = index.refresh(req.recursive).count
+            rows = index.rows(req.recursive)
+        else:
+            count, rows = stream_caption_rows(folder, req.recursive)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    rows = [
-        CaptionEntry(id=row["id"], path=row["path"], filename=row["filename"], caption=row["caption"])
-        for row in data.get("rows", [])
-    ]
-    return CaptionLoadResponse(rows=rows, count=data.get("count", len(rows)))
+
+    def body():
+        yield b'{"count":' + str(count).encode("ascii") + b',"rows":['
+        chunk: List[Dict] = []
+        first = True
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= STREAM_CHUNK_LINES:
+                yield (b"" if first else b",") + dumps(chunk)[1:-1]
+                chunk, first = [], False
+        if chunk:
+            yield (b"" if first else b",") + dumps(chunk)[1:-1]
+        yield b"]}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+@app.post("/dataset/captions/index", response_model=CaptionIndexResponse)
+def dataset_index_captions(req: CaptionIndexRequest):
+    """Create or refresh the dataset's caption index (caption_index.py)."""
+    try:
+        stats = CaptionIndex(normalize_fs_path(req.folder)).refresh(req.recursive)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return CaptionIndexResponse(**asdict(stats))
+
+
+@app.post("/dataset/captions/search", response_model=CaptionSearchResponse)
+def dataset_search_captions(req: CaptionSearchRequest):
+    """
+    Full-text search over the caption index; the index is built on first
+    use. Rows have the load shape, so results can go straight to preview/run.
+    """
+    try:
+        index = CaptionIndex(normalize_fs_path(req.folder))
+        if req.refresh or not index.exists():
+            index.refresh(req.recursive)
+        count, rows = index.search(req.query, req.limit, req.recursive)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CaptionSearchResponse(rows=[CaptionEntry(**row) for row in rows], count=count)
+
+
+@app.post("/dataset/captions/page", response_model=CaptionPageResponse)
+def dataset_page_captions(req: CaptionPageRequest):
+    """
+    One filtered, sorted page of the caption index. The first page (no
+    cursor) refreshes the index; following pages read it as is, so a
+    listing stays stable while it is paged through.
+    """
+    try:
+        index = CaptionIndex(normalize_fs_path(req.folder))
+        if req.cursor is None and (req.refresh or not index.exists()):
+            index.refresh(req.recursive)
+        total, rows, next_cursor = index.page(
+            req.limit,
+            req.cursor,
+            req.sort,
+            req.descending,
+            req.recursive,
+            req.empty,
+            req.contains,
+            req.subfolder,
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CaptionPageResponse(
+        rows=[CaptionEntry(**row) for row in rows], total=total, next_cursor=next_cursor
+    )
 
 
 @app.post("/dataset/captions/preview", response_model=CaptionPreviewResponse)
@@ -449,40 +1233,116 @@ def dataset_run_captions(req: CaptionRunRequest):
             req.dry_run,
             req.make_backup,
             [op.dict() for op in req.operations] if req.operations else None,
+            compress_report=req.compress_report,
         )
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    if result.get("snapshot_id"):
+        snapshot_collector.schedule(Path(normalize_fs_path(req.folder)) / UNDO_DIR)
     return CaptionRunResponse(
         summary=result["summary"],
         log=result["log"],
         csv_path=result["csv_path"],
         snapshot_id=result.get("snapshot_id"),
+        report_id=result["report_id"],
     )
 
 
 @app.post("/dataset/captions/snapshot/restore")
 def dataset_restore_snapshot(req: CaptionSnapshotRequest):
     try:
-        restored, errors = restore_snapshot(
-            normalize_fs_path(req.folder), req.snapshot_id, req.mode
+        return restore_snapshot_files(
+            normalize_fs_path(req.folder), req.snapshot_id, req.mode, req.files, req.pattern
         )
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    return {"restored": restored, "errors": errors}
+
+
+def _undo_dir(folder: str) -> Path:
+    base = Path(normalize_fs_path(folder))
+    if not base.is_dir():
+        raise HTTPException(status_code=404, detail=f"Folder not found: {folder}")
+    return base / UNDO_DIR
+
+
+@app.post("/dataset/captions/snapshot/list", response_model=SnapshotListResponse)
+def dataset_list_snapshots(req: SnapshotListRequest):
+    """Snapshots of the dataset, newest first, from the cached catalog (snapshot_store.py)."""
+    undo_dir = _undo_dir(req.folder)
+    infos = load_catalog(undo_dir)
+    rows = [
+        SnapshotRow(
+            snapshot_id=info.snapshot_id,
+            created_at=info.created_at,
+            version=info.version,
+            files=info.files,
+            bytes=info.bytes + info.pack_bytes,
+            raw_bytes=info.raw_bytes,
+        )
+        for info in reversed(infos)
+    ]
+    total = sum(info.bytes for info in infos) + sum(pack_sizes(undo_dir).values())
+    return SnapshotListResponse(
+        snapshots=rows, total_bytes=total, retention=SnapshotRetention(**load_retention(undo_dir).to_json())
+    )
+
+
+@app.post("/dataset/captions/snapshot/retention", response_model=SnapshotPruneResponse)
+def dataset_snapshot_retention(req: SnapshotRetentionRequest):
+    """Save the dataset's retention policy and, unless `prune` is off, apply it now."""
+    undo_dir = _undo_dir(req.folder)
+    policy = RetentionPolicy(keep_last=req.keep_last, max_bytes=req.max_bytes, max_age_days=req.max_age_days)
+    save_retention(undo_dir, policy)
+    result = PruneResult(removed=[], removed_packs=[], freed_bytes=0)
+    if req.prune:
+        result = prune_snapshots(undo_dir, policy)
+    return SnapshotPruneResponse(**asdict(result), retention=SnapshotRetention(**policy.to_json()))
 
 
 @app.post("/dataset/captions/copy", response_model=CopyCaptionsResponse)
 def dataset_copy_captions(req: CopyCaptionsRequest):
+    """
+    Copy captions from `src` next to the matching images in `dest`. A dry
+    run stores its plan and returns a plan_id; the real run given that id
+    copies exactly that plan (409 once either tree has changed).
+    """
+    src = normalize_fs_path(req.src)
+    dest = normalize_fs_path(req.dest)
     try:
-        result = copy_captions(
-            normalize_fs_path(req.src),
-            normalize_fs_path(req.dest),
-            req.allow_overwrite,
-            req.dry_run,
-        )
+        if req.plan_id:
+            plan = _load_copy_plan(req.plan_id, src, dest, req.allow_overwrite)
+        else:
+            plan = plan_caption_copy(src, dest, req.allow_overwrite)
+        result = copy_captions(src, dest, req.allow_overwrite, req.dry_run, req.compress_report, plan=plan)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    return CopyCaptionsResponse(summary=result["summary"], log=result["log"], csv_path=result["csv_path"])
+    plan_id = None
+    if req.dry_run:
+        stored = StoredCopyPlan(plan_id=req.plan_id or uuid.uuid4().hex, plan=plan)
+        copy_plan_store.put(stored)
+        plan_id = stored.plan_id
+    elif req.plan_id:
+        copy_plan_store.discard(req.plan_id)
+    return CopyCaptionsResponse(
+        summary=result["summary"],
+        log=result["log"],
+        csv_path=result["csv_path"],
+        report_id=result["report_id"],
+        plan_id=plan_id,
+    )
+
+
+def _load_copy_plan(plan_id: str, src: str, dest: str, allow_overwrite: bool) -> CaptionCopyPlan:
+    stored = copy_plan_store.get(plan_id)
+    if not isinstance(stored, StoredCopyPlan):
+        raise HTTPException(status_code=404, detail=f"Plan not found or expired: {plan_id}")
+    plan = stored.plan
+    if (str(plan.src), str(plan.dest), plan.allow_overwrite) != (src, dest, allow_overwrite):
+        raise HTTPException(status_code=409, detail="Plan was made for different folders or options")
+    if not plan.is_current():
+        copy_plan_store.discard(plan_id)
+        raise HTTPException(status_code=409, detail="Folders changed since the dry run; run it again")
+    return plan
 
 
 @app.post("/dataset/captions/make_blank", response_model=MakeBlankResponse)
@@ -493,10 +1353,27 @@ def dataset_make_blank(req: MakeBlankRequest):
             req.recursive,
             req.dry_run,
             req.extensions,
+            req.compress_report,
         )
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    return MakeBlankResponse(summary=result["summary"], log=result["log"], csv_path=result["csv_path"])
+    return MakeBlankResponse(
+        summary=result["summary"], log=result["log"], csv_path=result["csv_path"], report_id=result["report_id"]
+    )
+
+
+@app.get("/dataset/reports/{report_id}")
+def dataset_download_report(report_id: str, folder: str):
+    """
+    A dataset action's CSV report from <folder>/__reports, as written (the
+    one copy on disk; .csv.gz reports are sent compressed).
+    """
+    try:
+        path = resolve_report(Path(normalize_fs_path(folder)), report_id)
+    except (FileNotFoundError, ValueError) as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    media_type = "application/gzip" if report_id.endswith(GZIP_SUFFIX) else "text/csv"
+    return FileResponse(path, media_type=media_type, filename=report_id)
 
 # ---------- Face Similarity & Crop Dashboard ----------
 
@@ -532,3 +1409,54 @@ def faces_crop_run(req: FaceCropRequest):
 @app.get("/faces/jobs/{job_id}", response_model=FaceJobStatusResponse)
 def faces_job_status(job_id: str):
     return _job_status_response(job_id)
+
+
+# ---------- Background Jobs ----------
+
+@app.post("/run/jobs", response_model=FaceJobResponse)
+def run_job(req: RunRequest):
+    """
+    Start /run in the background; poll /jobs/{job_id} for processed/total
+    renames and, once finished, the RunResponse in `result`.
+    """
+    folder = normalize_fs_path(req.folder)
+    if not os.path.isdir(folder):
+        raise HTTPException(status_code=404, detail=f"Folder not found: {folder}")
+
+    def target(status: JobStatus) -> dict:
+        def report(done: int, total: int) -> None:
+            status.processed = done
+            status.total = total
+            status.message = f"Renamed {done}/{total} files"
+
+        status.message = "Scanning folders"
+        outcome = execute_run(req, progress=report, should_stop=status.cancel_event.is_set)
+        failed = [e for e in outcome.errors if e.error != CANCELLED]
+        skipped = len(outcome.errors) - len(failed)
+        status.logs.append(
+            f"Done | renamed: {outcome.summary.renamed}, unchanged: {outcome.summary.unchanged}, "
+            f"collisions: {outcome.summary.collisions}, errors: {len(failed)}"
+        )
+        if skipped:
+            status.logs.append(f"Cancelled | {skipped} renames not started")
+        status.logs.extend(f"[ERROR] {e.original} -> {e.new}: {e.error}" for e in failed)
+        return outcome.result(req.format)
+
+    job = job_manager.submit("rename_run", f"Rename run: {folder}", target)
+    return FaceJobResponse(job_id=job.job_id)
+
+
+@app.get("/jobs/{job_id}", response_model=FaceJobStatusResponse)
+def job_status(job_id: str):
+    return _job_status_response(job_id)
+
+
+@app.post("/jobs/{job_id}/cancel", response_model=FaceJobStatusResponse)
+def cancel_job(job_id: str):
+    """
+    Ask a job to stop. A queued job never starts; a rename run finishes the
+    renames already in flight and reports the rest as cancelled.
+    """
+    if job_manager.cancel(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_status_response(job_id)
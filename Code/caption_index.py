@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dataset_dirs import BOOKKEEPING_DIRS, CAPTION_INDEX_DIR, ensure_folder
+from folder_index import RACY_WINDOW_NS
+from fs_paths import io_strategy
+
+CAPTION_INDEX_FILE = "captions.sqlite3"
+SCHEMA_VERSION = 2
+# Stored instead of the mtime of a file modified within the racy window, so
+# the next refresh re-reads it even if a later write keeps size and mtime.
+RACY_MTIME = -1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS captions (
+    id TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    -- file name and caption length, for sorting pages
+    name TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS captions_by_name ON captions (name, id);
+CREATE INDEX IF NOT EXISTS captions_by_length ON captions (length, id);
+"""
+# External-content FTS table kept in sync by refresh() itself: per-row
+# triggers cost ~10x a bulk insert followed by one 'rebuild'.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS captions_fts USING fts5(text, content='captions', content_rowid='rowid');
+"""
+# Change sets larger than this fraction of the index rebuild the FTS table.
+FTS_REBUILD_FRACTION = 0.2
+
+# Rows per query when streaming the whole index; each batch opens its own
+# connection, since a streaming response resumes on any worker thread.
+ROWS_BATCH = 2048
+
+# Page sort orders -> indexed column; ties are broken by id.
+SORT_COLUMNS = {"path": "id", "filename": "name", "length": "length"}
+_BLANK = "' ' || char(9) || char(10) || char(13)"
+
+_refresh_locks: Dict[str, threading.Lock] = {}
+_refresh_locks_guard = threading.Lock()
+
+
+@dataclass
+class IndexStats:
+    count: int
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+    full_text: bool
+
+
+def scan_caption_stats(base: str, recursive: bool) -> Dict[str, Tuple[int, int]]:
+    """
+    Relative id -> (size, mtime_ns) of every caption file, skipping the
+    bookkeeping folders. One scandir per directory plus one stat per file;
+    no file is opened.
+    """
+    found: Dict[str, Tuple[int, int]] = {}
+    stack = [("", base)]
+    while stack:
+        rel, path = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and entry.name not in BOOKKEEPING_DIRS:
+                                stack.append((rel + entry.name + "/", entry.path))
+                        elif entry.name.endswith(".txt") and entry.is_file():
+                            st = entry.stat()
+                            found[rel + entry.name] = (st.st_size, st.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            if not rel:
+                raise
+    return found
+
+
+def _read_caption(path: str) -> str:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return fh.read()
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def _read_batch(base: str, ids: List[str]) -> List[str]:
+    return [_read_caption(os.path.join(base, cid)) for cid in ids]
+
+
+def read_captions(base: str, ids: List[str], workers: int, batch_size: int) -> List[str]:
+    """Text of each caption id, read in batches of `batch_size` on `workers` threads; unreadable files read as ""."""
+    batches = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+    if workers <= 1 or len(batches) <= 1:
+        return [text for batch in batches for text in _read_batch(base, batch)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="caption-index") as pool:
+        return [text for texts in pool.map(lambda batch: _read_batch(base, batch), batches) for text in texts]
+
+
+def _fts_query(query: str) -> str:
+    # every term is a quoted prefix phrase, so user input never hits FTS5 syntax
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in query.split())
+
+
+def encode_cursor(sort: str, descending: bool, key: Any, cid: str) -> str:
+    raw = json.dumps([sort, descending, key, cid], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple[Any, str]:
+    """(sort key, id) of the last row of the previous page; ValueError if the cursor is foreign."""
+    try:
+        c_sort, c_desc, key, cid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError) as exc:
+        raise ValueError(f"invalid cursor: {exc}") from None
+    if c_sort != sort or c_desc != descending or not isinstance(cid, str):
+        raise ValueError("cursor does not match the requested sort")
+    return key, cid
+
+
+def _like_pattern(term: str) -> str:
+    return "%" + re.sub(r"([\\%_])", r"\\\1", term) + "%"
+
+
+class CaptionIndex:
+    """
+    SQLite index of a dataset's captions (id = path relative to the
+    dataset, size, mtime, text), with an FTS5 table over the text when the
+    sqlite3 build supports it and LIKE matching otherwise.
+    """
+
+    def __init__(self, folder: str):
+        self.base = ensure_folder(folder)
+        self._base_str = str(self.base)
+        self.path = self.base / CAPTION_INDEX_DIR / CAPTION_INDEX_FILE
+        self.full_text = False
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            conn.executescript(
+                "DROP TABLE IF EXISTS captions_fts; DROP TABLE IF EXISTS captions;" + _SCHEMA
+            )
+            try:
+                conn.executescript(_FTS_SCHEMA)
+            except sqlite3.OperationalError:
+                pass  # sqlite3 built without FTS5: search falls back to LIKE
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self.full_text = (
+            conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'captions_fts'").fetchone() is not None
+        )
+        return conn
+
+    def refresh(self, recursive: bool = True, workers: Optional[int] = None) -> IndexStats:
+        """
+        Bring the index in line with the files on disk: re-read only the
+        captions whose size or mtime changed, drop the ones that are gone.
+        With recursive=False only the top-level captions are considered.
+        """
+        key = str(self.path)
+        with _refresh_locks_guard:
+            lock = _refresh_locks.setdefault(key, threading.Lock())
+        with lock:
+            found = scan_caption_stats(str(self.base), recursive)
+            conn = self._connect()
+            try:
+                stored = {
+                    row[0]: (row[1], row[2])
+                    for row in conn.execute("SELECT id, size, mtime_ns FROM captions")
+                }
+                removed = [cid for cid in stored if cid not in found and (recursive or "/" not in cid)]
+                changed = sorted(cid for cid, sig in found.items() if stored.get(cid) != sig)
+                strategy = io_strategy(str(self.base))
+                if workers is None:
+                    workers = strategy.io_workers
+                now = time.time_ns()
+                upserts = []
+                texts = read_captions(str(self.base), changed, workers, strategy.batch_size)
+                for cid, text in zip(changed, texts):
+                    size, mtime_ns = found[cid]
+                    if now - mtime_ns < RACY_WINDOW_NS:
+                        mtime_ns = RACY_MTIME
+                    upserts.append((cid, size, mtime_ns, text, cid.rsplit("/", 1)[-1], len(text)))
+                stale = [(cid,) for cid in removed] + [(cid,) for cid in changed if cid in stored]
+                rebuild = self.full_text and len(stale) + len(upserts) > FTS_REBUILD_FRACTION * max(len(stored), 1)
+                with conn:
+                    if self.full_text and not rebuild:
+                        conn.executemany(
+                            "INSERT INTO captions_fts (captions_fts, rowid, text) "
+                            "SELECT 'delete', rowid, text FROM captions WHERE id = ?",
+                            stale,
+                        )
+                    conn.executemany("DELETE FROM captions WHERE id = ?", [(cid,) for cid in removed])
+                    conn.executemany(
+                        "INSERT INTO captions (id, size, mtime_ns, text, name, length) VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET size = excluded.size, "
+                        "mtime_ns = excluded.mtime_ns, text = excluded.text, length = excluded.length",
+                        upserts,
+                    )
+                    if rebuild:
+                        conn.execute("INSERT INTO captions_fts (captions_fts) VALUES ('rebuild')")
+                    elif self.full_text:
+                        conn.executemany(
+                            "INSERT INTO captions_fts (rowid, text) SELECT rowid, text FROM captions WHERE id = ?",
+                            [(cid,) for cid in changed],
+                        )
+            finally:
+                conn.close()
+        added = sum(1 for cid in changed if cid not in stored)
+        return IndexStats(
+            count=len(found),
+            added=added,
+            updated=len(changed) - added,
+            removed=len(removed),
+            unchanged=len(found) - len(changed),
+            full_text=self.full_text,
+        )
+
+    def _row(self, cid: str, text: str) -> Dict[str, str]:
+        return {
+            "id": cid,
+            "path": os.path.join(self._base_str, cid),
+            "filename": cid.rsplit("/", 1)[-1],
+            "caption": text,
+        }
+
+    def count(self, recursive: bool = True) -> int:
+        conn = self._connect()
+        try:
+            where = "" if recursive else " WHERE instr(id, '/') = 0"
+            return conn.execute("SELECT count(*) FROM captions" + where).fetchone()[0]
+        finally:
+            conn.close()
+
+    def rows(self, recursive: bool = True) -> Iterator[Dict[str, str]]:
+        """
+        Indexed captions as load rows, ordered by id, read in keyset batches
+        of ROWS_BATCH so no connection or cursor stays open across a yield.
+        """
+        after = ""
+        while True:
+            batch = self._rows_after(after, recursive)
+            for cid, text in batch:
+                yield self._row(cid, text)
+            if len(batch) < ROWS_BATCH:
+                return
+            after = batch[-1][0]
+
+    def _rows_after(self, after: str, recursive: bool) -> List[Tuple[str, str]]:
+        conn = self._connect()
+        try:
+            where = "" if recursive else " AND instr(id, '/') = 0"
+            return conn.execute(
+                "SELECT id, text FROM captions WHERE id > ?" + where + " ORDER BY id LIMIT ?",
+                (after, ROWS_BATCH),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def search(self, query: str, limit: int = 100, recursive: bool = True) -> Tuple[int, List[Dict[str, str]]]:
+        """
+        (total matches, best `limit` rows) for captions containing every
+        term of `query` (as a word prefix with FTS5, as a substring with the
+        LIKE fallback). FTS5 results are ranked by bm25, then by id.
+        """
+        terms = query.split()
+        if not terms:
+            raise ValueError("query must contain at least one term")
+        conn = self._connect()
+        try:
+            scope = "" if recursive else " AND instr(c.id, '/') = 0"
+            if self.full_text:
+                source = "captions_fts JOIN captions c ON c.rowid = captions_fts.rowid"
+                where = "captions_fts MATCH ?" + scope
+                params: List = [_fts_query(query)]
+                order = "captions_fts.rank, c.id"
+            else:
+                source = "captions c"
+                where = " AND ".join("c.text LIKE ? ESCAPE '\\'" for _ in terms) + scope
+                params = [_like_pattern(term) for term in terms]
+                order = "c.id"
+            total = conn.execute(f"SELECT count(*) FROM {source} WHERE {where}", params).fetchone()[0]
+            rows = [
+                self._row(cid, text)
+                for cid, text in conn.execute(
+                    f"SELECT c.id, c.text FROM {source} WHERE {where} ORDER BY {order} LIMIT ?",
+                    params + [limit],
+                )
+            ]
+            return total, rows
+        finally:
+            conn.close()
+
+    def page(
+        self,
+        limit: int = 200,
+        cursor: Optional[str] = None,
+        sort: str = "path",
+        descending: bool = False,
+        recursive: bool = True,
+        empty: Optional[bool] = None,
+        contains: Optional[str] = None,
+        subfolder: Optional[str] = None,
+    ) -> Tuple[int, List[Dict[str, str]], Optional[str]]:
+        """
+        One page of indexed captions: (rows matching the filters, up to
+        `limit` rows, cursor for the next page or None on the last).
+        Pages are keyset-paginated on (sort column, id), so deep pages cost
+        the same as the first and rows added meanwhile do not shift them.
+
+        empty: True for blank captions only, False to hide them.
+        contains: case-insensitive (ASCII) substring of the caption.
+        subfolder: only captions below this relative folder.
+        """
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"unknown sort: {sort}")
+        clauses: List[str] = []
+        params: List[Any] = []
+        if not recursive:
+            clauses.append("instr(id, '/') = 0")
+        if empty is not None:
+            clauses.append(f"trim(text, {_BLANK}) {'=' if empty else '<>'} ''")
+        if contains:
+            clauses.append("text LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(contains))
+        if subfolder and subfolder.strip("/"):
+            clauses.append("id LIKE ? ESCAPE '\\'")
+            params.append(_like_pattern(subfolder.strip("/") + "/")[1:])
+        conn = self._connect()
+        try:
+            where = " AND ".join(clauses) or "1"
+            total = conn.execute(f"SELECT count(*) FROM captions WHERE {where}", params).fetchone()[0]
+            page_clauses = list(clauses)
+            page_params = list(params)
+            if cursor:
+                key, cid = decode_cursor(cursor, sort, descending)
+                page_clauses.append(f"({column}, id) {'<' if descending else '>'} (?, ?)")
+                page_params += [key, cid]
+            direction = "DESC" if descending else "ASC"
+            fetched = conn.execute(
+                f"SELECT id, text, {column} FROM captions WHERE {' AND '.join(page_clauses) or '1'} "
+                f"ORDER BY {column} {direction}, id {direction} LIMIT ?",
+                page_params + [limit + 1],
+            ).fetchall()
+        finally:
+            conn.close()
+        rows = [self._row(cid, text) for cid, text, _ in fetched[:limit]]
+        next_cursor = None
+        if len(fetched) > limit:
+            last_id, _, last_key = fetched[limit - 1]
+            next_cursor = encode_cursor(sort, descending, last_key, last_id)
+        return total, rows, next_cursor
@@ -1,26 +1,23 @@
 from __future__ import annotations
 
-import csv
-import json
-import shutil
-import tempfile
-import time
+import fnmatch
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import AbstractSet, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from dataset_dirs import BOOKKEEPING_DIRS, CAPTION_BACKUP_DIR, REPORTS_DIR, UNDO_DIR, ensure_folder
+from folder_index import Fingerprint, folder_fingerprint, folder_index
+from fs_paths import io_strategy
+from report_writer import ReportWriter
+from snapshot_store import load_manifest, read_blobs, read_manifest_json, text_hash, write_snapshot
 
 IMG_EXTS_ALL = [".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"]
 CAPTION_DELIMS = ["_", "-", ".", ","]
 
 
-def _ensure_folder(folder: str) -> Path:
-    base = Path(folder)
-    if not base.exists() or not base.is_dir():
-        raise FileNotFoundError(f"Folder not found: {folder}")
-    return base
-
-
 def _list_caption_files(base: Path, recursive: bool) -> List[Path]:
     if recursive:
         return sorted([p for p in base.rglob("*.txt") if p.is_file()])
@@ -43,29 +40,6 @@ def _log(lines: List[str], msg: str) -> None:
     lines.append(msg)
 
 
-def _write_summary_csv(
-    base_dir: Path,
-    name_prefix: str,
-    headers: List[str],
-    rows: List[List[str]],
-) -> str:
-    reports = base_dir / "__reports"
-    reports.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    persistent = reports / f"{name_prefix}_{ts}.csv"
-
-    with persistent.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        writer.writerows(rows)
-
-    temp_dir = Path(tempfile.gettempdir()) / "Datasetactions_reports"
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    temp_copy = temp_dir / persistent.name
-    shutil.copy2(persistent, temp_copy)
-    return str(temp_copy)
-
-
 @dataclass
 class Snapshot:
     dir: Path
@@ -78,84 +52,183 @@ def _make_snapshot(
     before_texts: Dict[Path, str],
     after_texts: Dict[Path, str],
 ) -> Snapshot:
-    ts = time.strftime("%Y%m%d_%H%M%S")
-    snap_dir = base / "__undo" / ts
-    before_dir = snap_dir / "before"
-    after_dir = snap_dir / "after"
-    before_dir.mkdir(parents=True, exist_ok=True)
-    after_dir.mkdir(parents=True, exist_ok=True)
-
-    rels: List[str] = []
-    for path in affected:
-        rel = str(path.relative_to(base)).replace("\\", "/")
-        rels.append(rel)
-        dst_before = before_dir / rel
-        dst_before.parent.mkdir(parents=True, exist_ok=True)
-        _write_text_safe(dst_before, before_texts[path])
-        dst_after = after_dir / rel
-        dst_after.parent.mkdir(parents=True, exist_ok=True)
-        _write_text_safe(dst_after, after_texts[path])
-
-    manifest = {
-        "base": str(base),
-        "files": rels,
-        "created_at": ts,
-        "version": 2,
-    }
-    _write_text_safe(snap_dir / "manifest.json", json.dumps(manifest, indent=2))
-    return Snapshot(dir=snap_dir, files=rels)
+    rels = [str(path.relative_to(base)).replace("\\", "/") for path in affected]
+    undo_dir = base / UNDO_DIR
+    manifest = write_snapshot(
+        undo_dir,
+        base,
+        rels,
+        [before_texts[path] for path in affected],
+        [after_texts[path] for path in affected],
+    )
+    return Snapshot(dir=undo_dir / manifest.snapshot_id, files=rels)
 
 
-def _restore_set(base: Path, snap_dir: Path, which: str) -> Tuple[int, List[str]]:
-    restored = 0
+def _restore_set(
+    base: Path,
+    snap_dir: Path,
+    which: str,
+    selected: Callable[[str], bool],
+    workers: int,
+    batch_size: int,
+) -> Tuple[int, int, List[str]]:
+    """
+    (restored, skipped, errors) for the selected files of one side of a
+    snapshot. Current files are read first and those already holding the
+    target text are skipped; only the blobs of the rest are read from the
+    pack, and they are written on `workers` threads.
+    """
     errors: List[str] = []
     try:
-        manifest = json.loads((snap_dir / "manifest.json").read_text(encoding="utf-8"))
-        rels: List[str] = manifest.get("files", [])
+        manifest = load_manifest(snap_dir)
+        rels: List[str] = manifest.files if manifest is not None else read_manifest_json(snap_dir).get("files", [])
     except Exception as exc:
-        return 0, [f"manifest.json read error: {exc}"]
+        return 0, 0, [f"manifest.json read error: {exc}"]
+
+    picked = [i for i, rel in enumerate(rels) if selected(rel)]
+    current = _read_captions_once([base / rels[i] for i in picked], workers, batch_size)
+    stale: List[int] = []
+    targets: List[Optional[str]] = []
+    read_errors: Dict[int, str] = {}
+    if manifest is not None:
+        hashes = manifest.before if which == "before" else manifest.after
+        stale = [i for i, text in zip(picked, current) if text is None or text_hash(text) != hashes[i]]
+        blobs = read_blobs(snap_dir.parent, manifest, {hashes[i] for i in stale})
+        targets = [blobs.get(hashes[i]) for i in stale]
+    else:
+        # version 2: full copies under before/ and after/, compared as text
+        saved = _read_captions_once(
+            [snap_dir / which / rels[i] for i in picked], workers, batch_size, _read_saved_caption
+        )
+        for i, text, (target, error) in zip(picked, current, saved):
+            if target is None or text != target:
+                stale.append(i)
+                targets.append(target)
+            if error is not None:
+                read_errors[i] = error
+
+    writes: Dict[int, _CaptionWrite] = {}
+    for i, target in zip(stale, targets):
+        if target is not None:
+            writes[i] = _CaptionWrite(base / rels[i], target, "", None)
+    _write_captions(list(writes.values()), workers)
 
-    for rel in rels:
-        try:
-            src = snap_dir / which / rel
-            if not src.exists():
-                errors.append(f"missing snapshot entry: {which}/{rel}")
-                continue
-            dst = base / rel
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            _write_text_safe(dst, src.read_text(encoding="utf-8"))
+    restored = 0
+    for i in stale:
+        task = writes.get(i)
+        if i in read_errors:
+            errors.append(f"{rels[i]}: {read_errors[i]}")
+        elif task is None:
+            errors.append(f"missing snapshot entry: {which}/{rels[i]}")
+        elif task.error is not None:
+            errors.append(f"{rels[i]}: {task.error}")
+        else:
             restored += 1
-        except Exception as exc:
-            errors.append(f"{rel}: {exc}")
-    return restored, errors
+    return restored, len(picked) - len(stale), errors
 
 
-def restore_snapshot(folder: str, snapshot_id: str, mode: str) -> Tuple[int, List[str]]:
-    base = _ensure_folder(folder)
-    snap_dir = (base / "__undo" / snapshot_id).resolve()
+def restore_snapshot_files(
+    folder: str,
+    snapshot_id: str,
+    mode: str,
+    files: Optional[List[str]] = None,
+    pattern: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Roll the snapshot's files back ("before") or forward ("after"). With
+    `files` (relative ids) and/or `pattern` (fnmatch, `*` also crosses
+    folders, e.g. "shots/a/*") only the matching files are touched.
+    Returns restored/skipped counts (skipped: already identical) and errors.
+    """
+    base = ensure_folder(folder)
+    snap_dir = (base / UNDO_DIR / snapshot_id).resolve()
     if not snap_dir.exists():
         raise FileNotFoundError(f"Snapshot not found: {snapshot_id}")
-    if mode == "before":
-        return _restore_set(base, snap_dir, "before")
-    if mode == "after":
-        return _restore_set(base, snap_dir, "after")
-    raise ValueError("mode must be 'before' or 'after'")
+    if mode not in ("before", "after"):
+        raise ValueError("mode must be 'before' or 'after'")
+    wanted = set(files) if files is not None else None
 
+    def selected(rel: str) -> bool:
+        if wanted is None and pattern is None:
+            return True
+        return (wanted is not None and rel in wanted) or (pattern is not None and fnmatch.fnmatchcase(rel, pattern))
 
-def load_caption_rows(folder: str, recursive: bool) -> Dict[str, Any]:
-    base = _ensure_folder(folder)
+    strategy = io_strategy(str(base))
+    if workers is None:
+        workers = strategy.io_workers
+    restored, skipped, errors = _restore_set(base, snap_dir, mode, selected, workers, strategy.batch_size)
+    return {"restored": restored, "skipped": skipped, "errors": errors}
+
+
+def restore_snapshot(folder: str, snapshot_id: str, mode: str) -> Tuple[int, List[str]]:
+    result = restore_snapshot_files(folder, snapshot_id, mode)
+    return result["restored"], result["errors"]
+
+
+def _caption_rows(base: Path, paths: List[Path]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": str(p.relative_to(base)).replace("\\", "/"),
+            "path": str(p),
+            "filename": p.name,
+            "caption": _read_text_safe(p),
+        }
+        for p in paths
+    ]
+
+
+def _iter_caption_rows(
+    base: Path, txts: List[Path], workers: int, batch_size: int, read_ahead: int
+) -> Iterator[Dict[str, Any]]:
+    """Rows for `txts` in order, `batch_size` files per read task, at most `read_ahead` tasks per worker queued."""
+    batches = [txts[i : i + batch_size] for i in range(0, len(txts), batch_size)]
+    if workers <= 1 or len(batches) <= 1:
+        for batch in batches:
+            yield from _caption_rows(base, batch)
+        return
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="caption-read")
+    try:
+        pending: deque = deque()
+        queued = iter(batches)
+        for batch in queued:
+            pending.append(pool.submit(_caption_rows, base, batch))
+            if len(pending) >= workers * read_ahead:
+                break
+        while pending:
+            rows = pending.popleft().result()
+            batch = next(queued, None)
+            if batch is not None:
+                pending.append(pool.submit(_caption_rows, base, batch))
+            yield from rows
+    finally:
+        # a client that stops reading the stream must not leave reads queued
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_caption_rows(
+    folder: str,
+    recursive: bool,
+    workers: Optional[int] = None,
+) -> Tuple[int, Iterator[Dict[str, Any]]]:
+    """
+    List a dataset's caption files now (FileNotFoundError surfaces here)
+    and return their count with an iterator of rows read lazily on a
+    bounded thread pool. Rows come out in listing order, sorted by path,
+    whatever order the reads finish in. Batching and read-ahead follow the
+    I/O strategy of the folder's mount, as does `workers` by default.
+    """
+    base = ensure_folder(folder)
     txts = _list_caption_files(base, recursive)
-    rows = []
-    for p in txts:
-        rows.append(
-            {
-                "id": str(p.relative_to(base)).replace("\\", "/"),
-                "path": str(p),
-                "filename": p.name,
-                "caption": _read_text_safe(p),
-            }
-        )
-    return {"rows": rows, "count": len(rows)}
+    strategy = io_strategy(str(base))
+    if workers is None:
+        workers = strategy.io_workers
+    return len(txts), _iter_caption_rows(base, txts, workers, strategy.batch_size, strategy.read_ahead)
+
+
+def load_caption_rows(folder: str, recursive: bool, workers: Optional[int] = None) -> Dict[str, Any]:
+    count, rows = stream_caption_rows(folder, recursive, workers)
+    return {"rows": list(rows), "count": count}
 
 
 def _apply_caption_add_prefix(base: str, prefix: str) -> str:
@@ -263,6 +336,76 @@ def preview_caption_rows(
     return out
 
 
+def _read_caption_once(p: Path) -> Optional[str]:
+    """File text, "" when unreadable (like _read_text_safe), None when the file is gone."""
+    try:
+        return p.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+    except Exception:
+        return ""
+
+
+def _read_saved_caption(p: Path) -> Tuple[Optional[str], Optional[str]]:
+    """(text, None) of a version 2 snapshot copy, (None, error) when unreadable, (None, None) when missing."""
+    try:
+        return p.read_text(encoding="utf-8"), None
+    except FileNotFoundError:
+        return None, None
+    except Exception as exc:
+        return None, str(exc)
+
+
+def _read_batch_once(paths: List[Path], read: Callable[[Path], Any]) -> List[Any]:
+    return [read(p) for p in paths]
+
+
+def _read_captions_once(
+    paths: List[Path], workers: int, batch_size: int, read: Optional[Callable[[Path], Any]] = None
+) -> List[Any]:
+    """`read` (default _read_caption_once) of every path, in order, batched on `workers` threads."""
+    if read is None:
+        read = _read_caption_once
+    batches = [paths[i : i + batch_size] for i in range(0, len(paths), batch_size)]
+    if workers <= 1 or len(batches) <= 1:
+        return [text for batch in batches for text in _read_batch_once(batch, read)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="caption-read") as pool:
+        return [text for texts in pool.map(lambda batch: _read_batch_once(batch, read), batches) for text in texts]
+
+
+@dataclass
+class _CaptionWrite:
+    path: Path
+    text: str
+    original: str
+    # backup file to write first, or None (no backups, or a later file of
+    # the same name overwrites it anyway)
+    backup: Optional[Path]
+    backup_error: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _write_caption(task: _CaptionWrite) -> None:
+    if task.backup is not None:
+        try:
+            _write_text_safe(task.backup, task.original)
+        except Exception as exc:
+            task.backup_error = str(exc)
+    try:
+        _write_text_safe(task.path, task.text)
+    except Exception as exc:
+        task.error = str(exc)
+
+
+def _write_captions(tasks: List[_CaptionWrite], workers: int) -> None:
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            _write_caption(task)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="caption-write") as pool:
+            list(pool.map(_write_caption, tasks, chunksize=1))
+
+
 def run_caption_prefix_suffix(
     folder: str,
     entries: List[Dict[str, Any]],
@@ -272,8 +415,17 @@ def run_caption_prefix_suffix(
     dry_run: bool,
     make_backup: bool,
     operations: Optional[List[Dict[str, Any]]] = None,
+    workers: Optional[int] = None,
+    compress_report: bool = False,
 ) -> Dict[str, Any]:
-    base = _ensure_folder(folder)
+    """
+    Apply the caption operations to each selected file. Every file is read
+    exactly once (on a bounded pool); an entry's `caption`, when sent, is
+    what gets transformed, and the file text is what it is compared with
+    and backed up. Changed files are written on the same pool; logs and CSV
+    rows follow the file order regardless of which write finishes first.
+    """
+    base = ensure_folder(folder)
     logs: List[str] = []
     affected_paths: List[Path] = []
     before_texts: Dict[Path, str] = {}
@@ -282,12 +434,16 @@ def run_caption_prefix_suffix(
     changed = 0
     skipped = 0
     backed_up = 0
-    summary_rows: List[List[str]] = []
 
-    ops = _normalize_caption_operations(prefix, suffix, operations)
-    backup_dir = base / "__backup_prefix_suffix" if make_backup and not dry_run else None
+    pre = prefix or ""
+    suf = suffix or ""
+    ops = _normalize_caption_operations(pre, suf, operations)
+    backup_dir = base / CAPTION_BACKUP_DIR if make_backup and not dry_run else None
     if backup_dir:
         backup_dir.mkdir(parents=True, exist_ok=True)
+    strategy = io_strategy(str(base))
+    if workers is None:
+        workers = strategy.io_workers
 
     entry_map: Dict[Path, Dict[str, Any]] = {}
     for entry in entries:
@@ -304,63 +460,72 @@ def run_caption_prefix_suffix(
         entry_map[path] = entry
 
     txts = _list_caption_files(base, recursive) if not entries else list(entry_map.keys())
-    for txt_path in txts:
-        try:
-            if not txt_path.exists():
-                continue
-            rel = str(txt_path.relative_to(base)).replace("\\", "/")
-            entry = entry_map.get(str(txt_path), None)
-            caption = ""
-            if entry is not None:
-                caption = entry.get("caption", "")
-            else:
-                caption = _read_text_safe(txt_path)
-
-            original = _read_text_safe(txt_path)
-            final_text = _apply_caption_operations(caption, ops) if ops else f"{pre}{caption}{suf}"
+    originals = _read_captions_once(txts, workers, strategy.batch_size)
+
+    # (rel, original, final) per file in order; None for files that are gone
+    planned: List[Optional[Tuple[str, str, str]]] = []
+    writes: Dict[int, _CaptionWrite] = {}
+    for i, (txt_path, original) in enumerate(zip(txts, originals)):
+        if original is None:
+            planned.append(None)
+            continue
+        rel = str(txt_path.relative_to(base)).replace("\\", "/")
+        entry = entry_map.get(txt_path)
+        caption = entry.get("caption", "") if entry is not None else original
+        final_text = _apply_caption_operations(caption, ops) if ops else f"{pre}{caption}{suf}"
+        planned.append((rel, original, final_text))
+        if final_text != original and not dry_run:
+            backup = backup_dir / (txt_path.name + ".bak") if backup_dir else None
+            writes[i] = _CaptionWrite(txt_path, final_text, original, backup)
 
+    if backup_dir:
+        # backups are keyed by file name only: of several files sharing a
+        # name, the last one's backup is the one left on disk
+        last_by_backup = {task.backup: i for i, task in writes.items()}
+        for i, task in writes.items():
+            if last_by_backup[task.backup] != i:
+                task.backup = None
+    _write_captions(list(writes.values()), workers)
+
+    headers = ["relative_path", "action", "old_head", "new_head"]
+    with ReportWriter(base, "prefix_suffix", headers, compress_report) as report:
+        for i, (txt_path, plan) in enumerate(zip(txts, planned)):
+            if plan is None:
+                continue
+            rel, original, final_text = plan
             if final_text == original:
                 skipped += 1
-                summary_rows.append([rel, "skipped", original[:80].replace("\n", " "), original[:80].replace("\n", " ")])
+                report.write([rel, "skipped", original[:80].replace("\n", " "), original[:80].replace("\n", " ")])
                 continue
-
+            task = writes.get(i)
+            if task is not None:
+                if backup_dir:
+                    if task.backup_error is not None:
+                        _log(logs, f"[WARN] Backup failed for {rel}: {task.backup_error}")
+                    else:
+                        backed_up += 1
+                if task.error is not None:
+                    _log(logs, f"[ERROR] {txt_path}: {task.error}")
+                    continue
             affected_paths.append(txt_path)
             before_texts[txt_path] = original
             after_texts[txt_path] = final_text
-
-            if backup_dir and not dry_run:
-                try:
-                    _write_text_safe(backup_dir / (txt_path.name + ".bak"), original)
-                    backed_up += 1
-                except Exception as exc:
-                    _log(logs, f"[WARN] Backup failed for {rel}: {exc}")
-
-            if not dry_run:
-                _write_text_safe(txt_path, final_text)
             changed += 1
             old_preview = original[:80].replace("\n", " ")
             new_preview = final_text[:80].replace("\n", " ")
-            summary_rows.append([rel, "changed", old_preview, new_preview])
-        except Exception as exc:
-            _log(logs, f"[ERROR] {txt_path}: {exc}")
+            report.write([rel, "changed", old_preview, new_preview])
 
     snapshot_id: Optional[str] = None
     if affected_paths and not dry_run:
         snap = _make_snapshot(base, affected_paths, before_texts, after_texts)
         snapshot_id = snap.dir.name
 
-    csv_path = _write_summary_csv(
-        base,
-        "prefix_suffix",
-        ["relative_path", "action", "old_head", "new_head"],
-        summary_rows,
-    )
-
     _log(logs, f"Done | changed: {changed}, skipped: {skipped}, backups: {backed_up}")
     return {
         "summary": {"changed": changed, "skipped": skipped, "backups": backed_up},
         "log": logs,
-        "csv_path": csv_path,
+        "csv_path": str(report.path),
+        "report_id": report.report_id,
         "snapshot_id": snapshot_id,
     }
 
@@ -380,54 +545,149 @@ def list_images(folder: Path, recursive: bool, exts: Iterable[str]) -> List[Path
     ]
 
 
+@dataclass
+class CaptionCopyPlan:
+    """
+    What copy_captions will do for src -> dest, built from one listing of
+    each tree. A dry run and the run after it can share one plan; it stays
+    valid while no directory fingerprint of either tree changes.
+    """
+
+    src: Path
+    dest: Path
+    allow_overwrite: bool
+    # (relative image path, "copy" | "skipped_exist" | "missing_in_src"), sorted
+    rows: List[Tuple[str, str]]
+    # relative .txt paths to copy, each once even when several images share it
+    copies: List[str]
+    # absolute directory -> listing fingerprint, for both trees
+    fingerprints: Dict[str, Fingerprint]
+
+    def is_current(self) -> bool:
+        for folder, expected in self.fingerprints.items():
+            try:
+                if folder_fingerprint(folder) != expected:
+                    return False
+            except OSError:
+                return False
+        return True
+
+
+def _index_tree(
+    root: Path, fingerprints: Dict[str, Fingerprint], image_exts: Optional[AbstractSet[str]] = None
+) -> Tuple[List[str], Set[str]]:
+    """(image paths, .txt paths) under `root`, relative with "/", from one scandir per directory."""
+    images: List[str] = []
+    txts: Set[str] = set()
+    for rel_dir, listing in folder_index.walk(str(root), skip_dirs=BOOKKEEPING_DIRS):
+        fingerprints[listing.folder] = listing.fingerprint
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for name in listing.files:
+            ext = os.path.splitext(name)[1].lower()
+            if ext == ".txt":
+                txts.add(prefix + name)
+            elif image_exts is not None and ext in image_exts:
+                images.append(prefix + name)
+    return images, txts
+
+
+def plan_caption_copy(src: str, dest: str, allow_overwrite: bool) -> CaptionCopyPlan:
+    """
+    Match every image under `dest` with the same-stem .txt under `src`:
+    both trees are indexed once, and the plan is set arithmetic on the
+    relative caption paths, with no per-image existence checks.
+    """
+    src_p = ensure_folder(src)
+    dest_p = ensure_folder(dest)
+    # the report lands here; create it first so writing it does not make
+    # the plan look stale to a later run
+    (dest_p / REPORTS_DIR).mkdir(exist_ok=True)
+    fingerprints: Dict[str, Fingerprint] = {}
+    images, dest_txts = _index_tree(dest_p, fingerprints, {e.lower() for e in IMG_EXTS_ALL})
+    _, src_txts = _index_tree(src_p, fingerprints)
+
+    wanted = {img: os.path.splitext(img)[0] + ".txt" for img in images}
+    needed = set(wanted.values())
+    missing = needed - src_txts
+    blocked = set() if allow_overwrite else (needed & dest_txts) - missing
+    to_copy = needed - missing - blocked
+
+    rows: List[Tuple[str, str]] = []
+    for img in sorted(images):
+        txt = wanted[img]
+        action = "missing_in_src" if txt in missing else "skipped_exist" if txt in blocked else "copy"
+        rows.append((img, action))
+    return CaptionCopyPlan(
+        src=src_p,
+        dest=dest_p,
+        allow_overwrite=allow_overwrite,
+        rows=rows,
+        copies=sorted(to_copy),
+        fingerprints=fingerprints,
+    )
+
+
+def _copy_caption(src: Path, dest: Path) -> Optional[str]:
+    try:
+        _write_text_safe(dest, _read_text_safe(src))
+        return None
+    except Exception as exc:
+        return str(exc)
+
+
 def copy_captions(
     src: str,
     dest: str,
     allow_overwrite: bool,
     dry_run: bool,
+    compress_report: bool = False,
+    plan: Optional[CaptionCopyPlan] = None,
+    workers: Optional[int] = None,
 ) -> Dict[str, Any]:
-    src_p = _ensure_folder(src)
-    dest_p = _ensure_folder(dest)
-    imgs = list_images(dest_p, True, IMG_EXTS_ALL)
+    """
+    Copy each image's caption from `src` into `dest` per `plan` (built
+    here when not given, e.g. by the dry run before). Copies run on the
+    destination mount's I/O pool; report rows follow the plan order.
+    """
+    if plan is None:
+        plan = plan_caption_copy(src, dest, allow_overwrite)
+    if workers is None:
+        workers = io_strategy(str(plan.dest)).io_workers
+
+    errors: Dict[str, str] = {}
+    if not dry_run and plan.copies:
+        pairs = [(plan.src / txt, plan.dest / txt) for txt in plan.copies]
+        if workers <= 1 or len(pairs) <= 1:
+            results = [_copy_caption(s, d) for s, d in pairs]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="caption-copy") as pool:
+                results = list(pool.map(lambda pair: _copy_caption(*pair), pairs))
+        errors = {txt: err for txt, err in zip(plan.copies, results) if err is not None}
 
     copied = 0
     missing = 0
     exist_skip = 0
-    summary_rows: List[List[str]] = []
     logs: List[str] = []
 
-    for img in imgs:
-        rel = img.relative_to(dest_p)
-        txt_in_src = src_p / rel.with_suffix(".txt")
-        txt_in_dest = img.with_suffix(".txt")
-
-        if not txt_in_src.exists():
-            missing += 1
-            action = "missing_in_src"
-        elif txt_in_dest.exists() and not allow_overwrite:
-            exist_skip += 1
-            action = "skipped_exist"
-        else:
-            if dry_run:
+    with ReportWriter(plan.dest, "copy_captions", ["relative_image_path", "action"], compress_report) as report:
+        for img, action in plan.rows:
+            if action == "missing_in_src":
+                missing += 1
+            elif action == "skipped_exist":
+                exist_skip += 1
+            elif dry_run:
                 copied += 1
                 action = "would_copy"
             else:
-                try:
-                    _write_text_safe(txt_in_dest, _read_text_safe(txt_in_src))
+                txt = os.path.splitext(img)[0] + ".txt"
+                if txt in errors:
+                    _log(logs, f"[ERROR] Copy failed for {plan.dest / txt}: {errors[txt]}")
+                    action = "error"
+                else:
                     copied += 1
                     action = "copied"
-                except Exception as exc:
-                    _log(logs, f"[ERROR] Copy failed for {txt_in_dest}: {exc}")
-                    action = "error"
-
-        summary_rows.append([str(rel).replace("\\", "/"), action])
+            report.write([img, action])
 
-    csv_path = _write_summary_csv(
-        dest_p,
-        "copy_captions",
-        ["relative_image_path", "action"],
-        summary_rows,
-    )
     _log(
         logs,
         f"Done | copied: {copied}, skipped_exist: {exist_skip}, missing_in_src: {missing}",
@@ -439,7 +699,8 @@ def copy_captions(
             "missing_in_src": missing,
         },
         "log": logs,
-        "csv_path": csv_path,
+        "csv_path": str(report.path),
+        "report_id": report.report_id,
     }
 
 
@@ -448,46 +709,42 @@ def make_blank_txts(
     recursive: bool,
     dry_run: bool,
     extensions: Optional[List[str]],
+    compress_report: bool = False,
 ) -> Dict[str, Any]:
-    base = _ensure_folder(folder)
+    base = ensure_folder(folder)
     exts = extensions or IMG_EXTS_ALL
     imgs = list_images(base, recursive, exts)
 
     created = 0
     exist = 0
-    summary_rows: List[List[str]] = []
     logs: List[str] = []
 
-    for img in imgs:
-        txt = img.with_suffix(".txt")
-        rel = str(img.relative_to(base)).replace("\\", "/")
-        if txt.exists():
-            exist += 1
-            action = "exists"
-        else:
-            if dry_run:
-                created += 1
-                action = "would_create"
+    with ReportWriter(base, "make_blank_txts", ["relative_image_path", "action"], compress_report) as report:
+        for img in imgs:
+            txt = img.with_suffix(".txt")
+            rel = str(img.relative_to(base)).replace("\\", "/")
+            if txt.exists():
+                exist += 1
+                action = "exists"
             else:
-                try:
-                    _write_text_safe(txt, "")
+                if dry_run:
                     created += 1
-                    action = "created"
-                except Exception as exc:
-                    _log(logs, f"[ERROR] Create failed for {txt}: {exc}")
-                    action = "error"
+                    action = "would_create"
+                else:
+                    try:
+                        _write_text_safe(txt, "")
+                        created += 1
+                        action = "created"
+                    except Exception as exc:
+                        _log(logs, f"[ERROR] Create failed for {txt}: {exc}")
+                        action = "error"
+
+            report.write([rel, action])
 
-        summary_rows.append([rel, action])
-
-    csv_path = _write_summary_csv(
-        base,
-        "make_blank_txts",
-        ["relative_image_path", "action"],
-        summary_rows,
-    )
     _log(logs, f"Done | created: {created}, already_exists: {exist}")
     return {
         "summary": {"created": created, "already_exists": exist},
         "log": logs,
-        "csv_path": csv_path,
+        "csv_path": str(report.path),
+        "report_id": report.report_id,
     }
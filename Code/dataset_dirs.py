@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+# Folders this tool keeps inside a dataset. Their files are bookkeeping
+# (snapshots, reports, the caption index, caption backups), never dataset
+# content: they are not indexed, searched for images, or renamed.
+UNDO_DIR = "__undo"
+REPORTS_DIR = "__reports"
+CAPTION_INDEX_DIR = "__index"
+CAPTION_BACKUP_DIR = "__backup_prefix_suffix"
+BOOKKEEPING_DIRS = frozenset({UNDO_DIR, REPORTS_DIR, CAPTION_INDEX_DIR, CAPTION_BACKUP_DIR})
+
+
+def ensure_folder(folder: str) -> Path:
+    """`folder` as a Path, or FileNotFoundError when it is not a directory."""
+    base = Path(folder)
+    if not base.exists() or not base.is_dir():
+        raise FileNotFoundError(f"Folder not found: {folder}")
+    return base
@@ -4,11 +4,18 @@ import os
 import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff"}
+# Submitted jobs running at once; later ones wait as "pending" so a burst of
+# large runs cannot starve the API of CPU and disk.
+MAX_CONCURRENT_JOBS = 2
+# Finished jobs remembered for status polling before the oldest are dropped.
+MAX_FINISHED_JOBS = 200
+FINISHED_STATES = {"completed", "failed", "cancelled"}
 
 
 @dataclass
@@ -23,6 +30,12 @@ class JobStatus:
     logs: List[str] = field(default_factory=list)
     started_at: float = field(default_factory=time.time)
     finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self.cancel_event.is_set()
 
     def to_dict(self) -> Dict:
         return {
@@ -36,13 +49,15 @@ class JobStatus:
             "logs": self.logs,
             "started_at": self.started_at,
             "finished_at": self.finished_at,
+            "result": self.result,
         }
 
 
 class JobManager:
-    def __init__(self):
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_JOBS):
         self._jobs: Dict[str, JobStatus] = {}
         self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="job")
 
     def start_job(self, job_type: str, total_steps: int, description: str) -> JobStatus:
         job_id = str(uuid.uuid4())
@@ -66,6 +81,77 @@ class JobManager:
         status.finished_at = time.time()
         status.logs.append("Job finished successfully")
 
+    def submit(
+        self,
+        job_type: str,
+        description: str,
+        target: Callable[[JobStatus], Optional[Dict[str, Any]]],
+    ) -> JobStatus:
+        """
+        Queue `target(status)` on the job pool. The target updates
+        processed/total/message itself, should stop early once
+        `status.cancel_requested` is set, and may return a dict stored as the
+        job result. An exception marks the job failed. A cancelled job that
+        still processed all of its total is reported completed.
+        """
+        job_id = str(uuid.uuid4())
+        status = JobStatus(job_id=job_id, job_type=job_type)
+        status.logs.append(f"Job created: {description}")
+        with self._lock:
+            self._jobs[job_id] = status
+            self._prune_finished()
+
+        self._executor.submit(self._run_target, status, target)
+        return status
+
+    def _run_target(
+        self,
+        status: JobStatus,
+        target: Callable[[JobStatus], Optional[Dict[str, Any]]],
+    ) -> None:
+        if status.cancel_requested:
+            self._finish_cancelled(status)
+            return
+        status.state = "running"
+        status.started_at = time.time()
+        try:
+            status.result = target(status)
+        except Exception as exc:
+            status.state = "failed"
+            status.error = str(exc)
+            status.message = "Job failed"
+            status.logs.append(f"Job failed: {exc}")
+        else:
+            # a cancel arriving after the last item leaves nothing undone
+            if status.cancel_requested and status.processed < status.total:
+                self._finish_cancelled(status)
+                return
+            status.state = "completed"
+            status.message = "Job completed"
+            status.logs.append("Job finished successfully")
+        finally:
+            status.finished_at = status.finished_at or time.time()
+
+    @staticmethod
+    def _finish_cancelled(status: JobStatus) -> None:
+        status.state = "cancelled"
+        status.message = "Job cancelled"
+        status.logs.append("Job cancelled")
+        status.finished_at = time.time()
+
+    def cancel(self, job_id: str) -> Optional[JobStatus]:
+        """Ask a pending or running job to stop; finished jobs are left as they are."""
+        status = self.get_job(job_id)
+        if status is not None and status.state not in FINISHED_STATES:
+            status.cancel_event.set()
+            status.message = "Cancelling"
+        return status
+
+    def _prune_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in FINISHED_STATES]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
     def get_job(self, job_id: str) -> Optional[JobStatus]:
         with self._lock:
             return self._jobs.get(job_id)
@@ -17,6 +17,8 @@ import pandas as pd
 import cv2
 from tqdm import tqdm
 
+from fs_paths import io_strategy
+
 # === InsightFace (GPU via ONNX Runtime) ===
 from insightface.app import FaceAnalysis
 from insightface.utils.face_align import norm_crop
@@ -66,7 +68,6 @@ MOVES_LOG   = OUTCOME_DIR / "moves_log.csv"
 ERRORS_LOG  = OUTCOME_DIR / "move_errors.csv"
 
 MOVE_MODE = "copy"
-IO_WORKERS = 12
 
 # RULES use bucket tiers (0..5) computed per-anchor with absolute thresholds
 RULES = [
@@ -617,7 +618,7 @@ def main():
             return (str(s), str(d), "ERROR", str(e))
 
     if move_plan:
-        with ThreadPoolExecutor(max_workers=IO_WORKERS) as ex:
+        with ThreadPoolExecutor(max_workers=io_strategy(str(OUTCOME_DIR)).io_workers) as ex:
             for (s, d, how, err) in tqdm(ex.map(worker, move_plan, chunksize=64),
                                          total=len(move_plan), desc="Moving", unit="file"):
                 if how == "ERROR": errors.append({"src": s, "dst": d, "error": err})
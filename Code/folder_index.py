@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AbstractSet, Iterator, List, Optional, Tuple
+
+from fs_paths import io_strategy
+
+# Cached listings kept before the least recently used folder is dropped.
+MAX_CACHED_FOLDERS = 4096
+# Directories modified this recently are listed but not cached: on coarse
+# mtime filesystems (DrvFs, SMB) a later change could keep the same mtime.
+RACY_WINDOW_NS = 2_000_000_000
+
+Fingerprint = Tuple[int, int, int]
+
+
+@dataclass
+class FolderListing:
+    folder: str
+    fingerprint: Fingerprint
+    files: Tuple[str, ...]
+    dirs: Tuple[str, ...] = ()
+
+
+def _fingerprint(st: os.stat_result) -> Fingerprint:
+    return (st.st_ino, st.st_mtime_ns, st.st_ctime_ns)
+
+
+def folder_fingerprint(folder: str) -> Fingerprint:
+    return _fingerprint(os.stat(folder))
+
+
+def scan_folder(folder: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """
+    Sorted names of the regular files and of the subdirectories directly
+    inside `folder`. DirEntry.is_file/is_dir answer from the d_type returned
+    by readdir, so no per-entry stat is issued except for symlinks or
+    filesystems that report DT_UNKNOWN. Symlinked directories are not listed.
+    """
+    files: List[str] = []
+    dirs: List[str] = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.is_file():
+                files.append(entry.name)
+            elif entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.name)
+    return tuple(sorted(files)), tuple(sorted(dirs))
+
+
+def scan_files(folder: str) -> Tuple[str, ...]:
+    return scan_folder(folder)[0]
+
+
+class FolderIndex:
+    def __init__(self, max_folders: int = MAX_CACHED_FOLDERS):
+        self._entries: "OrderedDict[str, FolderListing]" = OrderedDict()
+        self._max_folders = max_folders
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, folder: str) -> FolderListing:
+        """
+        Return the listing for `folder`, rescanning only when the directory
+        fingerprint differs from the cached one. Costs a single stat on a hit.
+        """
+        try:
+            st = os.stat(folder)
+        except (OSError, ValueError):
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            raise FileNotFoundError(f"Folder not found: {folder}")
+        fingerprint = _fingerprint(st)
+        with self._lock:
+            cached = self._entries.get(folder)
+            if cached is not None and cached.fingerprint == fingerprint:
+                self._entries.move_to_end(folder)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        files, dirs = scan_folder(folder)
+        listing = FolderListing(folder=folder, fingerprint=fingerprint, files=files, dirs=dirs)
+        self.put(listing)
+        return listing
+
+    def put(self, listing: FolderListing) -> None:
+        """
+        Cache a listing built elsewhere (a fresh scan, or a folder watcher
+        applying change events) unless its folder was modified too recently
+        for the fingerprint to be trusted.
+        """
+        folder = listing.folder
+        if time.time_ns() - listing.fingerprint[1] < RACY_WINDOW_NS:
+            self.invalidate(folder)
+            return
+        with self._lock:
+            self._entries[folder] = listing
+            self._entries.move_to_end(folder)
+            while len(self._entries) > self._max_folders:
+                self._entries.popitem(last=False)
+
+    def list_files(self, folder: str) -> Tuple[str, ...]:
+        return self.get(folder).files
+
+    def walk(
+        self,
+        root: str,
+        workers: Optional[int] = None,
+        skip_dirs: AbstractSet[str] = frozenset(),
+    ) -> Iterator[Tuple[str, FolderListing]]:
+        """
+        Yield (relative_dir, listing) for `root` and every directory below it,
+        level by level in name order, listing each level on a thread pool.
+        `relative_dir` uses "/" and is "" for the root itself. Directories
+        that disappear mid-walk, and those named in `skip_dirs`, are skipped.
+        `workers` defaults to the walk concurrency of the root's mount.
+        """
+        level: List[str] = [""]
+        root_listing = self.get(root)
+        if workers is None:
+            workers = io_strategy(root).walk_workers
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as ex:
+            listings: List[Optional[FolderListing]] = [root_listing]
+            while level:
+                next_level: List[str] = []
+                for rel, listing in zip(level, listings):
+                    if listing is None:
+                        continue
+                    yield rel, listing
+                    next_level.extend(
+                        f"{rel}/{d}" if rel else d for d in listing.dirs if d not in skip_dirs
+                    )
+                level = next_level
+                listings = list(ex.map(lambda rel: self._get_or_none(os.path.join(root, rel)), level))
+
+    def _get_or_none(self, folder: str) -> Optional[FolderListing]:
+        try:
+            return self.get(folder)
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            return None
+
+    def invalidate(self, folder: Optional[str] = None) -> None:
+        with self._lock:
+            if folder is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(folder, None)
+
+
+folder_index = FolderIndex()
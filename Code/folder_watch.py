@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import itertools
+import os
+import select
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from folder_index import FolderListing, folder_fingerprint, folder_index, scan_folder
+from fs_paths import io_strategy
+
+# Events are coalesced for this long after the last one before subscribers
+# hear about them, so a burst of writes becomes one change.
+WATCH_DEBOUNCE_SECONDS = 0.2
+# ...but a folder that never goes quiet is still flushed this often.
+WATCH_MAX_LATENCY_SECONDS = 1.0
+# Mounts whose changes inotify cannot see (DrvFs, network shares: edits made
+# from Windows or another host) are polled by directory fingerprint instead.
+POLL_INTERVAL_SECONDS = 1.0
+
+# <sys/inotify.h>
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+# Only name changes matter to a listing; content writes are not watched.
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass(frozen=True)
+class FolderChange:
+    """Files that appeared in or left a watched folder, and its listing afterwards."""
+
+    folder: str
+    added: FrozenSet[str]
+    removed: FrozenSet[str]
+    listing: Optional[FolderListing]
+    # the folder itself was deleted or moved away; no further changes follow
+    gone: bool = False
+
+
+Callback = Callable[[FolderChange], None]
+
+
+class Inotify:
+    """Minimal ctypes binding for inotify(7); no third-party package required."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) for every queued event, waiting up to `timeout` for the first."""
+        if timeout > 0:
+            ready, _, _ = select.select([self.fd], [], [], timeout)
+            if not ready:
+                return []
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                events.append((wd, mask, name))
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _load_inotify() -> Optional[Inotify]:
+    try:
+        return Inotify()
+    except (OSError, AttributeError, TypeError):
+        # not Linux, no libc symbol, or out of inotify instances
+        return None
+
+
+@dataclass
+class _Watch:
+    folder: str
+    files: Set[str]
+    dirs: Set[str]
+    fingerprint: Tuple[int, int, int]
+    subscribers: Dict[int, Callback] = field(default_factory=dict)
+    wd: Optional[int] = None
+    # name -> (present, is_dir) after the events seen since the last flush
+    pending: Dict[str, Tuple[bool, bool]] = field(default_factory=dict)
+    first_event: float = 0.0
+    last_event: float = 0.0
+    rescan: bool = False
+
+
+class FolderWatcher:
+    """
+    Watches folders that have subscribers and keeps folder_index current.
+    inotify events are applied to the watcher's own copy of each listing,
+    so a change costs one stat per added name instead of a rescan; polled
+    folders (and inotify queue overflows) fall back to scanning.
+    """
+
+    def __init__(
+        self,
+        debounce: float = WATCH_DEBOUNCE_SECONDS,
+        poll_interval: float = POLL_INTERVAL_SECONDS,
+        use_inotify: bool = True,
+    ):
+        self._debounce = debounce
+        self._poll_interval = poll_interval
+        self._use_inotify = use_inotify
+        self._inotify: Optional[Inotify] = None
+        self._lock = threading.Lock()
+        self._watches: Dict[str, _Watch] = {}
+        self._by_wd: Dict[int, _Watch] = {}
+        self._tokens: Dict[int, str] = {}
+        self._next_token = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, folder: str, callback: Callback) -> int:
+        """
+        Call `callback(FolderChange)` from the watcher thread whenever files
+        appear in or leave `folder` (already normalized). Returns a token
+        for unsubscribe.
+        """
+        with self._lock:
+            watch = self._watches.get(folder)
+            if watch is None:
+                watch = self._start_watch(folder)
+                self._watches[folder] = watch
+            token = next(self._next_token)
+            watch.subscribers[token] = callback
+            self._tokens[token] = folder
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="folder-watch", daemon=True)
+                self._thread.start()
+        return token
+
+    def unsubscribe(self, token: int) -> None:
+        with self._lock:
+            folder = self._tokens.pop(token, None)
+            watch = self._watches.get(folder) if folder is not None else None
+            if watch is None:
+                return
+            watch.subscribers.pop(token, None)
+            if not watch.subscribers:
+                self._stop_watch(watch)
+
+    def watched(self) -> List[str]:
+        with self._lock:
+            return list(self._watches)
+
+    def is_polled(self, folder: str) -> bool:
+        with self._lock:
+            watch = self._watches.get(folder)
+            return watch is not None and watch.wd is None
+
+    def _start_watch(self, folder: str) -> _Watch:
+        listing = folder_index.get(folder)
+        watch = _Watch(folder, set(listing.files), set(listing.dirs), listing.fingerprint)
+        if self._use_inotify and io_strategy(folder).kind == "native":
+            if self._inotify is None:
+                self._inotify = _load_inotify()
+            if self._inotify is not None:
+                try:
+                    watch.wd = self._inotify.add_watch(folder)
+                except OSError:
+                    watch.wd = None  # e.g. max_user_watches reached: poll instead
+            if watch.wd is not None:
+                self._by_wd[watch.wd] = watch
+                # changes between the listing above and the watch landing
+                watch.rescan = folder_fingerprint(folder) != listing.fingerprint
+                watch.first_event = watch.last_event = time.monotonic()
+        return watch
+
+    def _stop_watch(self, watch: _Watch) -> None:
+        self._watches.pop(watch.folder, None)
+        if watch.wd is not None:
+            self._by_wd.pop(watch.wd, None)
+            if self._inotify is not None:
+                self._inotify.rm_watch(watch.wd)
+            watch.wd = None
+
+    def _loop(self) -> None:
+        next_poll = time.monotonic() + self._poll_interval
+        while True:
+            with self._lock:
+                if not self._watches:
+                    self._thread = None
+                    return
+            inotify = self._inotify
+            if inotify is not None and self._by_wd:
+                events = inotify.read_events(self._debounce / 2)
+            else:
+                events = []
+                time.sleep(self._debounce / 2)
+            now = time.monotonic()
+            changes: List[Tuple[_Watch, FolderChange]] = []
+            with self._lock:
+                for wd, mask, name in events:
+                    self._record(wd, mask, name, now)
+                for watch in list(self._by_wd.values()):
+                    if watch.pending or watch.rescan:
+                        quiet = now - watch.last_event >= self._debounce
+                        if quiet or now - watch.first_event >= WATCH_MAX_LATENCY_SECONDS:
+                            changes.append((watch, self._flush(watch)))
+                if now >= next_poll:
+                    next_poll = now + self._poll_interval
+                    for watch in list(self._watches.values()):
+                        if watch.wd is None:
+                            change = self._poll(watch)
+                            if change is not None:
+                                changes.append((watch, change))
+                for watch, change in changes:
+                    if change.gone:
+                        self._stop_watch(watch)
+                notify = [(list(watch.subscribers.values()), change) for watch, change in changes]
+            for callbacks, change in notify:
+                if change.added or change.removed or change.gone:
+                    for callback in callbacks:
+                        callback(change)
+
+    def _record(self, wd: int, mask: int, name: str, now: float) -> None:
+        if mask & IN_Q_OVERFLOW:
+            # events were dropped: every inotify-watched folder is rescanned
+            for watch in self._by_wd.values():
+                watch.rescan = True
+                watch.last_event = now
+            return
+        watch = self._by_wd.get(wd)
+        if watch is None:
+            return
+        if not watch.pending and not watch.rescan:
+            watch.first_event = now
+        watch.last_event = now
+        if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+            watch.rescan = True
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            watch.pending[name] = (True, bool(mask & IN_ISDIR))
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            watch.pending[name] = (False, bool(mask & IN_ISDIR))
+
+    def _flush(self, watch: _Watch) -> FolderChange:
+        folder = watch.folder
+        try:
+            # taken before the queue is drained, so the listing holds every
+            # change up to it; anything landing later changes the fingerprint
+            # and forces a real rescan
+            fingerprint = folder_fingerprint(folder)
+        except OSError:
+            return self._gone(watch)
+        if self._inotify is not None:
+            now = time.monotonic()
+            for wd, mask, name in self._inotify.read_events(0):
+                self._record(wd, mask, name, now)
+        pending, watch.pending = watch.pending, {}
+        if watch.rescan:
+            watch.rescan = False
+            try:
+                files, dirs = scan_folder(folder)
+            except OSError:
+                return self._gone(watch)
+            added = frozenset(files) - watch.files
+            removed = frozenset(watch.files) - frozenset(files)
+            watch.files, watch.dirs = set(files), set(dirs)
+        else:
+            added_files: Set[str] = set()
+            removed_files: Set[str] = set()
+            for name, (present, is_dir) in pending.items():
+                if is_dir:
+                    (watch.dirs.add if present else watch.dirs.discard)(name)
+                elif present and os.path.isfile(os.path.join(folder, name)):
+                    if name not in watch.files:
+                        added_files.add(name)
+                        watch.files.add(name)
+                elif name in watch.files:
+                    removed_files.add(name)
+                    watch.files.discard(name)
+            added, removed = frozenset(added_files), frozenset(removed_files)
+        watch.fingerprint = fingerprint
+        listing = self._listing(watch)
+        return FolderChange(folder, added, removed, listing)
+
+    def _poll(self, watch: _Watch) -> Optional[FolderChange]:
+        try:
+            fingerprint = folder_fingerprint(watch.folder)
+        except OSError:
+            return self._gone(watch)
+        if fingerprint == watch.fingerprint:
+            return None
+        try:
+            listing = folder_index.get(watch.folder)
+        except OSError:
+            return self._gone(watch)
+        files = frozenset(listing.files)
+        added = files - watch.files
+        removed = frozenset(watch.files) - files
+        watch.files, watch.dirs = set(files), set(listing.dirs)
+        watch.fingerprint = listing.fingerprint
+        return FolderChange(watch.folder, added, removed, listing)
+
+    def _listing(self, watch: _Watch) -> FolderListing:
+        listing = FolderListing(
+            folder=watch.folder,
+            fingerprint=watch.fingerprint,
+            files=tuple(sorted(watch.files)),
+            dirs=tuple(sorted(watch.dirs)),
+        )
+        folder_index.put(listing)
+        return listing
+
+    def _gone(self, watch: _Watch) -> FolderChange:
+        folder_index.invalidate(watch.folder)
+        removed = frozenset(watch.files)
+        watch.files = set()
+        return FolderChange(watch.folder, frozenset(), removed, None, gone=True)
+
+
+folder_watcher = FolderWatcher()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import ntpath
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+# Mount table re-read at most this often; mounts rarely change under a server.
+MOUNT_TABLE_TTL_SECONDS = 60.0
+
+# WSL exposes Windows drives as drvfs (WSL1) or 9p with aname=drvfs (WSL2).
+DRVFS_FS = {"drvfs", "9p", "v9fs"}
+# Anything else (ext4, xfs, btrfs, tmpfs, overlay, ...) is treated as native.
+NETWORK_FS = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "afs", "fuse.sshfs", "ceph", "glusterfs"}
+
+
+@dataclass(frozen=True)
+class MountInfo:
+    mount_point: str
+    fstype: str
+    source: str
+
+
+@dataclass(frozen=True)
+class IOStrategy:
+    """
+    How hard to push a filesystem. Local disks answer metadata calls in
+    microseconds, so pools only add overhead; DrvFs and network mounts pay
+    a round-trip per call, which concurrency hides.
+    """
+
+    kind: str  # "native" | "drvfs" | "network"
+    # concurrent file reads/copies (captions, face crops)
+    io_workers: int
+    # concurrent os.rename chains
+    rename_workers: int
+    # directories listed concurrently per tree level
+    walk_workers: int
+    # items handed to a worker or written between flushes
+    batch_size: int
+    # bytes read per call when streaming file contents
+    read_chunk_bytes: int
+    # batches queued ahead of a streaming consumer, per worker
+    read_ahead: int
+
+
+STRATEGIES = {
+    "native": IOStrategy(
+        "native",
+        io_workers=4,
+        rename_workers=1,
+        walk_workers=4,
+        batch_size=4096,
+        read_chunk_bytes=1 << 20,
+        read_ahead=2,
+    ),
+    "drvfs": IOStrategy(
+        "drvfs",
+        io_workers=12,
+        rename_workers=16,
+        walk_workers=16,
+        batch_size=512,
+        read_chunk_bytes=256 << 10,
+        read_ahead=4,
+    ),
+    "network": IOStrategy(
+        "network",
+        io_workers=16,
+        rename_workers=32,
+        walk_workers=16,
+        batch_size=256,
+        read_chunk_bytes=256 << 10,
+        read_ahead=4,
+    ),
+}
+
+
+@lru_cache(maxsize=1024)
+def normalize_fs_path(path: str) -> str:
+    """
+    Convert incoming Windows-style paths (e.g., E:\\foo\\bar) to WSL mounts
+    so os.path calls work when the API runs inside WSL.
+    """
+    if not path:
+        return path
+
+    sanitized = path.strip()
+    if not sanitized:
+        return sanitized
+
+    # strip wrapping quotes from paths copied via “Copy as path”
+    if sanitized[0] in {"'", '"'} and sanitized[-1] == sanitized[0]:
+        sanitized = sanitized[1:-1].strip()
+        if not sanitized:
+            return sanitized
+
+    if sanitized.startswith("\\\\?\\"):
+        sanitized = sanitized[4:]
+
+    drive, remainder = ntpath.splitdrive(sanitized)
+
+    if os.name == "posix" and drive:
+        drive_letter = drive.replace(":", "").lower()
+        remainder = remainder.replace("\\", "/").lstrip("/")
+        return f"/mnt/{drive_letter}/{remainder}" if remainder else f"/mnt/{drive_letter}"
+
+    return sanitized
+
+
+def _unescape(field: str) -> str:
+    """mountinfo escapes space, tab, newline and backslash as octal."""
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field)
+
+
+def parse_mountinfo(text: str) -> List[MountInfo]:
+    mounts: List[MountInfo] = []
+    for line in text.splitlines():
+        left, sep, right = line.partition(" - ")
+        fields = left.split()
+        tail = right.split()
+        if not sep or len(fields) < 5 or len(tail) < 2:
+            continue
+        fstype = tail[0]
+        # WSL2 mounts Windows drives as plain 9p; only aname=drvfs marks them
+        if fstype == "9p" and len(tail) > 2 and "drvfs" in tail[2]:
+            fstype = "drvfs"
+        mounts.append(MountInfo(_unescape(fields[4]), fstype, _unescape(tail[1])))
+    return mounts
+
+
+class MountTable:
+    def __init__(self, path: str = MOUNTINFO_PATH, ttl: float = MOUNT_TABLE_TTL_SECONDS):
+        self._path = path
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._mounts: List[MountInfo] = []
+        self._loaded_at = float("-inf")
+
+    def _load(self) -> List[MountInfo]:
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self._ttl:
+                try:
+                    with open(self._path, encoding="utf-8", errors="replace") as fh:
+                        mounts = parse_mountinfo(fh.read())
+                except OSError:
+                    mounts = []
+                # longest mount point first, so the first prefix match wins
+                self._mounts = sorted(mounts, key=lambda m: len(m.mount_point), reverse=True)
+                self._loaded_at = time.monotonic()
+            return self._mounts
+
+    def mount_for(self, path: str) -> Optional[MountInfo]:
+        real = os.path.realpath(path)
+        for mount in self._load():
+            point = mount.mount_point
+            if real == point or real.startswith(point.rstrip("/") + "/"):
+                return mount
+        return None
+
+
+mount_table = MountTable()
+
+
+def strategy_for_mount(mount: Optional[MountInfo]) -> IOStrategy:
+    if mount is None:
+        return STRATEGIES["native"]
+    fstype = mount.fstype
+    if fstype in DRVFS_FS:
+        return STRATEGIES["drvfs"]
+    if fstype in NETWORK_FS:
+        return STRATEGIES["network"]
+    return STRATEGIES["native"]
+
+
+def io_strategy(path: str) -> IOStrategy:
+    """I/O strategy of the mount holding `path` (already normalized)."""
+    return strategy_for_mount(mount_table.mount_for(path))
+
+
+@dataclass(frozen=True)
+class ResolvedFolder:
+    raw: str
+    path: str
+    mount: Optional[MountInfo]
+    strategy: IOStrategy
+
+
+def resolve_folder(raw: str) -> ResolvedFolder:
+    """
+    Normalize a folder from a request and look up its mount once; callers
+    pass the result down instead of re-normalizing per file.
+    """
+    path = normalize_fs_path(raw)
+    mount = mount_table.mount_for(path) if path else None
+    return ResolvedFolder(raw=raw, path=path, mount=mount, strategy=strategy_for_mount(mount))
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Mapping, Sequence
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+# Mapping layouts accepted by `format` on /preview and /run:
+#   rows    -> files: [{"original", "new"}, ...] (the default, pydantic models)
+#   columns -> original: [...], new: [...] in folder order
+#   changes -> count, index: [...], original: [...], new: [...] for renamed rows only
+COMPACT_FORMATS = ("columns", "changes")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode plain JSON data to UTF-8 bytes, with orjson when installed. File
+    names that are not valid UTF-8 arrive from os.listdir as lone
+    surrogates, which orjson rejects; those payloads fall back to the stdlib
+    encoder, which writes them as \\udcXX escapes like the row format does.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def mapping_payload(
+    fmt: str,
+    names: Sequence[str],
+    mapping: Mapping[str, str],
+    fields: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Compact layout of `mapping` over `names`, merged with the response's other fields."""
+    payload: Dict[str, Any] = {"format": fmt}
+    if fmt == "columns":
+        payload["original"] = list(names)
+        payload["new"] = [mapping[name] for name in names]
+    elif fmt == "changes":
+        index: List[int] = []
+        original: List[str] = []
+        new: List[str] = []
+        for i, name in enumerate(names):
+            target = mapping[name]
+            if target != name:
+                index.append(i)
+                original.append(name)
+                new.append(target)
+        payload.update(count=len(names), index=index, original=original, new=new)
+    else:
+        raise ValueError(f"unknown mapping format: {fmt}")
+    payload.update(fields)
+    return payload
@@ -1,9 +1,13 @@
 import importlib.util
+import json
 import os
+import threading
+import time
 import sys
 from pathlib import Path
 
 import pytest
+from fastapi.testclient import TestClient
 
 REPO_ROOT = Path(__file__).resolve().parents[4]
 CODE_DIR = REPO_ROOT / "Code"
@@ -16,6 +20,7 @@ sys.modules["max_api"] = max_api
 spec.loader.exec_module(max_api)  # type: ignore
 
 normalize_fs_path = max_api.normalize_fs_path
+client = TestClient(max_api.app)
 
 
 def test_normalize_fs_path_strips_quotes_and_maps_drive():
@@ -40,6 +45,51 @@ def test_preview_counts(tmp_path):
   assert len(resp.files) == 2
 
 
+def test_preview_stream_emits_rows_then_summary_trailer(tmp_path):
+  for name in ("alpha.txt", "beta.txt", "gamma.txt"):
+    (tmp_path / name).write_text(name, encoding="utf-8")
+
+  resp = client.post(
+    "/preview/stream",
+    json={
+      "folder": str(tmp_path),
+      "operations": [{"step": 1, "type": "add_prefix", "value": "hello"}],
+    },
+  )
+  assert resp.status_code == 200
+  assert resp.headers["content-type"].startswith("application/x-ndjson")
+  lines = [json.loads(line) for line in resp.text.splitlines()]
+  assert lines[:-1] == [
+    {"original": "alpha.txt", "new": "hello-alpha.txt"},
+    {"original": "beta.txt", "new": "hello-beta.txt"},
+    {"original": "gamma.txt", "new": "hello-gamma.txt"},
+  ]
+  assert lines[-1] == {"summary": {"renamed": 3, "unchanged": 0, "collisions": 0}}
+
+
+def test_preview_stream_does_not_build_step_columns(tmp_path, monkeypatch):
+  (tmp_path / "a.png").write_text("a", encoding="utf-8")
+
+  def columns_for(folder, listing):
+    raise AssertionError("stream built step columns")
+
+  monkeypatch.setattr(max_api.preview_memo, "columns_for", columns_for)
+  resp = client.post(
+    "/preview/stream",
+    json={"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_prefix", "value": "p"}]},
+  )
+  assert resp.status_code == 200
+  assert json.loads(resp.text.splitlines()[0]) == {"original": "a.png", "new": "p-a.png"}
+
+
+def test_preview_stream_missing_folder_returns_404(tmp_path):
+  resp = client.post(
+    "/preview/stream",
+    json={"folder": str(tmp_path / "nope"), "operations": []},
+  )
+  assert resp.status_code == 404
+
+
 def test_run_respects_include_files(tmp_path):
   f1 = tmp_path / "one.txt"
   f2 = tmp_path / "two.txt"
@@ -59,14 +109,63 @@ def test_run_respects_include_files(tmp_path):
   assert resp.summary.renamed == 1
 
 
+def test_run_commits_previewed_plan(tmp_path):
+  (tmp_path / "one.txt").write_text("1", encoding="utf-8")
+  (tmp_path / "two.txt").write_text("2", encoding="utf-8")
+
+  preview = client.post(
+    "/preview",
+    json={"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_suffix", "value": "v2"}]},
+  ).json()
+  assert preview["plan_id"]
+
+  resp = client.post(
+    "/run",
+    json={"folder": str(tmp_path), "plan_id": preview["plan_id"], "include_files": ["one.txt"]},
+  )
+  assert resp.status_code == 200
+  assert resp.json()["files"] == [{"original": "one.txt", "new": "one-v2.txt"}]
+  assert (tmp_path / "one-v2.txt").exists()
+  assert (tmp_path / "two.txt").exists()
+
+  again = client.post("/run", json={"folder": str(tmp_path), "plan_id": preview["plan_id"]})
+  assert again.status_code == 404
+
+
+def test_run_rejects_plan_when_folder_changed(tmp_path):
+  (tmp_path / "one.txt").write_text("1", encoding="utf-8")
+  plan_id = client.post(
+    "/preview",
+    json={"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_prefix", "value": "pre"}]},
+  ).json()["plan_id"]
+
+  (tmp_path / "late.txt").write_text("late", encoding="utf-8")
+  st = tmp_path.stat()
+  os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+  resp = client.post("/run", json={"folder": str(tmp_path), "plan_id": plan_id})
+  assert resp.status_code == 409
+  assert (tmp_path / "one.txt").exists()
+
+
+def test_run_rejects_plan_for_other_folder(tmp_path):
+  first = tmp_path / "first"
+  second = tmp_path / "second"
+  first.mkdir()
+  second.mkdir()
+  plan_id = client.post("/preview", json={"folder": str(first), "operations": []}).json()["plan_id"]
+  resp = client.post("/run", json={"folder": str(second), "plan_id": plan_id})
+  assert resp.status_code == 409
+
+
 def test_dataset_caption_endpoints(tmp_path):
   base = tmp_path / "captions"
   base.mkdir()
   caption = base / "pose.txt"
   caption.write_text("calm", encoding="utf-8")
 
-  load_req = max_api.CaptionLoadRequest(folder=str(base), recursive=False)
-  rows = max_api.dataset_load_captions(load_req).rows
+  load_resp = client.post("/dataset/captions/load", json={"folder": str(base), "recursive": False})
+  rows = max_api.CaptionLoadResponse(**load_resp.json()).rows
 
   preview_req = max_api.CaptionPreviewRequest(
     entries=rows,
@@ -120,3 +219,504 @@ def test_copy_and_make_blank_endpoints(tmp_path):
   )
   blank_resp = max_api.dataset_make_blank(blank_req)
   assert Path(blank_resp.csv_path).exists()
+
+
+def test_run_reports_per_file_errors(tmp_path, monkeypatch):
+  (tmp_path / "one.txt").write_text("1", encoding="utf-8")
+
+  def failing_rename(src, dst):
+    raise PermissionError("denied")
+
+  monkeypatch.setattr(max_api.os, "rename", failing_rename)
+  resp = max_api.run(
+    max_api.RunRequest(
+      folder=str(tmp_path),
+      operations=[max_api.Operation(step=1, type="add_prefix", value="pre")],
+    )
+  )
+  assert [e.dict() for e in resp.errors] == [
+    {"original": "one.txt", "new": "pre-one.txt", "error": "denied"}
+  ]
+
+
+def _make_tree(base):
+  for rel in ("shot.exr", "seq01/shot.exr", "seq01/shot_v2.exr", "seq02/deep/shot.exr"):
+    target = base / rel
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(rel, encoding="utf-8")
+
+
+def test_recursive_preview_keeps_each_directory_as_collision_domain(tmp_path):
+  _make_tree(tmp_path)
+  resp = client.post(
+    "/preview",
+    json={
+      "folder": str(tmp_path),
+      "recursive": True,
+      "operations": [{"step": 1, "type": "remove_suffix", "value": "_v2"}],
+    },
+  ).json()
+  assert resp["files"] == [
+    {"original": "shot.exr", "new": "shot.exr"},
+    {"original": "seq01/shot.exr", "new": "seq01/shot.exr"},
+    {"original": "seq01/shot_v2.exr", "new": "seq01/shot_1.exr"},
+    {"original": "seq02/deep/shot.exr", "new": "seq02/deep/shot.exr"},
+  ]
+  assert resp["summary"] == {"renamed": 1, "unchanged": 3, "collisions": 1}
+
+
+def test_recursive_run_job_reports_progress(tmp_path):
+  _make_tree(tmp_path)
+  job_id = client.post(
+    "/run/jobs",
+    json={
+      "folder": str(tmp_path),
+      "recursive": True,
+      "operations": [{"step": 1, "type": "add_prefix", "value": "p"}],
+    },
+  ).json()["job_id"]
+
+  deadline = time.time() + 5
+  status = client.get(f"/jobs/{job_id}").json()
+  while status["state"] not in {"completed", "failed"} and time.time() < deadline:
+    time.sleep(0.02)
+    status = client.get(f"/jobs/{job_id}").json()
+  assert status["state"] == "completed"
+  assert (status["processed"], status["total"]) == (4, 4)
+  assert (tmp_path / "seq02" / "deep" / "p-shot.exr").exists()
+  assert (tmp_path / "p-shot.exr").exists()
+
+
+def test_run_job_missing_folder_returns_404(tmp_path):
+  resp = client.post("/run/jobs", json={"folder": str(tmp_path / "nope"), "operations": []})
+  assert resp.status_code == 404
+
+
+def test_recursive_plan_rejected_when_subfolder_changed(tmp_path):
+  _make_tree(tmp_path)
+  plan_id = client.post(
+    "/preview",
+    json={"folder": str(tmp_path), "recursive": True, "operations": [{"step": 1, "type": "add_prefix", "value": "p"}]},
+  ).json()["plan_id"]
+  sub = tmp_path / "seq02" / "deep"
+  (sub / "late.exr").write_text("late", encoding="utf-8")
+  st = sub.stat()
+  os.utime(sub, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+  resp = client.post("/run", json={"folder": str(tmp_path), "plan_id": plan_id})
+  assert resp.status_code == 409
+
+
+def _wait_for_job(job_id, states=("completed", "failed", "cancelled")):
+  deadline = time.time() + 5
+  status = client.get(f"/jobs/{job_id}").json()
+  while status["state"] not in states and time.time() < deadline:
+    time.sleep(0.02)
+    status = client.get(f"/jobs/{job_id}").json()
+  return status
+
+
+def test_run_job_stores_run_response_as_result(tmp_path):
+  (tmp_path / "a.png").write_text("a", encoding="utf-8")
+  job_id = client.post(
+    "/run/jobs",
+    json={"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_suffix", "value": "v2"}]},
+  ).json()["job_id"]
+  status = _wait_for_job(job_id)
+  assert status["state"] == "completed"
+  assert status["result"]["files"] == [{"original": "a.png", "new": "a-v2.png"}]
+  assert status["result"]["errors"] == []
+
+
+def test_cancel_unknown_job_returns_404():
+  assert client.post("/jobs/does-not-exist/cancel").status_code == 404
+
+
+def test_cancelled_job_waiting_in_queue_never_runs():
+  import face_jobs
+
+  manager = face_jobs.JobManager(max_concurrent=1)
+  release = threading.Event()
+  ran = []
+  first = manager.submit("test", "blocker", lambda status: release.wait(5) and None)
+  queued = manager.submit("test", "queued", lambda status: ran.append(1))
+  assert manager.cancel(queued.job_id).state == "pending"
+  release.set()
+
+  deadline = time.time() + 5
+  while queued.state != "cancelled" and time.time() < deadline:
+    time.sleep(0.01)
+  assert queued.state == "cancelled"
+  assert ran == []
+  assert first.state == "completed"
+
+
+def test_job_cancelled_after_its_last_item_is_completed():
+  import face_jobs
+
+  manager = face_jobs.JobManager(max_concurrent=1)
+
+  def work(status, stop_after):
+    status.total = 3
+    for _ in range(3):
+      if status.cancel_requested:
+        break
+      status.processed += 1
+      if status.processed == stop_after:
+        manager.cancel(status.job_id)
+    return {"processed": status.processed}
+
+  late = manager.submit("test", "late cancel", lambda status: work(status, 3))
+  early = manager.submit("test", "early cancel", lambda status: work(status, 1))
+  deadline = time.time() + 5
+  while early.state not in face_jobs.FINISHED_STATES and time.time() < deadline:
+    time.sleep(0.01)
+  assert (late.state, late.result) == ("completed", {"processed": 3})
+  assert (early.state, early.processed) == ("cancelled", 1)
+
+
+def test_run_journal_undo_restores_original_names(tmp_path):
+  for name in ("a.png", "a-v2.png", "b.png"):
+    (tmp_path / name).write_text(name, encoding="utf-8")
+  run = client.post(
+    "/run",
+    json={"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_suffix", "value": "v2"}]},
+  ).json()
+  assert run["journal_id"]
+  assert not (tmp_path / "b.png").exists()
+
+  undo = client.post(f"/run/journals/{run['journal_id']}/undo", json={"folder": str(tmp_path)})
+  assert undo.status_code == 200
+  assert undo.json()["errors"] == []
+  assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["a-v2.png", "a.png", "b.png"]
+  assert (tmp_path / "a.png").read_text(encoding="utf-8") == "a.png"
+
+  journals = {j["journal_id"]: j for j in client.get("/run/journals", params={"folder": str(tmp_path)}).json()}
+  assert journals[run["journal_id"]]["undone_by"] == undo.json()["journal_id"]
+  again = client.post(f"/run/journals/{run['journal_id']}/undo", json={"folder": str(tmp_path)})
+  assert again.status_code == 409
+
+
+def test_interrupted_run_is_listed_and_resumed(tmp_path):
+  import rename_executor
+  import rename_journal
+
+  for name in ("a", "b"):
+    (tmp_path / name).write_text(name, encoding="utf-8")
+  chains = rename_executor.plan_chains([("a", "p-a"), ("b", "p-b")])
+  journal = rename_journal.RenameJournal.create(str(tmp_path), chains)
+  os.rename(tmp_path / "a", tmp_path / "p-a")
+  journal._fh.close()
+
+  (info,) = client.get("/run/journals", params={"folder": str(tmp_path)}).json()
+  assert (info["status"], info["done"], info["total"]) == ("interrupted", 1, 2)
+  resp = client.post(f"/run/journals/{journal.journal_id}/resume", json={"folder": str(tmp_path)})
+  assert resp.status_code == 200
+  assert resp.json()["errors"] == []
+  assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["p-a", "p-b"]
+  (info,) = client.get("/run/journals", params={"folder": str(tmp_path)}).json()
+  assert (info["status"], info["done"]) == ("completed", 2)
+
+
+def test_run_that_raises_leaves_its_journal_resumable(tmp_path, monkeypatch):
+  for name in ("a.png", "b.png"):
+    (tmp_path / name).write_text(name, encoding="utf-8")
+  real_execute = max_api.execute_chains
+
+  def crash(folder, chains, starts, **kwargs):
+    kwargs["journal"].step_done(0, 0, chains[0][0])
+    os.rename(tmp_path / chains[0][0].src, tmp_path / chains[0][0].dst)
+    raise OSError("device disconnected")
+
+  monkeypatch.setattr(max_api, "execute_chains", crash)
+  with pytest.raises(OSError):
+    client.post(
+      "/run",
+      json={"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_suffix", "value": "v2"}]},
+    )
+  (info,) = client.get("/run/journals", params={"folder": str(tmp_path)}).json()
+  assert (info["status"], info["done"], info["total"]) == ("interrupted", 1, 2)
+
+  monkeypatch.setattr(max_api, "execute_chains", real_execute)
+  resp = client.post(f"/run/journals/{info['journal_id']}/resume", json={"folder": str(tmp_path)})
+  assert resp.status_code == 200 and resp.json()["errors"] == []
+  assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["a-v2.png", "b-v2.png"]
+
+
+def test_run_cancelled_after_last_rename_closes_journal_completed(tmp_path):
+  for name in ("a.png", "b.png"):
+    (tmp_path / name).write_text(name, encoding="utf-8")
+  finished = []
+  req = max_api.RunRequest(
+    folder=str(tmp_path), operations=[max_api.Operation(step=1, type="add_suffix", value="v2")]
+  )
+  outcome = max_api.execute_run(
+    req, progress=lambda done, total: finished.append(done == total > 0), should_stop=lambda: any(finished)
+  )
+  assert outcome.errors == []
+  (info,) = client.get("/run/journals", params={"folder": str(tmp_path)}).json()
+  assert (info["status"], info["done"]) == ("completed", 2)
+
+
+def test_recursive_preview_skips_journal_directory(tmp_path):
+  (tmp_path / "a.png").write_text("a", encoding="utf-8")
+  client.post("/run", json={"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_prefix", "value": "p"}]})
+  preview = client.post(
+    "/preview",
+    json={"folder": str(tmp_path), "recursive": True, "operations": [{"step": 1, "type": "add_prefix", "value": "q"}]},
+  ).json()
+  assert [f["original"] for f in preview["files"]] == ["p-a.png"]
+
+
+def test_recursive_preview_skips_caption_backups(tmp_path):
+  (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+  max_api.run_caption_prefix_suffix(str(tmp_path), [], False, "p_", "", False, True)
+  assert (tmp_path / "__backup_prefix_suffix" / "a.txt.bak").exists()
+  body = {"folder": str(tmp_path), "recursive": True, "operations": [{"step": 1, "type": "add_prefix", "value": "q"}]}
+  preview = client.post("/preview", json=body).json()
+  assert [f["original"] for f in preview["files"]] == ["a.txt"]
+  client.post("/run", json=body)
+  assert (tmp_path / "__backup_prefix_suffix" / "a.txt.bak").exists()
+
+
+def test_fs_strategy_reports_mount_and_worker_counts(tmp_path):
+  resp = client.get("/fs/strategy", params={"folder": str(tmp_path)})
+  assert resp.status_code == 200
+  body = resp.json()
+  assert body["folder"] == str(tmp_path)
+  assert body["kind"] in {"native", "drvfs", "network"}
+  assert body["rename_workers"] >= 1
+  assert client.get("/fs/strategy", params={"folder": str(tmp_path / "nope")}).status_code == 404
+
+
+def test_preview_compact_formats_match_rows(tmp_path):
+  for name in ("a.png", "b.png", "keep-v2.png"):
+    (tmp_path / name).write_text(name, encoding="utf-8")
+  body = {"folder": str(tmp_path), "operations": [{"step": 1, "type": "add_suffix", "value": "v2"}]}
+  rows = client.post("/preview", json=body).json()
+  columns = client.post("/preview", json={**body, "format": "columns"}).json()
+  changes = client.post("/preview", json={**body, "format": "changes"}).json()
+
+  assert columns["original"] == [f["original"] for f in rows["files"]]
+  assert columns["new"] == [f["new"] for f in rows["files"]]
+  assert columns["summary"] == rows["summary"]
+  assert columns["plan_id"]
+  assert changes["count"] == 3
+  assert [(i, o, n) for i, o, n in zip(changes["index"], changes["original"], changes["new"])] == [
+    (i, f["original"], f["new"]) for i, f in enumerate(rows["files"]) if f["original"] != f["new"]
+  ]
+
+
+def test_run_changes_format_reports_errors_and_journal(tmp_path):
+  (tmp_path / "a.png").write_text("a", encoding="utf-8")
+  resp = client.post(
+    "/run",
+    json={"folder": str(tmp_path), "format": "changes", "operations": [{"step": 1, "type": "add_prefix", "value": "p"}]},
+  ).json()
+  assert resp["format"] == "changes"
+  assert (resp["original"], resp["new"], resp["errors"]) == (["a.png"], ["p-a.png"], [])
+  assert resp["journal_id"]
+
+
+def test_preview_watch_pushes_only_changed_rows(tmp_path):
+  for name in ("raw_a.png", "raw_b.png"):
+    (tmp_path / name).write_text(name, encoding="utf-8")
+  ops = [{"step": 1, "type": "remove_prefix", "value": "raw"}]
+
+  with client.websocket_connect("/preview/watch") as ws:
+    ws.send_json({"folder": str(tmp_path), "operations": ops})
+    snapshot = ws.receive_json()
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["original"] == ["raw_a.png", "raw_b.png"]
+    assert snapshot["new"] == ["a.png", "b.png"]
+
+    (tmp_path / "raw_c.png").write_text("c", encoding="utf-8")
+    (tmp_path / "raw_a.png").unlink()
+    delta = ws.receive_json()
+    assert delta["type"] == "delta"
+    assert (delta["original"], delta["new"], delta["removed"]) == (["raw_c.png"], ["c.png"], ["raw_a.png"])
+    assert delta["summary"]["renamed"] == 2
+
+    ws.send_json({"operations": ops + [{"step": 2, "type": "add_suffix", "value": "v2"}]})
+    swapped = ws.receive_json()
+    assert swapped["new"] == ["b-v2.png", "c-v2.png"]
+
+  resp = client.post("/run", json={"folder": str(tmp_path), "plan_id": swapped["plan_id"]})
+  assert resp.status_code == 200, resp.text
+  assert sorted(p.name for p in tmp_path.glob("*.png")) == ["b-v2.png", "c-v2.png"]
+  assert max_api.folder_watcher.watched() == []
+
+
+def test_preview_watch_frames_do_not_evict_preview_plans(tmp_path):
+  (tmp_path / "raw_a.png").write_text("a", encoding="utf-8")
+  ops = [{"step": 1, "type": "remove_prefix", "value": "raw"}]
+  plan_id = client.post("/preview", json={"folder": str(tmp_path), "operations": ops}).json()["plan_id"]
+
+  with client.websocket_connect("/preview/watch") as ws:
+    ws.send_json({"folder": str(tmp_path), "operations": ops})
+    frames = [ws.receive_json()]
+    for i in range(max_api.MAX_STORED_PLANS + 2):
+      ws.send_json({"operations": ops + [{"step": 2, "type": "add_suffix", "value": f"v{i}"}]})
+      frames.append(ws.receive_json())
+
+  assert max_api.plan_store.get(plan_id) is not None
+  assert all(max_api.watch_plan_store.get(frame["plan_id"]) is None for frame in frames[:-1])
+  resp = client.post("/run", json={"folder": str(tmp_path), "plan_id": plan_id})
+  assert resp.status_code == 200, resp.text
+  assert [p.name for p in tmp_path.glob("*.png")] == ["a.png"]
+
+
+def test_preview_watch_rejects_missing_folder(tmp_path):
+  with client.websocket_connect("/preview/watch") as ws:
+    ws.send_json({"folder": str(tmp_path / "missing"), "operations": []})
+    assert ws.receive_json()["type"] == "error"
+
+
+def test_caption_search_and_indexed_load(tmp_path):
+  base = tmp_path / "captions"
+  base.mkdir()
+  (base / "a.txt").write_text("red fox", encoding="utf-8")
+  (base / "b.txt").write_text("blue bird", encoding="utf-8")
+
+  resp = client.post("/dataset/captions/search", json={"folder": str(base), "query": "fox"})
+  assert resp.status_code == 200, resp.text
+  assert resp.json()["count"] == 1
+  assert resp.json()["rows"][0]["caption"] == "red fox"
+  assert (base / "__index" / "captions.sqlite3").exists()
+
+  loaded = client.post("/dataset/captions/load", json={"folder": str(base), "use_index": True}).json()
+  assert loaded == client.post("/dataset/captions/load", json={"folder": str(base)}).json()
+
+  (base / "c.txt").write_text("red car", encoding="utf-8")
+  stats = client.post("/dataset/captions/index", json={"folder": str(base)}).json()
+  assert (stats["added"], stats["count"]) == (1, 3)
+  assert client.post("/dataset/captions/search", json={"folder": str(base), "query": "red"}).json()["count"] == 2
+  assert client.post("/dataset/captions/search", json={"folder": str(base), "query": " "}).status_code == 400
+  preview = client.post("/preview", json={"folder": str(base), "operations": [], "recursive": True}).json()
+  assert all(not row["original"].startswith("__index/") for row in preview["files"])
+
+
+def test_caption_page_endpoint(tmp_path):
+  base = tmp_path / "captions"
+  base.mkdir()
+  for i in range(5):
+    (base / f"cap_{i}.txt").write_text("" if i == 2 else f"caption {i}", encoding="utf-8")
+
+  body = {"folder": str(base), "limit": 2, "empty": False}
+  first = client.post("/dataset/captions/page", json=body).json()
+  assert first["total"] == 4
+  assert [row["id"] for row in first["rows"]] == ["cap_0.txt", "cap_1.txt"]
+  second = client.post("/dataset/captions/page", json={**body, "cursor": first["next_cursor"]}).json()
+  assert [row["id"] for row in second["rows"]] == ["cap_3.txt", "cap_4.txt"]
+  assert second["next_cursor"] is None
+
+  bad = client.post("/dataset/captions/page", json={**body, "cursor": first["next_cursor"], "sort": "length"})
+  assert bad.status_code == 400
+  missing = client.post("/dataset/captions/page", json={"folder": str(tmp_path / "missing")})
+  assert missing.status_code == 404
+
+
+def test_caption_snapshot_restore_subset(tmp_path):
+  base = tmp_path / "captions"
+  base.mkdir()
+  for name in ("a.txt", "b.txt", "c.txt"):
+    (base / name).write_text(name[0], encoding="utf-8")
+  result = max_api.run_caption_prefix_suffix(
+    str(base), [], False, "", "", False, False, [{"step": 1, "type": "add_suffix", "value": "v2"}]
+  )
+
+  body = {"folder": str(base), "snapshot_id": result["snapshot_id"], "mode": "before"}
+  partial = client.post("/dataset/captions/snapshot/restore", json={**body, "files": ["a.txt"], "pattern": "c*"})
+  assert partial.json() == {"restored": 2, "skipped": 0, "errors": []}
+  assert (base / "b.txt").read_text(encoding="utf-8") == "b-v2"
+  full = client.post("/dataset/captions/snapshot/restore", json=body)
+  assert full.json() == {"restored": 1, "skipped": 2, "errors": []}
+  missing = client.post("/dataset/captions/snapshot/restore", json={**body, "snapshot_id": "nope"})
+  assert missing.status_code == 404
+
+
+def test_caption_snapshot_catalog_and_retention(tmp_path):
+  base = tmp_path / "captions"
+  base.mkdir()
+  (base / "a.txt").write_text("a", encoding="utf-8")
+  ids = []
+  for value in ("one", "two", "three"):
+    result = max_api.run_caption_prefix_suffix(
+      str(base), [], False, "", "", False, False, [{"step": 1, "type": "add_suffix", "value": value}]
+    )
+    ids.append(result["snapshot_id"])
+
+  listed = client.post("/dataset/captions/snapshot/list", json={"folder": str(base)}).json()
+  assert [row["snapshot_id"] for row in listed["snapshots"]] == ids[::-1]
+  assert all(row["files"] == 1 and row["bytes"] > 0 for row in listed["snapshots"])
+  assert listed["total_bytes"] >= sum(row["bytes"] for row in listed["snapshots"])
+  assert listed["retention"]["keep_last"] == max_api.RetentionPolicy().keep_last
+
+  pruned = client.post("/dataset/captions/snapshot/retention", json={"folder": str(base), "keep_last": 2}).json()
+  assert pruned["removed"] == ids[:1] and pruned["freed_bytes"] > 0
+  assert pruned["retention"] == {"keep_last": 2, "max_bytes": None, "max_age_days": None}
+  listed = client.post("/dataset/captions/snapshot/list", json={"folder": str(base)}).json()
+  assert [row["snapshot_id"] for row in listed["snapshots"]] == ids[:0:-1]
+  assert listed["retention"]["keep_last"] == 2
+
+  bad = client.post("/dataset/captions/snapshot/retention", json={"folder": str(base), "keep_last": 0})
+  assert bad.status_code == 422
+  missing = client.post("/dataset/captions/snapshot/list", json={"folder": str(tmp_path / "missing")})
+  assert missing.status_code == 404
+
+
+def test_dataset_report_download(tmp_path):
+  import csv
+  import gzip
+  import io
+
+  base = tmp_path / "captions"
+  base.mkdir()
+  for name in ("a.txt", "b.txt"):
+    (base / name).write_text(name[0], encoding="utf-8")
+  body = {"folder": str(base), "dry_run": True, "entries": [], "prefix": "p_", "compress_report": True}
+  run = client.post("/dataset/captions/run", json=body).json()
+  report_id = run["report_id"]
+  assert report_id.endswith(".csv.gz")
+  assert Path(run["csv_path"]) == base / "__reports" / report_id
+
+  resp = client.get(f"/dataset/reports/{report_id}", params={"folder": str(base)})
+  assert resp.status_code == 200
+  assert resp.headers["content-type"] == "application/gzip"
+  rows = list(csv.reader(io.StringIO(gzip.decompress(resp.content).decode("utf-8"))))
+  assert rows == [
+    ["relative_path", "action", "old_head", "new_head"],
+    ["a.txt", "changed", "a", "p_a"],
+    ["b.txt", "changed", "b", "p_b"],
+  ]
+
+  blank = client.post("/dataset/captions/make_blank", json={"folder": str(base), "dry_run": True}).json()
+  plain = client.get(f"/dataset/reports/{blank['report_id']}", params={"folder": str(base)})
+  assert plain.text.splitlines() == ["relative_image_path,action"]
+  assert client.get("/dataset/reports/..%2Fa.txt", params={"folder": str(base)}).status_code == 404
+  assert client.get("/dataset/reports/nope.csv", params={"folder": str(base)}).status_code == 404
+
+
+def test_indexed_load_concurrent_requests(tmp_path, monkeypatch):
+  import caption_index
+  from concurrent.futures import ThreadPoolExecutor
+
+  base = tmp_path / "captions"
+  (base / "sub").mkdir(parents=True)
+  for i in range(40):
+    (base / ("sub" if i % 2 else "") / f"cap_{i:02d}.txt").write_text(f"caption {i}", encoding="utf-8")
+  # many batches and many chunks, so each response resumes on several threads
+  monkeypatch.setattr(caption_index, "ROWS_BATCH", 3)
+  monkeypatch.setattr(max_api, "STREAM_CHUNK_LINES", 2)
+  expected = client.post("/dataset/captions/load", json={"folder": str(base), "recursive": True}).json()
+  assert expected["count"] == 40
+
+  def load(_):
+    return client.post("/dataset/captions/load", json={"folder": str(base), "recursive": True, "use_index": True})
+
+  with ThreadPoolExecutor(max_workers=16) as pool:
+    responses = list(pool.map(load, range(16)))
+  assert all(resp.status_code == 200 for resp in responses)
+  assert all(resp.json() == expected for resp in responses)
+  top = client.post("/dataset/captions/load", json={"folder": str(base), "use_index": True}).json()
+  assert [row["id"] for row in top["rows"]] == [f"cap_{i:02d}.txt" for i in range(0, 40, 2)]
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import caption_index  # noqa: E402
+from caption_index import RACY_MTIME, CaptionIndex  # noqa: E402
+
+
+def write(base: Path, rel: str, text: str, age_s: float = 10.0) -> Path:
+    path = base / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    # age files past the racy window unless a test wants a fresh one
+    stamp = time.time() - age_s
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def dataset(tmp_path: Path) -> Path:
+    base = tmp_path / "set"
+    write(base, "a.txt", "a red fox in snow")
+    write(base, "b.txt", "a blue bird")
+    write(base, "sub/c.txt", "red car at night")
+    write(base, "__undo/20240101_000000/before/a.txt", "snapshot copy red")
+    write(base, "img.png", "not a caption")
+    return base
+
+
+def test_refresh_reads_only_changed_files(tmp_path, monkeypatch):
+    base = dataset(tmp_path)
+    index = CaptionIndex(str(base))
+    stats = index.refresh()
+    assert (stats.count, stats.added, stats.updated, stats.removed) == (3, 3, 0, 0)
+    assert [row["id"] for row in index.rows()] == ["a.txt", "b.txt", "sub/c.txt"]
+
+    reads = []
+    real_read = caption_index.read_captions
+
+    def counting(base_path, ids, workers, batch_size):
+        reads.extend(ids)
+        return real_read(base_path, ids, workers, batch_size)
+
+    monkeypatch.setattr(caption_index, "read_captions", counting)
+    write(base, "b.txt", "a blue bird singing")
+    write(base, "d.txt", "green field")
+    (base / "sub" / "c.txt").unlink()
+    stats = index.refresh()
+    assert sorted(reads) == ["b.txt", "d.txt"]
+    assert (stats.added, stats.updated, stats.removed, stats.unchanged) == (1, 1, 1, 1)
+    assert {row["id"]: row["caption"] for row in index.rows()}["b.txt"] == "a blue bird singing"
+
+    reads.clear()
+    assert index.refresh().unchanged == 3 and reads == []
+
+
+def test_non_recursive_refresh_keeps_subfolder_rows(tmp_path):
+    base = dataset(tmp_path)
+    index = CaptionIndex(str(base))
+    index.refresh()
+    stats = index.refresh(recursive=False)
+    assert (stats.count, stats.removed) == (2, 0)
+    assert index.count() == 3 and index.count(recursive=False) == 2
+
+
+def test_recently_modified_files_are_reread(tmp_path):
+    base = dataset(tmp_path)
+    write(base, "fresh.txt", "new", age_s=0)
+    index = CaptionIndex(str(base))
+    index.refresh()
+    conn = index._connect()
+    assert conn.execute("SELECT mtime_ns FROM captions WHERE id = 'fresh.txt'").fetchone()[0] == RACY_MTIME
+    conn.close()
+    assert index.refresh().updated == 1
+
+
+def test_search_matches_word_prefixes_and_ranks(tmp_path):
+    base = dataset(tmp_path)
+    index = CaptionIndex(str(base))
+    index.refresh()
+    assert index.full_text
+    total, rows = index.search("red")
+    assert total == 2
+    assert {row["id"] for row in rows} == {"a.txt", "sub/c.txt"}
+    assert index.search("red", recursive=False)[0] == 1
+    assert index.search("bir")[1][0]["id"] == "b.txt"
+    assert index.search('"fox AND) NEAR(')[0] == 0
+    assert index.search("red", limit=1)[0] == 2 and len(index.search("red", limit=1)[1]) == 1
+    with pytest.raises(ValueError):
+        index.search("   ")
+
+
+def test_search_falls_back_to_like_without_fts5(tmp_path, monkeypatch):
+    monkeypatch.setattr(caption_index, "_FTS_SCHEMA", "CREATE VIRTUAL TABLE captions_fts USING no_such_module(text);")
+    base = dataset(tmp_path)
+    index = CaptionIndex(str(base))
+    index.refresh()
+    assert not index.full_text
+    total, rows = index.search("ed ca")
+    assert total == 1 and rows[0]["id"] == "sub/c.txt"
+    assert index.search("100%")[0] == 0
+
+
+def test_small_refresh_updates_full_text_rows_in_place(tmp_path):
+    base = dataset(tmp_path)
+    for i in range(20):
+        write(base, f"extra/{i:02d}.txt", f"filler caption {i}")
+    index = CaptionIndex(str(base))
+    index.refresh()
+    write(base, "a.txt", "a grey wolf in snow")
+    (base / "b.txt").unlink()
+    stats = index.refresh()
+    assert (stats.updated, stats.removed) == (1, 1)
+    assert index.search("fox")[0] == 0
+    assert index.search("bird")[0] == 0
+    assert index.search("wolf")[1][0]["id"] == "a.txt"
+    assert index.search("filler")[0] == 20
+
+
+def all_pages(index, **kwargs):
+    rows, cursor = [], None
+    while True:
+        total, page, cursor = index.page(limit=3, cursor=cursor, **kwargs)
+        rows.extend(page)
+        if cursor is None:
+            return total, rows
+
+
+def test_pages_cover_every_row_once_in_sort_order(tmp_path):
+    base = dataset(tmp_path)
+    for i in range(10):
+        write(base, f"sub/z{i}.txt", "x" * (i % 4))
+    write(base, "blank.txt", " \n")
+    index = CaptionIndex(str(base))
+    index.refresh()
+    total, rows = all_pages(index)
+    assert total == len(rows) == index.count()
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+    _, by_length = all_pages(index, sort="length", descending=True)
+    keys = [(len(row["caption"]), row["id"]) for row in by_length]
+    assert keys == sorted(keys, reverse=True)
+    _, by_name = all_pages(index, sort="filename")
+    assert [row["filename"] for row in by_name] == sorted(row["filename"] for row in by_name)
+
+
+def test_page_filters_and_cursor_checks(tmp_path):
+    base = dataset(tmp_path)
+    write(base, "blank.txt", " \n")
+    write(base, "sub/deep/e.txt", "")
+    write(base, "subway.txt", "RED train")
+    index = CaptionIndex(str(base))
+    index.refresh()
+    assert {r["id"] for r in all_pages(index, empty=True)[1]} == {"blank.txt", "sub/deep/e.txt"}
+    assert all(r["caption"].strip() for r in all_pages(index, empty=False)[1])
+    assert {r["id"] for r in all_pages(index, contains="red")[1]} == {"a.txt", "sub/c.txt", "subway.txt"}
+    assert {r["id"] for r in all_pages(index, subfolder="sub")[1]} == {"sub/c.txt", "sub/deep/e.txt"}
+    assert all("/" not in r["id"] for r in all_pages(index, recursive=False)[1])
+    assert index.page(contains="50%")[0] == 0
+
+    _, _, cursor = index.page(limit=1)
+    with pytest.raises(ValueError):
+        index.page(cursor=cursor, sort="length")
+    with pytest.raises(ValueError):
+        index.page(cursor="not-a-cursor")
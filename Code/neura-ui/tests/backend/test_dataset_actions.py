@@ -1,6 +1,7 @@
 import importlib.util
 import json
 import sys
+from dataclasses import replace
 from pathlib import Path
 
 import pytest
@@ -11,6 +12,8 @@ CODE_DIR = REPO_ROOT / "Code"
 if str(CODE_DIR) not in sys.path:
     sys.path.insert(0, str(CODE_DIR))
 
+from fs_paths import STRATEGIES  # noqa: E402
+
 core_spec = importlib.util.spec_from_file_location("dataset_core", CODE_DIR / "dataset_actions_core.py")
 dataset_core = importlib.util.module_from_spec(core_spec)
 sys.modules["dataset_core"] = dataset_core
@@ -121,6 +124,79 @@ def test_run_caption_prefix_suffix_dry_run_only_reports(tmp_path: Path):
     assert not (base / "__backup_prefix_suffix").exists()
 
 
+def test_run_uses_entry_caption_and_reads_each_file_once(tmp_path: Path, monkeypatch):
+    base = tmp_path / "dataset"
+    caption = make_caption(base, "alpha.txt", "on disk")
+    reads = []
+    real_read = dataset_core._read_caption_once
+
+    def counting(p):
+        reads.append(p)
+        return real_read(p)
+
+    monkeypatch.setattr(dataset_core, "_read_caption_once", counting)
+    result = run_caption_prefix_suffix(
+        folder=str(base),
+        entries=[{"id": "alpha", "path": str(caption), "filename": "alpha.txt", "caption": "edited"}],
+        recursive=False,
+        prefix="",
+        suffix="",
+        dry_run=False,
+        make_backup=True,
+        operations=[{"step": 1, "type": "add_prefix", "value": "mix"}],
+    )
+    assert reads == [caption]
+    assert caption.read_text(encoding="utf-8") == "mix-edited"
+    assert (base / "__backup_prefix_suffix" / "alpha.txt.bak").read_text(encoding="utf-8") == "on disk"
+    assert result["summary"] == {"changed": 1, "skipped": 0, "backups": 1}
+
+
+def test_parallel_run_keeps_log_and_csv_order(tmp_path: Path, monkeypatch):
+    def run(folder: Path, workers: int):
+        for i in range(60):
+            make_caption(folder, f"sub{i % 3}/cap_{i:03d}.txt", "keep" if i % 5 == 0 else f"text {i}")
+        return run_caption_prefix_suffix(
+            folder=str(folder),
+            entries=[],
+            recursive=True,
+            prefix="",
+            suffix="",
+            dry_run=False,
+            make_backup=True,
+            operations=[{"step": 1, "type": "remove_prefix", "value": "text"}],
+            workers=workers,
+        )
+
+    real_write = dataset_core._write_text_safe
+
+    def flaky_write(p: Path, text: str) -> None:
+        if p.name in {"cap_007.txt", "cap_031.txt"}:
+            raise OSError("disk full")
+        real_write(p, text)
+
+    monkeypatch.setattr(dataset_core, "_write_text_safe", flaky_write)
+    serial = run(tmp_path / "serial", 1)
+    parallel = run(tmp_path / "parallel", 8)
+
+    def strip_paths(log):
+        return [line.replace(str(tmp_path / "serial"), "").replace(str(tmp_path / "parallel"), "") for line in log]
+
+    assert strip_paths(parallel["log"]) == strip_paths(serial["log"])
+    errors = [line for line in parallel["log"] if line.startswith("[ERROR]")]
+    assert [line.split(": ")[0] for line in errors] == [
+        f"[ERROR] {tmp_path / 'parallel' / 'sub1' / 'cap_007.txt'}",
+        f"[ERROR] {tmp_path / 'parallel' / 'sub1' / 'cap_031.txt'}",
+    ]
+    assert parallel["summary"] == serial["summary"] == {"changed": 46, "skipped": 12, "backups": 48}
+    # each run writes its report into its own dataset's __reports
+    serial_rows = next((tmp_path / "serial" / "__reports").glob("*.csv")).read_text(encoding="utf-8").splitlines()
+    parallel_rows = next((tmp_path / "parallel" / "__reports").glob("*.csv")).read_text(encoding="utf-8").splitlines()
+    assert parallel_rows == serial_rows
+    rels = [row.split(",")[0] for row in parallel_rows[1:]]
+    assert rels == sorted(rels)
+    assert (tmp_path / "parallel" / "sub0/cap_003.txt").read_text(encoding="utf-8") == " 3"
+
+
 def test_copy_and_blank_caption_flows(tmp_path: Path):
     src = tmp_path / "src"
     dest = tmp_path / "dest"
@@ -178,6 +254,38 @@ def test_load_caption_rows_missing_folder(tmp_path: Path):
         load_caption_rows(str(tmp_path / "missing"), recursive=False)
 
 
+def test_load_caption_rows_parallel_keeps_sorted_order(tmp_path: Path, monkeypatch):
+    strategy = replace(STRATEGIES["drvfs"], batch_size=16, read_ahead=1)
+    monkeypatch.setattr(dataset_core, "io_strategy", lambda path: strategy)
+    base = tmp_path / "captions"
+    count = strategy.batch_size * 3 + 7
+    for i in reversed(range(count)):
+        make_caption(base, f"sub{i % 3}/cap_{i:05d}.txt", f"caption {i}")
+    serial = load_caption_rows(str(base), recursive=True, workers=1)
+    parallel = load_caption_rows(str(base), recursive=True, workers=4)
+    assert parallel == serial
+    assert parallel["count"] == count
+    ids = [row["id"] for row in parallel["rows"]]
+    assert ids == sorted(ids)
+
+
+def test_load_endpoint_streams_the_load_response(tmp_path: Path):
+    base = tmp_path / "captions"
+    for i in range(max_api.STREAM_CHUNK_LINES + 5):
+        make_caption(base, f"cap_{i:05d}.txt", f"caption \"{i}\"")
+    resp = client.post("/dataset/captions/load", json={"folder": str(base)})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data == load_caption_rows(str(base), recursive=False)
+    assert max_api.CaptionLoadResponse(**data).count == max_api.STREAM_CHUNK_LINES + 5
+
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    assert client.post("/dataset/captions/load", json={"folder": str(empty)}).json() == {"count": 0, "rows": []}
+    missing = client.post("/dataset/captions/load", json={"folder": str(tmp_path / "missing")})
+    assert missing.status_code == 404
+
+
 def test_normalize_caption_operations_variants():
     ops = dataset_core._normalize_caption_operations("pre", "suf", None)
     assert ops == [
@@ -256,3 +364,106 @@ def test_caption_apply_helpers_cover_delims():
     assert dataset_core._apply_caption_remove_prefix("foo_bar", "foo") == "bar"
     assert dataset_core._apply_caption_add_suffix("foo", "_tail") == "foo_tail"
     assert dataset_core._apply_caption_remove_suffix("foo-tail", "-tail") == "foo"
+
+
+def _courier_trees(tmp_path: Path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    for name in ("set/a.png", "set/a.jpg", "set/b.PNG", "set/c.webp", "deep/x/d.png", "__reports/e.png"):
+        (dest / name).parent.mkdir(parents=True, exist_ok=True)
+        (dest / name).write_bytes(b"img")
+    captions = {"set/a.txt": "alpha", "set/c.txt": "gamma", "deep/x/d.txt": "delta", "set/zz.txt": "extra"}
+    for name, text in captions.items():
+        make_caption(src, name, text)
+    make_caption(dest, "set/c.txt", "existing")
+    return src, dest
+
+
+def test_copy_plan_is_set_arithmetic_over_both_trees(tmp_path: Path):
+    src, dest = _courier_trees(tmp_path)
+    plan = dataset_core.plan_caption_copy(str(src), str(dest), False)
+    # images under bookkeeping folders are not considered; two images share a.txt
+    assert plan.rows == [
+        ("deep/x/d.png", "copy"),
+        ("set/a.jpg", "copy"),
+        ("set/a.png", "copy"),
+        ("set/b.PNG", "missing_in_src"),
+        ("set/c.webp", "skipped_exist"),
+    ]
+    assert plan.copies == ["deep/x/d.txt", "set/a.txt"]
+    overwrite = dataset_core.plan_caption_copy(str(src), str(dest), True)
+    assert overwrite.copies == ["deep/x/d.txt", "set/a.txt", "set/c.txt"]
+
+    dry = copy_captions(str(src), str(dest), False, True, plan=plan)
+    assert dry["summary"] == {"copied": 3, "skipped_exist": 1, "missing_in_src": 1}
+    assert not (dest / "set/a.txt").exists()
+    assert plan.is_current()
+
+    real = copy_captions(str(src), str(dest), False, False, plan=plan, workers=4)
+    assert real["summary"] == dry["summary"]
+    assert (dest / "set/a.txt").read_text(encoding="utf-8") == "alpha"
+    assert (dest / "deep/x/d.txt").read_text(encoding="utf-8") == "delta"
+    assert (dest / "set/c.txt").read_text(encoding="utf-8") == "existing"
+    assert not plan.is_current()
+
+
+def test_pooled_copies_report_like_one_worker(tmp_path: Path, monkeypatch):
+    real_write = dataset_core._write_text_safe
+
+    def flaky_write(p: Path, text: str) -> None:
+        if p.name == "img_07.txt":
+            raise OSError("disk full")
+        real_write(p, text)
+
+    monkeypatch.setattr(dataset_core, "_write_text_safe", flaky_write)
+    reports = []
+    for workers in (1, 6):
+        src = tmp_path / f"src{workers}"
+        dest = tmp_path / f"dest{workers}"
+        for i in range(20):
+            (dest / f"s{i % 3}").mkdir(parents=True, exist_ok=True)
+            (dest / f"s{i % 3}/img_{i:02d}.png").write_bytes(b"img")
+            if i % 5:
+                make_caption(src, f"s{i % 3}/img_{i:02d}.txt", f"caption {i}")
+        result = copy_captions(str(src), str(dest), False, False, workers=workers)
+        assert result["summary"] == {"copied": 15, "skipped_exist": 0, "missing_in_src": 4}
+        assert result["log"][0].startswith("[ERROR] Copy failed for") and "img_07.txt: disk full" in result["log"][0]
+        reports.append(Path(result["csv_path"]).read_text(encoding="utf-8").splitlines())
+        assert (dest / "s2/img_11.txt").read_text(encoding="utf-8") == "caption 11"
+    assert reports[0] == reports[1]
+    assert "s1/img_07.png,error" in reports[0]
+
+
+def test_copy_endpoint_runs_the_dry_run_plan(tmp_path: Path):
+    src, dest = _courier_trees(tmp_path)
+    body = {"src": str(src), "dest": str(dest)}
+    dry = client.post("/dataset/captions/copy", json=body).json()
+    assert dry["summary"] == {"copied": 3, "skipped_exist": 1, "missing_in_src": 1}
+    plan_id = dry["plan_id"]
+
+    other = {**body, "dry_run": False, "allow_overwrite": True, "plan_id": plan_id}
+    assert client.post("/dataset/captions/copy", json=other).status_code == 409
+    real = client.post("/dataset/captions/copy", json={**body, "dry_run": False, "plan_id": plan_id}).json()
+    assert real["summary"] == dry["summary"] and real["plan_id"] is None
+    assert (dest / "set/a.txt").read_text(encoding="utf-8") == "alpha"
+    again = client.post("/dataset/captions/copy", json={**body, "dry_run": False, "plan_id": plan_id})
+    assert again.status_code == 404
+
+    dry = client.post("/dataset/captions/copy", json=body).json()
+    (dest / "set/f.png").write_bytes(b"img")
+    stale = client.post("/dataset/captions/copy", json={**body, "dry_run": False, "plan_id": dry["plan_id"]})
+    assert stale.status_code == 409
+
+
+def test_copy_endpoint_plan_survives_its_own_dry_run_report(tmp_path: Path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    (dest / "set").mkdir(parents=True)
+    (dest / "set/a.png").write_bytes(b"img")
+    make_caption(src, "set/a.txt", "alpha")
+    body = {"src": str(src), "dest": str(dest)}
+    dry = client.post("/dataset/captions/copy", json=body).json()
+    assert (dest / "__reports").is_dir()
+    real = client.post("/dataset/captions/copy", json={**body, "dry_run": False, "plan_id": dry["plan_id"]})
+    assert real.status_code == 200
+    assert (dest / "set/a.txt").read_text(encoding="utf-8") == "alpha"
@@ -0,0 +1,95 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import folder_index  # noqa: E402
+
+
+def age_folder(folder: Path, seconds: int = 60) -> None:
+    st = folder.stat()
+    os.utime(folder, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_scan_files_skips_directories_and_sorts(tmp_path: Path):
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    assert folder_index.scan_files(str(tmp_path)) == ("a.txt", "b.txt")
+
+
+def test_index_reuses_listing_until_folder_changes(tmp_path: Path):
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    age_folder(tmp_path)
+    index = folder_index.FolderIndex()
+
+    first = index.get(str(tmp_path))
+    second = index.get(str(tmp_path))
+    assert second is first
+    assert (index.hits, index.misses) == (1, 1)
+
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    assert index.list_files(str(tmp_path)) == ("a.txt", "b.txt")
+    assert index.misses == 2
+
+
+def test_index_does_not_cache_recently_modified_folder(tmp_path: Path):
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    index = folder_index.FolderIndex()
+    index.get(str(tmp_path))
+    index.get(str(tmp_path))
+    assert index.hits == 0
+
+
+def test_index_evicts_least_recent_folder(tmp_path: Path):
+    index = folder_index.FolderIndex(max_folders=1)
+    one = tmp_path / "one"
+    two = tmp_path / "two"
+    for folder in (one, two):
+        folder.mkdir()
+        age_folder(folder)
+    index.get(str(one))
+    index.get(str(two))
+    index.get(str(one))
+    assert index.hits == 0
+
+
+def test_index_missing_folder_raises(tmp_path: Path):
+    with pytest.raises(FileNotFoundError):
+        folder_index.FolderIndex().get(str(tmp_path / "nope"))
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    with pytest.raises(FileNotFoundError):
+        folder_index.FolderIndex().get(str(tmp_path / "a.txt"))
+
+
+def test_index_hit_costs_one_stat(tmp_path: Path, monkeypatch):
+    age_folder(tmp_path)
+    index = folder_index.FolderIndex()
+    index.get(str(tmp_path))
+    calls = []
+    real_stat = os.stat
+    monkeypatch.setattr(folder_index.os, "stat", lambda *a, **k: calls.append(a) or real_stat(*a, **k))
+    index.get(str(tmp_path))
+    assert index.hits == 1 and len(calls) == 1
+
+
+def test_walk_lists_tree_level_by_level(tmp_path: Path):
+    for rel in ("root.txt", "b/two.txt", "a/one.txt", "a/deep/three.txt"):
+        target = tmp_path / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(rel, encoding="utf-8")
+    (tmp_path / "link").symlink_to(tmp_path / "a", target_is_directory=True)
+
+    walked = [(rel, listing.files) for rel, listing in folder_index.FolderIndex().walk(str(tmp_path))]
+    assert walked == [
+        ("", ("root.txt",)),
+        ("a", ("one.txt",)),
+        ("b", ("two.txt",)),
+        ("a/deep", ("three.txt",)),
+    ]
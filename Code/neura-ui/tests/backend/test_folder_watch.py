@@ -0,0 +1,89 @@
+import queue
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import folder_watch  # noqa: E402
+from folder_index import folder_index  # noqa: E402
+from folder_watch import FolderWatcher, _load_inotify  # noqa: E402
+
+
+def watch(watcher, folder):
+    changes = queue.Queue()
+    token = watcher.subscribe(str(folder), changes.put)
+    return changes, token
+
+
+@pytest.mark.skipif(_load_inotify() is None, reason="inotify not available")
+def test_inotify_reports_added_and_removed_files_and_updates_listing(tmp_path):
+    (tmp_path / "a.png").write_text("a", encoding="utf-8")
+    (tmp_path / "gone.png").write_text("g", encoding="utf-8")
+    watcher = FolderWatcher(debounce=0.05)
+    changes, token = watch(watcher, tmp_path)
+    try:
+        assert not watcher.is_polled(str(tmp_path))
+        (tmp_path / "b.png").write_text("b", encoding="utf-8")
+        (tmp_path / "gone.png").unlink()
+        (tmp_path / "sub").mkdir()
+        change = changes.get(timeout=5)
+        assert change.added == {"b.png"}
+        assert change.removed == {"gone.png"}
+        assert change.listing.files == ("a.png", "b.png")
+        assert change.listing.dirs == ("sub",)
+        assert folder_index.get(str(tmp_path)).files == ("a.png", "b.png")
+    finally:
+        watcher.unsubscribe(token)
+    assert watcher.watched() == []
+
+
+@pytest.mark.skipif(_load_inotify() is None, reason="inotify not available")
+def test_file_created_before_the_flush_stat_is_in_the_listing(tmp_path, monkeypatch):
+    watcher = FolderWatcher(debounce=0.05)
+    changes, token = watch(watcher, tmp_path)
+    real_fingerprint = folder_watch.folder_fingerprint
+    late = tmp_path / "late.png"
+
+    def fingerprint_after_late_file(folder):
+        # lands after the watcher read its events, just before the stat
+        if not late.exists():
+            late.write_text("late", encoding="utf-8")
+        return real_fingerprint(folder)
+
+    monkeypatch.setattr(folder_watch, "folder_fingerprint", fingerprint_after_late_file)
+    try:
+        (tmp_path / "a.png").write_text("a", encoding="utf-8")
+        change = changes.get(timeout=5)
+        assert change.listing.files == ("a.png", "late.png")
+        assert change.listing.fingerprint == real_fingerprint(str(tmp_path))
+    finally:
+        watcher.unsubscribe(token)
+
+
+def test_polling_fallback_and_folder_removal(tmp_path):
+    folder = tmp_path / "watched"
+    folder.mkdir()
+    (folder / "a.png").write_text("a", encoding="utf-8")
+    watcher = FolderWatcher(debounce=0.05, poll_interval=0.05, use_inotify=False)
+    changes, token = watch(watcher, folder)
+    try:
+        assert watcher.is_polled(str(folder))
+        (folder / "b.png").write_text("b", encoding="utf-8")
+        change = changes.get(timeout=5)
+        assert change.added == {"b.png"} and not change.removed
+
+        for child in folder.iterdir():
+            child.unlink()
+        folder.rmdir()
+        change = changes.get(timeout=5)
+        while not change.gone:
+            change = changes.get(timeout=5)
+        assert change.listing is None
+        assert watcher.watched() == []
+    finally:
+        watcher.unsubscribe(token)
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import fs_paths  # noqa: E402
+
+MOUNTINFO = "\n".join(
+    [
+        "22 1 8:1 / / rw,relatime - ext4 /dev/sda1 rw",
+        "60 22 0:50 / /mnt/c rw,noatime - 9p drvfs rw,aname=drvfs;path=C:\\;uid=1000",
+        "61 22 0:51 / /mnt/nas\\040share rw - cifs //nas/share rw,vers=3.0",
+        "62 61 0:52 / /mnt/nas\\040share/local rw - ext4 /dev/sdb1 rw",
+        "garbage line",
+    ]
+)
+
+
+def table(tmp_path):
+    path = tmp_path / "mountinfo"
+    path.write_text(MOUNTINFO, encoding="utf-8")
+    return fs_paths.MountTable(str(path))
+
+
+def test_parse_mountinfo_unescapes_and_marks_wsl2_drvfs():
+    mounts = fs_paths.parse_mountinfo(MOUNTINFO)
+    assert [(m.mount_point, m.fstype) for m in mounts] == [
+        ("/", "ext4"),
+        ("/mnt/c", "drvfs"),
+        ("/mnt/nas share", "cifs"),
+        ("/mnt/nas share/local", "ext4"),
+    ]
+
+
+def test_strategy_follows_longest_mount_prefix(tmp_path):
+    mounts = table(tmp_path)
+
+    def kind(path):
+        return fs_paths.strategy_for_mount(mounts.mount_for(path)).kind
+
+    assert kind("/mnt/c/Users/me/Pictures") == "drvfs"
+    assert kind("/mnt/cdrom") == "native"
+    assert kind("/mnt/nas share/shots") == "network"
+    assert kind("/mnt/nas share/local/cache") == "native"
+
+
+def test_missing_mountinfo_falls_back_to_native(tmp_path):
+    mounts = fs_paths.MountTable(str(tmp_path / "absent"))
+    assert mounts.mount_for("/anything") is None
+    assert fs_paths.strategy_for_mount(None) is fs_paths.STRATEGIES["native"]
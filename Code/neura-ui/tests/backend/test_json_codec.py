@@ -0,0 +1,18 @@
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import json_codec  # noqa: E402
+
+
+def test_dumps_falls_back_for_undecodable_file_names():
+    name = b"caf\xe9.png".decode("utf-8", "surrogateescape")
+    payload = json_codec.mapping_payload("columns", [name], {name: name}, {"summary": {"renamed": 0}})
+    decoded = json.loads(json_codec.dumps(payload))
+    assert decoded["original"] == [name]
+    assert decoded["summary"] == {"renamed": 0}
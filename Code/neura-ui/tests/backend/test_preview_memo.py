@@ -0,0 +1,66 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+spec = importlib.util.spec_from_file_location("max_api", CODE_DIR / "Option_C-Max-API.py")
+max_api = importlib.util.module_from_spec(spec)
+sys.modules["max_api"] = max_api
+spec.loader.exec_module(max_api)  # type: ignore
+
+from preview_memo import PreviewMemo  # noqa: E402
+from rename_core import RenamePlan  # noqa: E402
+
+
+def plan(*steps):
+    return RenamePlan([max_api.Operation(step=i + 1, type=t, value=v) for i, (t, v) in enumerate(steps)])
+
+
+def listing_of(tmp_path, names):
+    for name in names:
+        (tmp_path / name).write_text(name, encoding="utf-8")
+    return max_api.folder_index.get(str(tmp_path))
+
+
+def test_later_step_change_starts_from_cached_column(tmp_path):
+    listing = listing_of(tmp_path, ["raw_a.png", "raw_b.png", "c.png"])
+    memo = PreviewMemo()
+    columns = memo.columns_for(str(tmp_path), listing)
+    fixed = [("remove_prefix", "raw"), ("add_prefix", "p")]
+
+    columns.resolve(plan(*fixed, ("add_suffix", "v1")))
+    assert (columns.steps_reused, columns.steps_applied) == (0, 3)
+    result = columns.resolve(plan(*fixed, ("add_suffix", "v2")))
+    assert (columns.steps_reused, columns.steps_applied) == (2, 4)
+    assert result.new_names == [plan(*fixed, ("add_suffix", "v2")).candidate(n) for n in listing.files]
+
+
+def test_memo_matches_plain_preview_with_collisions(tmp_path):
+    listing = listing_of(tmp_path, ["a.png", "wip-a.png", "tmp-a.png", "a_1.png", "b.png"])
+    memo = PreviewMemo()
+    columns = memo.columns_for(str(tmp_path), listing)
+    for steps in (
+        [("remove_prefix", "wip")],
+        [("remove_prefix", "wip"), ("remove_prefix", "tmp")],
+        [("remove_prefix", "wip"), ("remove_prefix", "tmp"), ("add_suffix", "x")],
+        [("remove_prefix", "wip"), ("remove_prefix", "tmp")],
+    ):
+        summary = max_api.Summary(renamed=0, unchanged=0, collisions=0)
+        expected = dict(max_api.iter_new_names(listing.files, plan(*steps), summary))
+        result = columns.resolve(plan(*steps))
+        assert dict(zip(listing.files, result.new_names)) == expected
+        assert (result.renamed, result.collisions) == (summary.renamed, summary.collisions)
+
+
+def test_changed_listing_rebuilds_columns(tmp_path):
+    listing = listing_of(tmp_path, ["a.png"])
+    memo = PreviewMemo()
+    first = memo.columns_for(str(tmp_path), listing)
+    assert memo.columns_for(str(tmp_path), listing) is first
+    max_api.folder_index.invalidate(str(tmp_path))
+    changed = listing_of(tmp_path, ["b.png"])
+    assert memo.columns_for(str(tmp_path), changed) is not first
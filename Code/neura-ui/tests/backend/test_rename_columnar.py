@@ -0,0 +1,80 @@
+import importlib.util
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+spec = importlib.util.spec_from_file_location("max_api", CODE_DIR / "Option_C-Max-API.py")
+max_api = importlib.util.module_from_spec(spec)
+sys.modules["max_api"] = max_api
+spec.loader.exec_module(max_api)  # type: ignore
+
+import rename_columnar  # noqa: E402
+
+pytestmark = pytest.mark.skipif(
+    not rename_columnar.columnar_available(), reason="columnar engine needs numpy>=2.3"
+)
+
+ALPHABET = ["a", "b", "_", "-", ".", ",", "x", "v1", "é", "shot"]
+OP_TYPES = ["add_prefix", "remove_prefix", "add_suffix", "remove_suffix"]
+
+
+def reference(names, plan):
+    summary = max_api.Summary(renamed=0, unchanged=0, collisions=0)
+    collided = set()
+    new_names = [new for _, new in max_api.iter_new_names(names, plan, summary, collided)]
+    return new_names, summary.renamed, summary.collisions, collided
+
+
+def test_columnar_matches_python_engine_on_random_folders():
+    rng = random.Random(11)
+    for _ in range(1500):
+        names = sorted(
+            {
+                "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 6)))
+                + rng.choice(["", ".exr", ".txt", "."])
+                for _ in range(rng.randint(1, 40))
+            }
+            - {""}
+        )
+        ops = [
+            max_api.Operation(
+                step=rng.randint(1, 4),
+                type=rng.choice(OP_TYPES),
+                value="".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 3))),
+            )
+            for _ in range(rng.randint(0, 4))
+        ]
+        plan = max_api.RenamePlan(ops)
+        result = rename_columnar.resolve_columnar(names, plan)
+        assert (result.new_names, result.renamed, result.collisions, result.collided) == reference(names, plan)
+
+
+def test_columnar_falls_back_when_suffix_takes_another_candidate():
+    names = ["x.exr", "x_1_v.exr", "x_v.exr"]
+    plan = max_api.RenamePlan([max_api.Operation(step=1, type="remove_suffix", value="_v")])
+    result = rename_columnar.resolve_columnar(names, plan)
+    assert result.new_names == ["x.exr", "x_1.exr", "x_2.exr"]
+    assert (result.new_names, result.renamed, result.collisions, result.collided) == reference(names, plan)
+
+
+def test_preview_with_columnar_engine_matches_python(tmp_path, monkeypatch):
+    monkeypatch.setattr(max_api, "MIN_COLUMNAR_NAMES", 1)
+    for i in range(30):
+        (tmp_path / f"shot_{i % 7}{'_v2' if i % 2 else ''}_{i // 7}.exr").write_text("x", encoding="utf-8")
+    ops = [
+        max_api.Operation(step=1, type="remove_suffix", value="_v2_1"),
+        max_api.Operation(step=2, type="add_prefix", value="proj"),
+    ]
+    python = max_api.preview(max_api.PreviewRequest(folder=str(tmp_path), operations=ops))
+    columnar = max_api.preview(
+        max_api.PreviewRequest(folder=str(tmp_path), operations=ops, engine="columnar")
+    )
+    assert columnar.files == python.files
+    assert columnar.summary == python.summary
@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import rename_executor  # noqa: E402
+
+
+def steps(chain):
+    return [(step.src, step.dst) for step in chain]
+
+
+def test_plan_chains_orders_dependent_renames_first():
+    chains = rename_executor.plan_chains([("a", "b"), ("b", "c"), ("x", "y")])
+    assert sorted(steps(c) for c in chains) == [[("b", "c"), ("a", "b")], [("x", "y")]]
+
+
+def test_plan_chains_breaks_cycles_with_one_temp_hop():
+    chains = rename_executor.plan_chains([("a", "b"), ("b", "c"), ("c", "a"), ("x", "y")])
+    assert steps(chains[0]) == [("x", "y")]
+    cycle = steps(chains[1])
+    temp = cycle[0][1]
+    assert temp.startswith(rename_executor.TEMP_PREFIX)
+    assert cycle == [("a", temp), ("c", "a"), ("b", "c"), (temp, "b")]
+
+
+def test_execute_renames_swaps_and_rotates(tmp_path: Path):
+    for name in ("a", "b", "c", "p", "q"):
+        (tmp_path / name).write_text(name, encoding="utf-8")
+    pairs = [("a", "b"), ("b", "c"), ("c", "a"), ("p", "q"), ("q", "p")]
+    results = rename_executor.execute_renames(str(tmp_path), pairs)
+    assert all(r.ok for r in results)
+    assert [(r.src, r.dst) for r in results] == pairs
+    contents = {p.name: p.read_text(encoding="utf-8") for p in tmp_path.iterdir()}
+    assert contents == {"a": "c", "b": "a", "c": "b", "p": "q", "q": "p"}
+
+
+def test_execute_renames_refuses_to_overwrite_occupied_target(tmp_path: Path):
+    (tmp_path / "a").write_text("a", encoding="utf-8")
+    (tmp_path / "b").write_text("b", encoding="utf-8")
+    results = rename_executor.execute_renames(str(tmp_path), [("a", "b")], occupied={"a", "b"})
+    assert results[0].error.startswith("target exists")
+    assert (tmp_path / "b").read_text(encoding="utf-8") == "b"
+
+
+def test_execute_renames_parallel_respects_chains(tmp_path: Path):
+    pairs = [(f"f{i}.txt", f"g{i}.txt") for i in range(40)]
+    pairs += [("a.txt", "b.txt"), ("b.txt", "c.txt")]
+    for src, _ in pairs:
+        (tmp_path / src).write_text(src, encoding="utf-8")
+
+    results = rename_executor.execute_renames(str(tmp_path), pairs, workers=4)
+    assert [(r.src, r.dst) for r in results] == pairs
+    assert all(r.ok for r in results)
+    assert (tmp_path / "c.txt").read_text(encoding="utf-8") == "b.txt"
+    assert (tmp_path / "b.txt").read_text(encoding="utf-8") == "a.txt"
+    assert (tmp_path / "g39.txt").exists()
+
+
+def test_execute_renames_reports_errors_and_skips_blocked_chain(tmp_path: Path):
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    results = rename_executor.execute_renames(
+        str(tmp_path),
+        [("a.txt", "b.txt"), ("b.txt", "c.txt"), ("x.txt", "y.txt")],
+    )
+    errors = {r.src: r.error for r in results}
+    assert errors["b.txt"]
+    assert errors["a.txt"].startswith("skipped:")
+    assert errors["x.txt"]
+    assert (tmp_path / "a.txt").exists()
+
+
+def test_execute_renames_uses_pool_threads():
+    seen = set()
+    lock = threading.Lock()
+
+    def fake_rename(src, dst):
+        with lock:
+            seen.add(threading.get_ident())
+
+    pairs = [(f"s{i}", f"d{i}") for i in range(64)]
+    results = rename_executor.execute_renames("/nowhere", pairs, workers=4, rename_fn=fake_rename)
+    assert all(r.ok for r in results)
+    assert threading.get_ident() not in seen
+
+
+def test_execute_renames_skips_remaining_chains_once_stopped(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text(name)
+    calls = []
+
+    def rename_fn(src, dst):
+        calls.append(src)
+        os.rename(src, dst)
+
+    results = rename_executor.execute_renames(
+        str(tmp_path),
+        [("a", "a2"), ("b", "b2"), ("c", "c2")],
+        workers=1,
+        rename_fn=rename_fn,
+        should_stop=lambda: len(calls) >= 1,
+    )
+    assert [r.error for r in results] == [None, rename_executor.CANCELLED, rename_executor.CANCELLED]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a2", "b", "c"]
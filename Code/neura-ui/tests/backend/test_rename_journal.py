@@ -0,0 +1,75 @@
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import rename_executor  # noqa: E402
+import rename_journal  # noqa: E402
+
+
+def names(folder):
+    return {p.name: p.read_text() for p in folder.iterdir() if p.is_file()}
+
+
+def crash_after(folder, chains, steps_run, recorded=0):
+    """Write the plan, run the first `steps_run` steps of each chain, record only `recorded` of them."""
+    journal = rename_journal.RenameJournal.create(str(folder), chains)
+    for c, chain in enumerate(chains):
+        for seq, step in enumerate(chain[:steps_run]):
+            os.rename(folder / step.src, folder / step.dst)
+            if seq < recorded:
+                journal.step_done(c, seq, step)
+    journal._sync()
+    journal._fh.close()
+    return rename_journal.read_journal(str(folder), journal.journal_id)
+
+
+def test_resume_points_find_unrecorded_steps_from_disk(tmp_path):
+    for name in ("a", "b", "x"):
+        (tmp_path / name).write_text(name)
+    chains = rename_executor.plan_chains([("a", "b"), ("b", "c"), ("x", "y")])
+    state = crash_after(tmp_path, chains, steps_run=1)
+    assert state.status == "running"
+    assert state.recorded == [0, 0]
+    assert rename_journal.resume_points(state) == [1, 1]
+
+    rename_executor.execute_chains(str(tmp_path), state.chains, rename_journal.resume_points(state))
+    assert names(tmp_path) == {"b": "a", "c": "b", "y": "x"}
+
+
+def test_interrupted_cycle_resumes_from_synced_temp_hop(tmp_path):
+    for name in ("a", "b", "c"):
+        (tmp_path / name).write_text(name)
+    chains = rename_executor.plan_chains([("a", "b"), ("b", "c"), ("c", "a")])
+    state = crash_after(tmp_path, chains, steps_run=2, recorded=1)
+    assert rename_journal.resume_points(state) == [2]
+
+    rename_executor.execute_chains(str(tmp_path), state.chains, [2])
+    assert names(tmp_path) == {"b": "a", "c": "b", "a": "c"}
+
+
+def test_undo_pairs_move_files_back_including_parked_temp(tmp_path):
+    for name in ("a", "b"):
+        (tmp_path / name).write_text(name)
+    chains = rename_executor.plan_chains([("a", "b"), ("b", "a")])
+    state = crash_after(tmp_path, chains, steps_run=2, recorded=1)
+    pairs = rename_journal.undo_pairs(state, rename_journal.resume_points(state))
+
+    rename_executor.execute_renames(str(tmp_path), pairs)
+    assert names(tmp_path) == {"a": "a", "b": "b"}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    (tmp_path / "a").write_text("a")
+    chains = rename_executor.plan_chains([("a", "b")])
+    state = crash_after(tmp_path, chains, steps_run=1, recorded=1)
+    path = Path(rename_journal.journal_dir(str(tmp_path))) / f"{state.journal_id}.jsonl"
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"op": "end", "sta')
+    reread = rename_journal.read_journal(str(tmp_path), state.journal_id)
+    assert reread.status == "running"
+    assert reread.recorded == [1]
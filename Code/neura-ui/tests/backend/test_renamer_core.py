@@ -85,3 +85,146 @@ def test_compute_new_names_missing_folder_raises(tmp_path: Path):
     missing = tmp_path / "nope"
     with pytest.raises(FileNotFoundError):
         max_api.compute_new_names(str(missing), [])
+
+
+def _apply_chain(fname, ops):
+    base, ext = os.path.splitext(fname)
+    helpers = {
+        "add_prefix": max_api.apply_add_prefix,
+        "remove_prefix": max_api.apply_remove_prefix,
+        "add_suffix": max_api.apply_add_suffix,
+        "remove_suffix": max_api.apply_remove_suffix,
+    }
+    for op in sorted(ops, key=lambda o: o.step):
+        base = helpers[op.type](base, op.value)
+    return base + ext
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ("pre", "shot", "tail", "v001"),
+        ("pre_", "shot-", "_tail", "_v001"),
+        ("", "", "", ""),
+        (".", ",", "-", "x"),
+    ],
+)
+def test_rename_plan_matches_apply_helpers(values):
+    names = [
+        "shot-render_v001.exr", "shot_v001.exr", "shot.exr", "shot", ".hidden",
+        "pre_shot-take_v001.png", "v001", "_v001.txt", "shot-.txt", "a.b.c",
+    ]
+    ops = [
+        max_api.Operation(step=3, type="add_suffix", value=values[2]),
+        max_api.Operation(step=1, type="remove_prefix", value=values[1]),
+        max_api.Operation(step=4, type="remove_suffix", value=values[3]),
+        max_api.Operation(step=2, type="add_prefix", value=values[0]),
+    ]
+    plan = max_api.RenamePlan(ops)
+    for name in names:
+        assert plan.candidate(name) == _apply_chain(name, ops)
+
+
+def _legacy_resolve(pairs, existing):
+    used, out = set(), []
+    for fname, candidate in pairs:
+        final = candidate
+        if final != fname and (final in used or final in existing):
+            root, ex = os.path.splitext(candidate)
+            counter = 1
+            final = f"{root}_{counter}{ex}"
+            while final in used or (final in existing and final != fname):
+                counter += 1
+                final = f"{root}_{counter}{ex}"
+        used.add(final)
+        out.append(final)
+    return out
+
+
+def test_collision_index_matches_rescan_including_own_name():
+    import random
+
+    rng = random.Random(7)
+    roots = ["shot", "shot_1", "a"]
+    pool = [f"{r}{s}.exr" for r in roots for s in ["", "_1", "_2", "_3", "_01", "x"]]
+    for _ in range(200):
+        fnames = sorted(set(rng.sample(pool, 10)))
+        pairs = [(f, rng.choice(["shot.exr", "shot_1.exr", "a.exr", f])) for f in fnames]
+        index = max_api.CollisionIndex(set(fnames))
+        assert [index.resolve(f, c)[0] for f, c in pairs] == _legacy_resolve(pairs, set(fnames))
+
+
+def test_resolve_candidates_matches_sequential_pass():
+    import random
+
+    from rename_core import resolve_candidates, resolve_sequential
+
+    rng = random.Random(11)
+    pool = [f"{r}{s}.exr" for r in ("shot", "shot_1", "a") for s in ["", "_1", "_2", "_3", "x", "y"]]
+    for _ in range(300):
+        names = sorted(set(rng.sample(pool, 12)))
+        candidates = [rng.choice(["shot.exr", "shot_1.exr", "a.exr", "b.exr", n, n, n]) for n in names]
+        assert resolve_candidates(names, candidates) == resolve_sequential(names, candidates)
+
+
+def test_collision_index_many_sources_to_one_candidate():
+    index = max_api.CollisionIndex({"shot_1.exr", "shot_3.exr"})
+    results = [index.resolve(f"src{i}.exr", "shot.exr") for i in range(5)]
+    assert results == [
+        ("shot.exr", False),
+        ("shot_2.exr", True),
+        ("shot_4.exr", True),
+        ("shot_5.exr", True),
+        ("shot_6.exr", True),
+    ]
+
+
+def test_compute_new_names_reuses_names_vacated_in_same_batch(tmp_path: Path):
+    for name in ("take.png", "take_v2.png", "take_v2_v2.png"):
+        (tmp_path / name).write_text(name, encoding="utf-8")
+    ops = [max_api.Operation(step=1, type="remove_suffix", value="_v2")]
+    files, mapping, summary = max_api.compute_new_names(str(tmp_path), ops)
+    assert mapping == {
+        "take.png": "take.png",
+        "take_v2.png": "take_1.png",
+        "take_v2_v2.png": "take_v2.png",
+    }
+    assert summary.collisions == 1
+
+
+def test_run_applies_rename_chain_without_suffixes(tmp_path: Path):
+    (tmp_path / "shot.exr").write_text("old", encoding="utf-8")
+    (tmp_path / "shot_new.exr").write_text("new", encoding="utf-8")
+    req = max_api.RunRequest(
+        folder=str(tmp_path),
+        operations=[
+            max_api.Operation(step=1, type="add_suffix", value="_old"),
+            max_api.Operation(step=2, type="remove_suffix", value="_new_old"),
+        ],
+    )
+    resp = max_api.run(req)
+    assert {(f.original, f.new) for f in resp.files} == {
+        ("shot.exr", "shot_old.exr"),
+        ("shot_new.exr", "shot.exr"),
+    }
+    assert resp.summary.collisions == 0
+    assert resp.errors == []
+    assert (tmp_path / "shot.exr").read_text(encoding="utf-8") == "new"
+    assert (tmp_path / "shot_old.exr").read_text(encoding="utf-8") == "old"
+
+
+def test_run_subset_does_not_overwrite_file_left_in_place(tmp_path: Path):
+    (tmp_path / "shot.exr").write_text("old", encoding="utf-8")
+    (tmp_path / "shot_new.exr").write_text("new", encoding="utf-8")
+    req = max_api.RunRequest(
+        folder=str(tmp_path),
+        operations=[
+            max_api.Operation(step=1, type="add_suffix", value="_old"),
+            max_api.Operation(step=2, type="remove_suffix", value="_new_old"),
+        ],
+        include_files=["shot_new.exr"],
+    )
+    resp = max_api.run(req)
+    assert len(resp.errors) == 1
+    assert (tmp_path / "shot.exr").read_text(encoding="utf-8") == "old"
+    assert (tmp_path / "shot_new.exr").exists()
@@ -0,0 +1,100 @@
+import csv
+import gzip
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import report_writer  # noqa: E402
+from report_writer import GZIP_SUFFIX, REPORTS_DIR, ReportWriter, resolve_report  # noqa: E402
+
+
+def read_rows(path: Path):
+    if path.name.endswith(GZIP_SUFFIX):
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as fh:
+            return list(csv.reader(fh))
+    with open(path, encoding="utf-8", newline="") as fh:
+        return list(csv.reader(fh))
+
+
+def test_rows_stream_into_one_report(tmp_path):
+    with ReportWriter(tmp_path, "copy_captions", ["relative_image_path", "action"]) as report:
+        report.write(["a.png", "copied"])
+        # nothing is published before the report is complete
+        assert not report.path.exists()
+        assert [p.name for p in (tmp_path / REPORTS_DIR).iterdir()] == [report.report_id + ".part"]
+        report.write(["sub/b,c.png", "missing_in_src"])
+    assert report.rows == 2
+    assert [p.name for p in (tmp_path / REPORTS_DIR).iterdir()] == [report.report_id]
+    assert read_rows(report.path) == [
+        ["relative_image_path", "action"],
+        ["a.png", "copied"],
+        ["sub/b,c.png", "missing_in_src"],
+    ]
+
+
+def test_compressed_reports_and_unique_names(tmp_path):
+    with ReportWriter(tmp_path, "prefix_suffix", ["relative_path", "action"], compress=True) as first:
+        for i in range(10_000):
+            first.write([f"img_{i}.txt", "changed"])
+    with ReportWriter(tmp_path, "prefix_suffix", ["relative_path", "action"]) as second:
+        second.write(["img_0.txt", "skipped"])
+    assert first.report_id.endswith(".csv.gz") and second.report_id.endswith(".csv")
+    assert first.path.stem.split(".")[0] != second.path.stem
+    assert first.path.stat().st_size < 10_000 * len("img_0000.txt,changed\r\n") // 5
+    with gzip.open(first.path, "rt", encoding="utf-8", newline="") as fh:
+        rows = list(csv.reader(fh))
+    assert len(rows) == 10_001 and rows[-1] == ["img_9999.txt", "changed"]
+
+
+class FrozenClock:
+    @staticmethod
+    def now():
+        return datetime(2024, 1, 1)
+
+
+def test_concurrent_writers_never_share_a_report(tmp_path, monkeypatch):
+    # every writer starts in the same second, so all of them race for one name
+    monkeypatch.setattr(report_writer, "datetime", FrozenClock)
+    barrier = threading.Barrier(12)
+
+    def write(i):
+        barrier.wait()
+        with ReportWriter(tmp_path, "copy_captions", ["relative_image_path", "action"], compress=i % 2 == 0) as report:
+            report.write([f"img_{i}.png", "copied"])
+        return report.path
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        paths = list(pool.map(write, range(12)))
+    assert len(set(paths)) == 12
+    assert len({p.name.split(".")[0] for p in paths}) == 12
+    for i, path in enumerate(paths):
+        assert read_rows(path)[1:] == [[f"img_{i}.png", "copied"]]
+
+
+def test_failed_action_leaves_no_report(tmp_path):
+    with pytest.raises(RuntimeError):
+        with ReportWriter(tmp_path, "make_blank_txts", ["relative_image_path", "action"]) as report:
+            report.write(["a.png", "created"])
+            raise RuntimeError("boom")
+    assert list((tmp_path / REPORTS_DIR).iterdir()) == []
+
+
+def test_resolve_report_only_serves_reports(tmp_path):
+    with ReportWriter(tmp_path, "copy_captions", ["relative_image_path", "action"]) as report:
+        report.write(["a.png", "copied"])
+    assert resolve_report(tmp_path, report.report_id) == report.path
+    (tmp_path / "secret.csv").write_text("x", encoding="utf-8")
+    for bad in ("../secret.csv", "..\\secret.csv", "notes.txt", report.report_id + ".part"):
+        with pytest.raises(ValueError):
+            resolve_report(tmp_path, bad)
+    with pytest.raises(FileNotFoundError):
+        resolve_report(tmp_path, "copy_captions_19990101_000000.csv")
@@ -0,0 +1,310 @@
+import importlib.util
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import snapshot_store  # noqa: E402
+from snapshot_gc import SnapshotCollector  # noqa: E402
+from snapshot_store import (  # noqa: E402
+    CATALOG_NAME,
+    PACK_DIR,
+    RetentionPolicy,
+    load_catalog,
+    load_manifest,
+    pack_path,
+    pack_sizes,
+    prune_snapshots,
+    read_blobs,
+    save_retention,
+    text_hash,
+    write_snapshot,
+)
+
+core_spec = importlib.util.spec_from_file_location("dataset_core", CODE_DIR / "dataset_actions_core.py")
+dataset_core = importlib.util.module_from_spec(core_spec)
+sys.modules["dataset_core"] = dataset_core
+core_spec.loader.exec_module(dataset_core)  # type: ignore
+
+
+def test_snapshot_round_trip_and_dedup_within_snapshot(tmp_path):
+    undo = tmp_path / "__undo"
+    manifest = write_snapshot(undo, tmp_path, ["a.txt", "b.txt", "c.txt"], ["x", "x", ""], ["x-1", "x-1", "é"])
+    assert sorted(p.name for p in (undo / manifest.snapshot_id).iterdir()) == ["manifest.json"]
+    assert len(manifest.blobs) == 4
+    assert manifest.raw_bytes == len("xxx-1x-1é".encode("utf-8"))
+    texts = read_blobs(undo, load_manifest(undo / manifest.snapshot_id), manifest.before + manifest.after)
+    assert [texts[h] for h in manifest.after] == ["x-1", "x-1", "é"]
+    assert manifest.before[0] == text_hash("x")
+
+
+def test_consecutive_snapshots_share_blobs(tmp_path):
+    undo = tmp_path / "__undo"
+    first = write_snapshot(undo, tmp_path, ["a.txt"], ["one"], ["two"])
+    second = write_snapshot(undo, tmp_path, ["a.txt"], ["two"], ["three"])
+    third = write_snapshot(undo, tmp_path, ["a.txt"], ["three"], ["two"])
+    assert len({first.snapshot_id, second.snapshot_id, third.snapshot_id}) == 3
+    assert second.blobs[text_hash("two")][0] == first.snapshot_id
+    # the latest snapshot's map carries what it reused, so chains resolve
+    assert third.blobs[text_hash("two")][0] == first.snapshot_id
+    assert third.blobs[text_hash("three")][0] == second.snapshot_id
+    assert third.pack_bytes == 0 and not pack_path(undo, third.snapshot_id).exists()
+    assert read_blobs(undo, third, third.after) == {text_hash("two"): "two"}
+
+
+def test_snapshot_adding_only_empty_captions_keeps_its_pack(tmp_path):
+    undo = tmp_path / "__undo"
+    write_snapshot(undo, tmp_path, ["f.txt"], ["a"], ["x"])
+    manifest = write_snapshot(undo, tmp_path, ["g.txt"], [""], ["x"])
+    assert manifest.blobs[text_hash("")][0] == manifest.snapshot_id
+    assert pack_path(undo, manifest.snapshot_id).exists()
+    texts = read_blobs(undo, load_manifest(undo / manifest.snapshot_id), manifest.before + manifest.after)
+    assert texts == {text_hash(""): "", text_hash("x"): "x"}
+
+
+def test_sparse_reads_across_small_chunks(tmp_path):
+    undo = tmp_path / "__undo"
+    before = [f"caption number {i} " * (i % 5 + 1) for i in range(200)]
+    after = [text.upper() for text in before]
+    manifest = write_snapshot(undo, tmp_path, [f"{i}.txt" for i in range(200)], before, after)
+    wanted = manifest.after[::17] + manifest.before[5::31]
+    texts = read_blobs(undo, manifest, wanted, chunk_bytes=7)
+    assert set(texts) == set(wanted)
+    assert [texts[h] for h in manifest.after[::17]] == after[::17]
+
+
+def test_restore_from_pack_and_missing_pack(tmp_path):
+    base = tmp_path / "set"
+    base.mkdir()
+    (base / "sub").mkdir()
+    for name, text in (("a.txt", "red fox"), ("sub/b.txt", "blue bird")):
+        (base / name).write_text(text, encoding="utf-8")
+    result = dataset_core.run_caption_prefix_suffix(
+        str(base), [], True, "", "", False, False, [{"step": 1, "type": "add_prefix", "value": "style"}]
+    )
+    snapshot_id = result["snapshot_id"]
+    snap_dir = base / "__undo" / snapshot_id
+    assert json.loads((snap_dir / "manifest.json").read_text(encoding="utf-8"))["version"] == 3
+    assert not (snap_dir / "before").exists()
+    assert dataset_core.restore_snapshot(str(base), snapshot_id, "before") == (2, [])
+    assert (base / "sub/b.txt").read_text(encoding="utf-8") == "blue bird"
+    assert dataset_core.restore_snapshot(str(base), snapshot_id, "after") == (2, [])
+    assert (base / "a.txt").read_text(encoding="utf-8") == "style-red fox"
+
+    for pack in (base / "__undo" / PACK_DIR).iterdir():
+        pack.unlink()
+    restored, errors = dataset_core.restore_snapshot(str(base), snapshot_id, "before")
+    assert restored == 0 and len(errors) == 2 and errors[0].startswith("missing snapshot entry")
+
+
+def test_version_2_snapshots_still_restore(tmp_path):
+    base = tmp_path / "set"
+    snap = base / "__undo" / "20240101_000000"
+    (snap / "before").mkdir(parents=True)
+    (snap / "before" / "a.txt").write_text("old", encoding="utf-8")
+    (snap / "manifest.json").write_text(json.dumps({"files": ["a.txt"], "version": 2}), encoding="utf-8")
+    assert dataset_core.restore_snapshot(str(base), "20240101_000000", "before") == (1, [])
+    assert (base / "a.txt").read_text(encoding="utf-8") == "old"
+
+
+def _snapshot_of_tree(base: Path) -> str:
+    (base / "shots/a").mkdir(parents=True)
+    (base / "shots/b").mkdir(parents=True)
+    for i in range(6):
+        sub = "a" if i % 2 else "b"
+        (base / f"shots/{sub}/{i}.txt").write_text(f"cap {i}", encoding="utf-8")
+    result = dataset_core.run_caption_prefix_suffix(
+        str(base), [], True, "", "", False, False, [{"step": 1, "type": "add_prefix", "value": "x"}]
+    )
+    return result["snapshot_id"]
+
+
+def test_restore_skips_files_already_matching(tmp_path, monkeypatch):
+    base = tmp_path / "set"
+    snapshot_id = _snapshot_of_tree(base)
+    (base / "shots/a/1.txt").write_text("cap 1", encoding="utf-8")
+    (base / "shots/b/4.txt").unlink()
+
+    wanted = []
+    real_read_blobs = dataset_core.read_blobs
+    monkeypatch.setattr(
+        dataset_core, "read_blobs", lambda undo, m, hashes: wanted.append(set(hashes)) or real_read_blobs(undo, m, hashes)
+    )
+    result = dataset_core.restore_snapshot_files(str(base), snapshot_id, "before")
+    assert result == {"restored": 5, "skipped": 1, "errors": []}
+    assert len(wanted[0]) == 5  # the already-restored file's blob is not read
+    assert (base / "shots/b/4.txt").read_text(encoding="utf-8") == "cap 4"
+
+    again = dataset_core.restore_snapshot_files(str(base), snapshot_id, "before", workers=4)
+    assert again == {"restored": 0, "skipped": 6, "errors": []}
+    assert wanted[-1] == set()
+
+
+def test_partial_restore_by_glob_and_ids(tmp_path):
+    base = tmp_path / "set"
+    snapshot_id = _snapshot_of_tree(base)
+    result = dataset_core.restore_snapshot_files(str(base), snapshot_id, "before", pattern="shots/a/*")
+    assert result == {"restored": 3, "skipped": 0, "errors": []}
+    assert (base / "shots/a/3.txt").read_text(encoding="utf-8") == "cap 3"
+    assert (base / "shots/b/2.txt").read_text(encoding="utf-8") == "x-cap 2"
+
+    result = dataset_core.restore_snapshot_files(
+        str(base), snapshot_id, "before", files=["shots/b/0.txt", "shots/a/1.txt"], pattern="*/b/2.txt", workers=4
+    )
+    assert result == {"restored": 2, "skipped": 1, "errors": []}
+    assert (base / "shots/b/4.txt").read_text(encoding="utf-8") == "x-cap 4"
+    assert dataset_core.restore_snapshot_files(str(base), snapshot_id, "before", files=[]) == {
+        "restored": 0,
+        "skipped": 0,
+        "errors": [],
+    }
+
+
+def test_version_2_restore_skips_identical_files(tmp_path):
+    base = tmp_path / "set"
+    snap = base / "__undo" / "20240101_000000"
+    (snap / "after").mkdir(parents=True)
+    for name in ("a.txt", "b.txt"):
+        (snap / "after" / name).write_text("new", encoding="utf-8")
+    (base / "a.txt").write_text("new", encoding="utf-8")
+    (base / "b.txt").write_text("old", encoding="utf-8")
+    (snap / "manifest.json").write_text(
+        json.dumps({"files": ["a.txt", "b.txt", "c.txt"], "version": 2}), encoding="utf-8"
+    )
+    result = dataset_core.restore_snapshot_files(str(base), "20240101_000000", "after")
+    assert result == {"restored": 1, "skipped": 1, "errors": ["missing snapshot entry: after/c.txt"]}
+    assert (base / "b.txt").read_text(encoding="utf-8") == "new"
+
+
+def test_unreadable_snapshot_entries_leave_captions_alone(tmp_path):
+    base = tmp_path / "set"
+    snap = base / "__undo" / "20240101_000000"
+    (snap / "after").mkdir(parents=True)
+    (snap / "after" / "a.txt").write_bytes(b"\xff\xfe not utf-8")
+    (base / "a.txt").write_text("keep me", encoding="utf-8")
+    (snap / "manifest.json").write_text(json.dumps({"files": ["a.txt"], "version": 2}), encoding="utf-8")
+    result = dataset_core.restore_snapshot_files(str(base), "20240101_000000", "after")
+    assert result["restored"] == 0 and result["errors"][0].startswith("a.txt: ")
+    assert (base / "a.txt").read_text(encoding="utf-8") == "keep me"
+
+    snapshot_id = _snapshot_of_tree(tmp_path / "packed")
+    packed = tmp_path / "packed"
+    for pack in (packed / "__undo" / PACK_DIR).iterdir():
+        pack.write_bytes(b"not a zlib stream" * 4)
+    result = dataset_core.restore_snapshot_files(str(packed), snapshot_id, "before")
+    assert result["restored"] == 0 and len(result["errors"]) == 6
+    assert (packed / "shots/a/1.txt").read_text(encoding="utf-8") == "x-cap 1"
+
+
+def _chain(undo: Path, base: Path, runs: int):
+    """`runs` consecutive snapshots of three files, each run's before being the previous after."""
+    texts = [f"caption {i}" for i in range(3)]
+    manifests = []
+    for run in range(runs):
+        after = [f"{text} v{run + 1}" for text in texts]
+        manifests.append(write_snapshot(undo, base, ["a.txt", "b.txt", "c.txt"], texts, after))
+        texts = after
+    return manifests
+
+
+def test_catalog_is_cached_and_reconciled(tmp_path, monkeypatch):
+    undo = tmp_path / "__undo"
+    manifests = _chain(undo, tmp_path, 3)
+    infos = load_catalog(undo)
+    assert [info.snapshot_id for info in infos] == [m.snapshot_id for m in manifests]
+    assert all(info.files == 3 and info.version == 3 for info in infos)
+    assert infos[1].pack_bytes == manifests[1].pack_bytes
+    assert infos[1].bytes == (undo / infos[1].snapshot_id / "manifest.json").stat().st_size
+    assert infos[1].packs == sorted({manifests[0].snapshot_id, manifests[1].snapshot_id})
+    assert (undo / CATALOG_NAME).exists()
+
+    # cached: no manifest is read again
+    monkeypatch.setattr(snapshot_store, "_scan_info", lambda *args: (_ for _ in ()).throw(AssertionError))
+    assert [info.snapshot_id for info in load_catalog(undo)] == [m.snapshot_id for m in manifests]
+    monkeypatch.undo()
+
+    # folders deleted by hand drop out, folders copied in are scanned
+    shutil.rmtree(undo / manifests[0].snapshot_id)
+    old = undo / "20200101_000000"
+    (old / "before").mkdir(parents=True)
+    (old / "before" / "a.txt").write_text("old text", encoding="utf-8")
+    (old / "manifest.json").write_text(json.dumps({"files": ["a.txt"], "version": 2}), encoding="utf-8")
+    infos = load_catalog(undo)
+    assert [info.snapshot_id for info in infos] == ["20200101_000000"] + [m.snapshot_id for m in manifests[1:]]
+    assert infos[0].version == 2 and infos[0].files == 1 and infos[0].packs == []
+    assert infos[0].bytes == len("old text") + (old / "manifest.json").stat().st_size
+
+
+def test_prune_keeps_packs_referenced_by_kept_snapshots(tmp_path):
+    base = tmp_path / "set"
+    base.mkdir()
+    for name, text in (("a.txt", "red fox"), ("b.txt", "blue bird")):
+        (base / name).write_text(text, encoding="utf-8")
+    ids = []
+    for value in ("one", "two", "three"):
+        result = dataset_core.run_caption_prefix_suffix(
+            str(base), [], False, "", "", False, False, [{"step": 1, "type": "add_suffix", "value": value}]
+        )
+        ids.append(result["snapshot_id"])
+    undo = base / "__undo"
+
+    result = prune_snapshots(undo, RetentionPolicy(keep_last=1, max_bytes=None))
+    assert result.removed == ids[:2]
+    # the kept snapshot's before texts live in the second run's pack
+    assert result.removed_packs == [ids[0]]
+    assert sorted(pack_sizes(undo)) == ids[1:]
+    assert [info.snapshot_id for info in load_catalog(undo)] == ids[2:]
+    assert dataset_core.restore_snapshot(str(base), ids[2], "before") == (2, [])
+    assert (base / "a.txt").read_text(encoding="utf-8") == "red fox-one-two"
+    assert prune_snapshots(undo, RetentionPolicy(keep_last=1)).removed == []
+    # pruned ids are not handed out again: their packs may still be in use
+    later = write_snapshot(undo, base, ["a.txt"], ["x"], ["y"])
+    assert later.snapshot_id > ids[2] and pack_path(undo, ids[1]).exists()
+
+
+def test_retention_limits_by_age_and_bytes(tmp_path):
+    undo = tmp_path / "__undo"
+    manifests = _chain(undo, tmp_path, 4)
+    ids = [m.snapshot_id for m in manifests]
+    now = load_catalog(undo)[-1].created_ts + 10 * 86400
+    # every snapshot is too old, but the newest one is always kept
+    policy = RetentionPolicy(keep_last=None, max_bytes=None, max_age_days=1)
+    assert prune_snapshots(undo, policy, now=now).removed == ids[:3]
+
+    manifests = _chain(undo, tmp_path, 3)
+    infos = load_catalog(undo)
+    sizes = pack_sizes(undo)
+    packs = set(infos[-1].packs + infos[-2].packs)
+    newest_two = infos[-1].bytes + infos[-2].bytes + sum(sizes[pack] for pack in packs)
+    result = prune_snapshots(undo, RetentionPolicy(keep_last=None, max_bytes=newest_two))
+    assert [info.snapshot_id for info in load_catalog(undo)] == [m.snapshot_id for m in manifests[1:]]
+    assert ids[3] in result.removed
+    assert sum(info.bytes for info in load_catalog(undo)) + sum(pack_sizes(undo).values()) == newest_two
+
+
+def test_dataset_without_policy_keeps_every_snapshot(tmp_path):
+    undo = tmp_path / "__undo"
+    manifests = _chain(undo, tmp_path, 60)
+    assert prune_snapshots(undo).removed == []
+    assert [info.snapshot_id for info in load_catalog(undo)] == [m.snapshot_id for m in manifests]
+    assert read_blobs(undo, manifests[0], manifests[0].before)
+
+
+def test_collector_prunes_in_the_background(tmp_path):
+    undo = tmp_path / "__undo"
+    manifests = _chain(undo, tmp_path, 3)
+    save_retention(undo, RetentionPolicy(keep_last=2, max_bytes=None))
+    collector = SnapshotCollector(delay=0.01, interval=60)
+    collector.schedule(undo)
+    collector.schedule(tmp_path / "gone" / "__undo")
+    deadline = time.monotonic() + 5
+    while len(load_catalog(undo)) > 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [info.snapshot_id for info in load_catalog(undo)] == [m.snapshot_id for m in manifests[1:]]
+    assert collector.last_error is None
@@ -0,0 +1,122 @@
+"""
+copy_captions: the old courier (rglob the destination, then exists() on
+the source and destination .txt of every image, copying one by one;
+reimplemented here) versus the indexed plan with pooled copies. Dry run
+and real run, on fresh trees per run. --latency-ms adds a sleep to every
+metadata probe (exists/is_file for the old courier, each directory scan
+for the new one) and every copy, standing in for a WSL DrvFs or SMB mount.
+
+    python Code/neura-ui/tests/benchmarks/bench_caption_courier.py --count 20000
+    python Code/neura-ui/tests/benchmarks/bench_caption_courier.py --count 2000 --latency-ms 1
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import dataset_actions_core  # noqa: E402
+import folder_index as folder_index_module  # noqa: E402
+from fs_paths import STRATEGIES  # noqa: E402
+
+LATENCY = 0.0
+
+
+def make_trees(root: Path, count: int):
+    src = root / "src"
+    dest = root / "dest"
+    for i in range(count):
+        sub = f"set_{i % 16:02d}"
+        (dest / sub).mkdir(parents=True, exist_ok=True)
+        (src / sub).mkdir(parents=True, exist_ok=True)
+        (dest / sub / f"img_{i:07d}.png").write_bytes(b"png")
+        if i % 10:
+            (src / sub / f"img_{i:07d}.txt").write_text(f"caption {i}", encoding="utf-8")
+        if i % 7 == 0:
+            (dest / sub / f"img_{i:07d}.txt").write_text("existing", encoding="utf-8")
+    return src, dest
+
+
+def old_courier(src: Path, dest: Path, dry_run: bool):
+    exts = set(dataset_actions_core.IMG_EXTS_ALL)
+    imgs = [p for p in dest.rglob("*") if slow(p.is_file) and p.suffix.lower() in exts]
+    copied = missing = skipped = 0
+    for img in imgs:
+        rel = img.relative_to(dest)
+        txt_in_src = src / rel.with_suffix(".txt")
+        txt_in_dest = img.with_suffix(".txt")
+        if not slow(txt_in_src.exists):
+            missing += 1
+        elif slow(txt_in_dest.exists):
+            skipped += 1
+        else:
+            copied += 1
+            if not dry_run:
+                time.sleep(LATENCY)
+                txt_in_dest.write_text(txt_in_src.read_text(encoding="utf-8"), encoding="utf-8")
+    return {"copied": copied, "skipped_exist": skipped, "missing_in_src": missing}
+
+
+def slow(probe):
+    if LATENCY:
+        time.sleep(LATENCY)
+    return probe()
+
+
+def add_latency() -> None:
+    scan = folder_index_module.scan_folder
+    copy = dataset_actions_core._copy_caption
+
+    def slow_scan(folder):
+        time.sleep(LATENCY)
+        return scan(folder)
+
+    def slow_copy(src, dest):
+        time.sleep(LATENCY)
+        return copy(src, dest)
+
+    folder_index_module.scan_folder = slow_scan
+    dataset_actions_core._copy_caption = slow_copy
+
+
+def timed(fn, count: int, dry_run: bool, **kwargs):
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dest = make_trees(Path(tmp), count)
+        folder_index_module.folder_index.invalidate()
+        start = time.perf_counter()
+        result = fn(src, dest, dry_run, **kwargs)
+        return time.perf_counter() - start, result
+
+
+def new_courier(src: Path, dest: Path, dry_run: bool, workers: int):
+    return dataset_actions_core.copy_captions(str(src), str(dest), False, dry_run, workers=workers)["summary"]
+
+
+def main() -> None:
+    global LATENCY
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=STRATEGIES["drvfs"].io_workers)
+    args = parser.parse_args()
+    LATENCY = args.latency_ms / 1000
+    if LATENCY:
+        add_latency()
+
+    print(f"{args.count} images, {args.latency_ms} ms simulated latency")
+    for dry_run in (True, False):
+        label = "dry run" if dry_run else "run"
+        old_time, old_summary = timed(old_courier, args.count, dry_run)
+        new_time, new_summary = timed(new_courier, args.count, dry_run, workers=args.workers)
+        assert old_summary == new_summary, (old_summary, new_summary)
+        print(f"{label:>8}: old {old_time:.2f}s, indexed {new_time:.2f}s ({old_time / new_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Caption index costs on a synthetic dataset: first build, a refresh with
+nothing changed, a refresh after editing 1% of the captions, searches,
+the first and a mid-dataset page, and loading every row from the index
+versus reading the files.
+
+    python Code/neura-ui/tests/benchmarks/bench_caption_index.py --count 500000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+BENCH_DIR = Path(__file__).resolve().parent
+for path in (CODE_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from bench_caption_load import make_dataset  # noqa: E402
+from caption_index import CaptionIndex  # noqa: E402
+from dataset_actions_core import load_caption_rows  # noqa: E402
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:>24}: {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_dataset(folder, args.count)
+        # age the files past the racy window so unchanged ones are skipped
+        stamp = time.time() - 60
+        txts = sorted(folder.rglob("*.txt"))
+        for path in txts:
+            os.utime(path, (stamp, stamp))
+        print(f"{args.count} captions")
+
+        index = CaptionIndex(str(folder))
+        timed("build", index.refresh)
+        timed("refresh, no changes", index.refresh)
+        for path in random.Random(0).sample(txts, max(args.count // 100, 1)):
+            path.write_text("edited caption with a lighthouse", encoding="utf-8")
+            os.utime(path, (stamp + 1, stamp + 1))
+        stats = timed("refresh, 1% edited", index.refresh)
+        assert stats.updated == max(args.count // 100, 1)
+        total, _ = timed("search 'lighthouse'", lambda: index.search("lighthouse"))
+        timed("search 'subject studio'", lambda: index.search("subject studio"))
+        print(f"{'matches':>24}: {total}")
+        timed("first page (200 rows)", lambda: index.page(limit=200))
+        _, _, mid = index.page(limit=args.count // 2)
+        timed("page at row count/2", lambda: index.page(limit=200, cursor=mid))
+        timed("page, length desc", lambda: index.page(limit=200, sort="length", descending=True))
+        timed("page, contains filter", lambda: index.page(limit=200, contains="lighthouse"))
+        timed("load from index", lambda: sum(1 for _ in index.rows()))
+        timed("load from files", lambda: load_caption_rows(str(folder), True))
+
+
+if __name__ == "__main__":
+    main()
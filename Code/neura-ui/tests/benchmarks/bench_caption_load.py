@@ -0,0 +1,73 @@
+"""
+Caption loading with one reader versus the pool, on a real temp dataset:
+total time of load_caption_rows and time until the first row of
+stream_caption_rows. --latency-ms adds a sleep before each read to stand
+in for the round-trip of a WSL DrvFs or SMB mount.
+
+    python Code/neura-ui/tests/benchmarks/bench_caption_load.py --count 200000 --latency-ms 0
+    python Code/neura-ui/tests/benchmarks/bench_caption_load.py --count 5000 --latency-ms 1
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+import dataset_actions_core  # noqa: E402
+from fs_paths import STRATEGIES  # noqa: E402
+
+
+def make_dataset(folder: Path, count: int) -> None:
+    for i in range(count):
+        sub = folder / f"set_{i % 16:02d}"
+        sub.mkdir(exist_ok=True)
+        (sub / f"img_{i:07d}.txt").write_text(f"a photo of subject {i}, studio light", encoding="utf-8")
+
+
+def timed_load(folder: Path, workers: int):
+    start = time.perf_counter()
+    count, rows = dataset_actions_core.stream_caption_rows(str(folder), True, workers)
+    next(rows)
+    first_row = time.perf_counter() - start
+    rest = sum(1 for _ in rows) + 1
+    assert rest == count
+    return first_row, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=STRATEGIES["drvfs"].io_workers)
+    args = parser.parse_args()
+
+    if args.latency_ms:
+        read = dataset_actions_core._read_text_safe
+
+        def slow_read(p):
+            time.sleep(args.latency_ms / 1000)
+            return read(p)
+
+        dataset_actions_core._read_text_safe = slow_read
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_dataset(folder, args.count)
+        print(f"{args.count} captions, {args.latency_ms} ms simulated latency")
+        results = {}
+        for label, workers in (("serial", 1), (f"{args.workers} workers", args.workers)):
+            first_row, total = timed_load(folder, workers)
+            results[label] = total
+            print(f"{label:>10}: first row {first_row * 1000:.1f} ms, total {total:.3f}s, {args.count / total:,.0f} captions/sec")
+        serial, pooled = results.values()
+        print(f"{'speedup':>10}: {serial / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
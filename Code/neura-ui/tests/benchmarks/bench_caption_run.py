@@ -0,0 +1,81 @@
+"""
+Throughput of run_caption_prefix_suffix with one worker versus the pool,
+on a fresh synthetic dataset per run (files/sec over all captions, dry run
+and real run). --latency-ms adds a sleep before each caption read and
+write to stand in for the round-trip of a WSL DrvFs or SMB mount.
+
+    python Code/neura-ui/tests/benchmarks/bench_caption_run.py --count 100000
+    python Code/neura-ui/tests/benchmarks/bench_caption_run.py --count 5000 --latency-ms 1
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+BENCH_DIR = Path(__file__).resolve().parent
+for path in (CODE_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import dataset_actions_core  # noqa: E402
+from bench_caption_load import make_dataset  # noqa: E402
+from fs_paths import STRATEGIES  # noqa: E402
+
+OPERATIONS = [{"step": 1, "type": "add_prefix", "value": "style"}]
+
+
+def add_latency(latency_s: float) -> None:
+    read = dataset_actions_core._read_caption_once
+    write = dataset_actions_core._write_caption
+
+    def slow_read(p):
+        time.sleep(latency_s)
+        return read(p)
+
+    def slow_write(task):
+        time.sleep(latency_s)
+        write(task)
+
+    dataset_actions_core._read_caption_once = slow_read
+    dataset_actions_core._write_caption = slow_write
+
+
+def timed_run(count: int, workers: int, dry_run: bool) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_dataset(folder, count)
+        start = time.perf_counter()
+        result = dataset_actions_core.run_caption_prefix_suffix(
+            str(folder), [], True, "", "", dry_run, False, OPERATIONS, workers=workers
+        )
+        elapsed = time.perf_counter() - start
+        assert result["summary"]["changed"] == count, result["log"][:3]
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=STRATEGIES["drvfs"].io_workers)
+    args = parser.parse_args()
+    if args.latency_ms:
+        add_latency(args.latency_ms / 1000)
+
+    print(f"{args.count} captions, {args.latency_ms} ms simulated latency")
+    for dry_run in (True, False):
+        label = "dry run" if dry_run else "run"
+        serial = timed_run(args.count, 1, dry_run)
+        pooled = timed_run(args.count, args.workers, dry_run)
+        print(
+            f"{label:>8}: serial {args.count / serial:,.0f} files/sec, "
+            f"{args.workers} workers {args.count / pooled:,.0f} files/sec ({serial / pooled:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Worst-case collision benchmark: N files that all resolve to the same
+candidate name. The old rescan-from-_1 loop is O(N^2); CollisionIndex
+keeps a next-free counter per root and stays linear.
+
+    python Code/neura-ui/tests/benchmarks/bench_collisions.py --count 10000
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+spec = importlib.util.spec_from_file_location("max_api", CODE_DIR / "Option_C-Max-API.py")
+max_api = importlib.util.module_from_spec(spec)
+sys.modules["max_api"] = max_api
+spec.loader.exec_module(max_api)  # type: ignore
+
+
+def legacy_resolve(pairs, existing_names):
+    used_targets = set()
+    out = []
+    for fname, candidate in pairs:
+        final_name = candidate
+        if final_name != fname and (
+            final_name in used_targets or final_name in existing_names
+        ):
+            root, ex = os.path.splitext(candidate)
+            counter = 1
+            final_name = f"{root}_{counter}{ex}"
+            while final_name in used_targets or (
+                final_name in existing_names and final_name != fname
+            ):
+                counter += 1
+                final_name = f"{root}_{counter}{ex}"
+        used_targets.add(final_name)
+        out.append(final_name)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=10_000)
+    args = parser.parse_args()
+    fnames = [f"shot_v{i:06d}.exr" for i in range(args.count)]
+    pairs = [(fname, "shot.exr") for fname in fnames]
+    existing = set(fnames)
+
+    start = time.perf_counter()
+    legacy = legacy_resolve(pairs, existing)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = max_api.CollisionIndex(existing)
+    indexed = [index.resolve(fname, candidate)[0] for fname, candidate in pairs]
+    indexed_s = time.perf_counter() - start
+
+    assert indexed == legacy
+    print(f"{args.count} files -> one candidate")
+    for label, seconds in (("rescan from _1", legacy_s), ("CollisionIndex", indexed_s)):
+        print(f"{label:>16}: {seconds:.3f}s total, {seconds / args.count * 1e6:.2f} us/file")
+    print(f"{'speedup':>16}: {legacy_s / indexed_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
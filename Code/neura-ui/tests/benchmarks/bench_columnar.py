@@ -0,0 +1,62 @@
+"""
+Columnar rename kernel versus the per-name engine on synthetic folders
+(needs numpy>=2.3). Both must produce identical names.
+
+    python Code/neura-ui/tests/benchmarks/bench_columnar.py --count 1000000
+"""
+
+import argparse
+import importlib.util
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+spec = importlib.util.spec_from_file_location("max_api", CODE_DIR / "Option_C-Max-API.py")
+max_api = importlib.util.module_from_spec(spec)
+sys.modules["max_api"] = max_api
+spec.loader.exec_module(max_api)  # type: ignore
+
+from rename_columnar import columnar_available, resolve_columnar  # noqa: E402
+
+OPERATIONS = [
+    max_api.Operation(step=1, type="remove_prefix", value="raw"),
+    max_api.Operation(step=2, type="add_prefix", value="proj_"),
+    max_api.Operation(step=3, type="remove_suffix", value="_final"),
+    max_api.Operation(step=4, type="add_suffix", value="graded"),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+    if not columnar_available():
+        sys.exit("numpy>=2.3 is required for the columnar engine")
+    names = sorted(
+        f"raw_shot{i % 997:03d}_take{i}{'_final' if i % 3 == 0 else ''}.exr"
+        for i in range(args.count)
+    )
+    plan = max_api.RenamePlan(OPERATIONS)
+
+    start = time.perf_counter()
+    summary = max_api.Summary(renamed=0, unchanged=0, collisions=0)
+    python = [new for _, new in max_api.iter_new_names(names, plan, summary)]
+    python_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar = resolve_columnar(names, plan).new_names
+    columnar_s = time.perf_counter() - start
+
+    assert columnar == python
+    for label, seconds in (("per-name", python_s), ("columnar", columnar_s)):
+        print(f"{label:>9}: {seconds:.3f}s total, {seconds / args.count * 1e9:.0f} ns/name")
+    print(f"{'speedup':>9}: {python_s / columnar_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
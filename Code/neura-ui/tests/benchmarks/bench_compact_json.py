@@ -0,0 +1,95 @@
+"""
+Serialization cost of /preview per response format on a synthetic folder.
+"rows" is timed the way FastAPI handles a returned model: build the
+FileMapping rows, validate the model against response_model and
+serialize it to JSON bytes with pydantic. The compact formats are
+timed through mapping_response, which produces the final bytes. Full
+endpoint times through the app are printed alongside.
+
+    python Code/neura-ui/tests/benchmarks/bench_compact_json.py --count 100000
+"""
+
+import argparse
+import importlib.util
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+BENCH_DIR = Path(__file__).resolve().parent
+for path in (CODE_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+spec = importlib.util.spec_from_file_location("max_api", CODE_DIR / "Option_C-Max-API.py")
+max_api = importlib.util.module_from_spec(spec)
+sys.modules["max_api"] = max_api
+spec.loader.exec_module(max_api)  # type: ignore
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import synthetic_folders  # noqa: E402
+from folder_index import RACY_WINDOW_NS  # noqa: E402
+from json_codec import orjson  # noqa: E402
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="compact-json-bench-")
+    try:
+        names, ops = synthetic_folders.generate("uniform", args.count)
+        synthetic_folders.materialize(root, names)
+        time.sleep(RACY_WINDOW_NS / 1e9 + 0.1)
+        client = TestClient(max_api.app)
+        plan = max_api.RenamePlan([max_api.Operation(**op) for op in ops])
+
+        stored = max_api.build_stored_plan(root, plan)
+        fields = {"summary": stored.summary, "plan_id": stored.plan_id}
+        print(f"{args.count} rows, encoder: {'orjson' if orjson else 'json'}")
+
+        def encode_rows():
+            resp = max_api.mapping_response("rows", stored.files, stored.mapping, max_api.PreviewResponse, **fields)
+            return max_api.PreviewResponse.model_validate(resp).model_dump_json().encode("utf-8")
+
+        def encoder(fmt):
+            if fmt == "rows":
+                return encode_rows
+            return lambda: max_api.mapping_response(
+                fmt, stored.files, stored.mapping, max_api.PreviewResponse, **fields
+            ).body
+
+        serialize = {}
+        for fmt in ("rows", "columns", "changes"):
+            size = len(encoder(fmt)())
+            serialize[fmt], _ = best_of(args.repeat, encoder(fmt))
+            body = {"folder": root, "operations": ops, "format": fmt}
+            endpoint, _ = best_of(args.repeat, lambda: client.post("/preview", json=body))
+            print(
+                f"{fmt:>8}: serialization {serialize[fmt] * 1000:.1f} ms, "
+                f"endpoint {endpoint * 1000:.0f} ms, {size / 2**20:.1f} MB"
+            )
+        for fmt in ("columns", "changes"):
+            print(f"{fmt:>8}: {serialize['rows'] / serialize[fmt]:.1f}x faster serialization than rows")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
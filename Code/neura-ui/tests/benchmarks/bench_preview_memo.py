@@ -0,0 +1,69 @@
+"""
+Repeated previews where only the last step changes, as when an operator
+tweaks step 3 with steps 1-2 fixed. Compares the memoized path
+(build_stored_plan, which reuses each folder's step columns) with
+iter_new_names recomputing every step for every file.
+
+    python Code/neura-ui/tests/benchmarks/bench_preview_memo.py --count 200000 --distribution uniform
+"""
+
+import argparse
+import importlib.util
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+BENCH_DIR = Path(__file__).resolve().parent
+for path in (CODE_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+spec = importlib.util.spec_from_file_location("max_api", CODE_DIR / "Option_C-Max-API.py")
+max_api = importlib.util.module_from_spec(spec)
+sys.modules["max_api"] = max_api
+spec.loader.exec_module(max_api)  # type: ignore
+
+import synthetic_folders  # noqa: E402
+from folder_index import RACY_WINDOW_NS  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--distribution", choices=synthetic_folders.DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--tweaks", type=int, default=5)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="preview-memo-bench-")
+    try:
+        names, ops = synthetic_folders.generate(args.distribution, args.count)
+        synthetic_folders.materialize(root, names)
+        # past the racy-mtime window the listing is cached, as in a real session
+        time.sleep(RACY_WINDOW_NS / 1e9 + 0.1)
+        max_api.folder_index.get(root)
+        fixed = [max_api.Operation(**op) for op in ops[:2]]
+        memo_s = plain_s = 0.0
+        for i in range(args.tweaks):
+            plan = max_api.RenamePlan(fixed + [max_api.Operation(step=3, type="add_suffix", value=f"t{i}")])
+            start = time.perf_counter()
+            stored = max_api.build_stored_plan(root, plan)
+            memo_s += time.perf_counter() - start
+
+            start = time.perf_counter()
+            summary = max_api.Summary(renamed=0, unchanged=0, collisions=0)
+            mapping = dict(max_api.iter_new_names(stored.files, plan, summary))
+            plain_s += time.perf_counter() - start
+            assert mapping == stored.mapping
+        print(f"{len(names)} files ({args.distribution}), {args.tweaks} step-3 tweaks")
+        print(f"{'memoized':>10}: {memo_s / args.tweaks * 1000:.0f} ms/preview (first one builds the columns)")
+        print(f"{'full':>10}: {plain_s / args.tweaks * 1000:.0f} ms/preview")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
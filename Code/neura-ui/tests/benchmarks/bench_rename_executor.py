@@ -0,0 +1,59 @@
+"""
+Renames/sec of execute_renames with one worker versus the pool, on a real
+temp folder. --latency-ms adds a sleep before each os.rename to stand in
+for the round-trip of a WSL DrvFs or SMB mount.
+
+    python Code/neura-ui/tests/benchmarks/bench_rename_executor.py --count 2000 --latency-ms 2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+from fs_paths import STRATEGIES  # noqa: E402
+from rename_executor import execute_renames  # noqa: E402
+
+
+def timed_run(count: int, workers: int, latency_s: float) -> float:
+    def slow_rename(src, dst):
+        if latency_s:
+            time.sleep(latency_s)
+        os.rename(src, dst)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pairs = [(f"shot_{i:06d}.exr", f"proj_shot_{i:06d}.exr") for i in range(count)]
+        for src, _ in pairs:
+            open(os.path.join(tmp, src), "wb").close()
+        start = time.perf_counter()
+        results = execute_renames(tmp, pairs, workers=workers, rename_fn=slow_rename)
+        elapsed = time.perf_counter() - start
+        assert all(r.ok for r in results)
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=STRATEGIES["drvfs"].rename_workers)
+    args = parser.parse_args()
+    latency_s = args.latency_ms / 1000
+
+    serial = timed_run(args.count, 1, latency_s)
+    pooled = timed_run(args.count, args.workers, latency_s)
+    print(f"{args.count} renames, {args.latency_ms} ms simulated latency")
+    for label, seconds in (("serial", serial), (f"{args.workers} workers", pooled)):
+        print(f"{label:>10}: {seconds:.3f}s, {args.count / seconds:,.0f} renames/sec")
+    print(f"{'speedup':>10}: {serial / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Dataset action reports: the old path (rows buffered in a list, written to
+__reports, then copied into the temp dir, reimplemented here) versus
+ReportWriter streaming rows as they are produced, plain and gzip.
+Reports time, peak Python memory and bytes written.
+
+    python Code/neura-ui/tests/benchmarks/bench_report_writer.py --rows 1000000
+"""
+
+import argparse
+import csv
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+from report_writer import ReportWriter  # noqa: E402
+
+HEADERS = ["relative_path", "action", "old_head", "new_head"]
+
+
+def rows(count: int):
+    for i in range(count):
+        text = f"a photo of subject {i % 5000}, studio light"
+        yield [f"set_{i % 16:02d}/img_{i:07d}.txt", "changed", text, "portrait, " + text]
+
+
+def old_report(base: Path, count: int) -> int:
+    summary_rows = list(rows(count))
+    reports = base / "__reports"
+    reports.mkdir(parents=True, exist_ok=True)
+    persistent = reports / "prefix_suffix_old.csv"
+    with persistent.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(summary_rows)
+    temp_dir = base / "temp_copy"
+    temp_dir.mkdir(exist_ok=True)
+    shutil.copy2(persistent, temp_dir / persistent.name)
+    return persistent.stat().st_size * 2
+
+
+def new_report(base: Path, count: int, compress: bool) -> int:
+    with ReportWriter(base, "prefix_suffix", HEADERS, compress) as report:
+        for row in rows(count):
+            report.write(row)
+    return report.path.stat().st_size
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    written = fn(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.rows} report rows")
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp)
+        for label, fn, extra in (
+            ("buffered+copy", old_report, ()),
+            ("stream", new_report, (False,)),
+            ("stream gzip", new_report, (True,)),
+        ):
+            elapsed, peak, written = measure(fn, base, args.rows, *extra)
+            print(f"{label:>14}: {elapsed:.2f}s, peak {peak / 2**20:.1f} MiB, {written / 2**20:.1f} MiB written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Listing a dataset's undo snapshots: reading every manifest and walking
+every snapshot folder (what listing them took before the catalog) versus
+the cached catalog, plus the time to prune down to the last 10.
+
+    python Code/neura-ui/tests/benchmarks/bench_snapshot_catalog.py --snapshots 300 --files 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+from snapshot_store import (  # noqa: E402
+    RetentionPolicy,
+    list_snapshot_ids,
+    load_catalog,
+    pack_sizes,
+    prune_snapshots,
+    write_snapshot,
+)
+
+
+def walk_listing(undo: Path):
+    rows = []
+    for snapshot_id in list_snapshot_ids(undo):
+        manifest = json.loads((undo / snapshot_id / "manifest.json").read_text(encoding="utf-8"))
+        size = 0
+        for root, _, names in os.walk(undo / snapshot_id):
+            size += sum(os.stat(os.path.join(root, name)).st_size for name in names)
+        rows.append((snapshot_id, len(manifest["files"]), size))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshots", type=int, default=300)
+    parser.add_argument("--files", type=int, default=2000)
+    args = parser.parse_args()
+    rels = [f"img_{i:06d}.txt" for i in range(args.files)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        undo = Path(tmp) / "__undo"
+        texts = [f"a photo of subject {i}" for i in range(args.files)]
+        start = time.perf_counter()
+        for run in range(args.snapshots):
+            after = [f"{text}, v{run}" for text in texts]
+            write_snapshot(undo, Path(tmp), rels, texts, after)
+            texts = after
+        written = time.perf_counter() - start
+
+        start = time.perf_counter()
+        walked = walk_listing(undo)
+        walk_time = time.perf_counter() - start
+        (undo / "catalog.json").unlink()
+        start = time.perf_counter()
+        load_catalog(undo)
+        rebuild_time = time.perf_counter() - start
+        start = time.perf_counter()
+        infos = load_catalog(undo)
+        cached_time = time.perf_counter() - start
+        assert [(info.snapshot_id, info.files) for info in infos] == [row[:2] for row in walked]
+
+        before_bytes = sum(info.bytes for info in infos) + sum(pack_sizes(undo).values())
+        start = time.perf_counter()
+        result = prune_snapshots(undo, RetentionPolicy(keep_last=10, max_bytes=None))
+        prune_time = time.perf_counter() - start
+
+    print(f"{args.snapshots} snapshots of {args.files} captions (written in {written:.1f}s)")
+    print(f"{'walk':>16}: {walk_time * 1000:.1f} ms")
+    print(f"{'catalog rebuild':>16}: {rebuild_time * 1000:.1f} ms")
+    print(f"{'catalog cached':>16}: {cached_time * 1000:.1f} ms ({walk_time / cached_time:.0f}x)")
+    print(
+        f"{'prune to 10':>16}: {prune_time * 1000:.1f} ms, removed {len(result.removed)} snapshots and "
+        f"{len(result.removed_packs)} packs, freed {result.freed_bytes / 2**20:.1f} of {before_bytes / 2**20:.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
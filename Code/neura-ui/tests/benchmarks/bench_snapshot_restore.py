@@ -0,0 +1,77 @@
+"""
+Snapshot restore: rolling a whole run back with one worker versus the
+pool, then the common follow-ups that the hash check turns into mostly
+reads (restoring again after 1% of the captions were edited, and a glob
+selecting one subfolder). --latency-ms adds a sleep before each caption
+read and write to stand in for the round-trip of a WSL DrvFs or SMB mount.
+
+    python Code/neura-ui/tests/benchmarks/bench_snapshot_restore.py --count 100000
+    python Code/neura-ui/tests/benchmarks/bench_snapshot_restore.py --count 5000 --latency-ms 1
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+BENCH_DIR = Path(__file__).resolve().parent
+for path in (CODE_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import dataset_actions_core  # noqa: E402
+from bench_caption_load import make_dataset  # noqa: E402
+from bench_caption_run import OPERATIONS, add_latency  # noqa: E402
+from fs_paths import STRATEGIES  # noqa: E402
+
+
+def timed_restore(folder: Path, snapshot_id: str, mode: str, workers: int, **selection):
+    start = time.perf_counter()
+    result = dataset_actions_core.restore_snapshot_files(str(folder), snapshot_id, mode, workers=workers, **selection)
+    elapsed = time.perf_counter() - start
+    assert not result["errors"], result["errors"][:3]
+    return elapsed, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=STRATEGIES["drvfs"].io_workers)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        make_dataset(folder, args.count)
+        result = dataset_actions_core.run_caption_prefix_suffix(
+            str(folder), [], True, "", "", False, False, OPERATIONS, workers=args.workers
+        )
+        snapshot_id = result["snapshot_id"]
+        if args.latency_ms:
+            add_latency(args.latency_ms / 1000)
+
+        print(f"{args.count} captions, {args.latency_ms} ms simulated latency")
+        serial, _ = timed_restore(folder, snapshot_id, "before", 1)
+        timed_restore(folder, snapshot_id, "after", args.workers)
+        pooled, _ = timed_restore(folder, snapshot_id, "before", args.workers)
+        print(
+            f"{'full':>10}: serial {serial:.2f}s, {args.workers} workers {pooled:.2f}s ({serial / pooled:.1f}x)"
+        )
+
+        txts = sorted(p for p in folder.rglob("*.txt") if "__undo" not in p.parts)
+        for p in txts[::100]:
+            p.write_text("edited", encoding="utf-8")
+        edited, res = timed_restore(folder, snapshot_id, "before", args.workers)
+        print(f"{'1% edited':>10}: {edited:.2f}s, restored {res['restored']}, skipped {res['skipped']}")
+
+        sub = txts[0].parent.relative_to(folder).as_posix()
+        timed_restore(folder, snapshot_id, "after", args.workers)
+        subset, res = timed_restore(folder, snapshot_id, "before", args.workers, pattern=f"{sub}/*")
+        print(f"{'glob':>10}: {subset:.2f}s, restored {res['restored']} of {args.count} ({sub}/*)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Caption undo snapshots: the old layout (one before/ and one after/ file
+per caption plus an indented manifest, reimplemented here) versus the
+packed store in snapshot_store.py. Reports write time, files created,
+bytes on disk, and the time to read every "before" text back.
+
+    python Code/neura-ui/tests/benchmarks/bench_snapshot_store.py --count 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+if str(CODE_DIR) not in sys.path:
+    sys.path.insert(0, str(CODE_DIR))
+
+from snapshot_store import read_blobs, write_snapshot  # noqa: E402
+
+
+def old_snapshot(undo: Path, rels, before, after) -> Path:
+    snap_dir = undo / "old"
+    for which, texts in (("before", before), ("after", after)):
+        for rel, text in zip(rels, texts):
+            dst = snap_dir / which / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            dst.write_text(text, encoding="utf-8")
+    manifest = {"base": "", "files": list(rels), "created_at": "", "version": 2}
+    (snap_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return snap_dir
+
+
+def tree_usage(path: Path):
+    files = 0
+    size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.stat(os.path.join(root, name)).st_blocks * 512
+    return files, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    rels = [f"set_{i % 16:02d}/img_{i:07d}.txt" for i in range(args.count)]
+    before = [f"a photo of subject {i % 5000}, studio light" for i in range(args.count)]
+    after = ["portrait, " + text for text in before]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        undo = Path(tmp) / "old_undo"
+        start = time.perf_counter()
+        snap_dir = old_snapshot(undo, rels, before, after)
+        old_write = time.perf_counter() - start
+        start = time.perf_counter()
+        old_texts = [(snap_dir / "before" / rel).read_text(encoding="utf-8") for rel in rels]
+        old_read = time.perf_counter() - start
+        old_files, old_bytes = tree_usage(undo)
+
+        undo = Path(tmp) / "new_undo"
+        start = time.perf_counter()
+        manifest = write_snapshot(undo, Path(tmp), rels, before, after)
+        new_write = time.perf_counter() - start
+        start = time.perf_counter()
+        texts = read_blobs(undo, manifest, manifest.before)
+        new_texts = [texts[h] for h in manifest.before]
+        new_read = time.perf_counter() - start
+        new_files, new_bytes = tree_usage(undo)
+        assert new_texts == old_texts == before
+
+        # a second run whose before is the first one's after
+        start = time.perf_counter()
+        chained = write_snapshot(undo, Path(tmp), rels, after, [text + ", v2" for text in after])
+        chained_write = time.perf_counter() - start
+
+    print(f"{args.count} captions ({len(manifest.blobs)} unique texts)")
+    print(f"{'old':>8}: write {old_write:.2f}s, read {old_read:.2f}s, {old_files} files, {old_bytes / 2**20:.1f} MiB")
+    print(f"{'packed':>8}: write {new_write:.2f}s, read {new_read:.2f}s, {new_files} files, {new_bytes / 2**20:.1f} MiB")
+    print(f"{'chained':>8}: write {chained_write:.2f}s, own pack {chained.pack_bytes / 2**20:.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
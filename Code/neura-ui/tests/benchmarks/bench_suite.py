@@ -0,0 +1,233 @@
+"""
+End-to-end rename benchmark over synthetic folders. For every size and
+name distribution (see synthetic_folders.py) it measures:
+
+- compute_new_names latency (cold listing, then warm from folder_index)
+- /preview and /run latency through the FastAPI app, /run as files/sec
+- peak Python memory of a preview (tracemalloc, measured on a separate pass)
+- filesystem calls issued by preview and run (os.scandir/stat/rename/...),
+  plus read/write syscalls from /proc/self/io where available
+
+Results go to a JSON report; pass an older report with --compare to print
+the ratio of each metric.
+
+    python Code/neura-ui/tests/benchmarks/bench_suite.py --sizes 10000 100000 --out bench.json
+    python Code/neura-ui/tests/benchmarks/bench_suite.py --sizes 1000000 --compare bench.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[4]
+CODE_DIR = REPO_ROOT / "Code"
+BENCH_DIR = Path(__file__).resolve().parent
+for path in (CODE_DIR, BENCH_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+spec = importlib.util.spec_from_file_location("max_api", CODE_DIR / "Option_C-Max-API.py")
+max_api = importlib.util.module_from_spec(spec)
+sys.modules["max_api"] = max_api
+spec.loader.exec_module(max_api)  # type: ignore
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import synthetic_folders  # noqa: E402
+from folder_index import RACY_WINDOW_NS  # noqa: E402
+from fs_paths import io_strategy  # noqa: E402
+
+COUNTED_CALLS = ("scandir", "stat", "lstat", "rename", "listdir", "open")
+LOWER_IS_BETTER = (
+    "compute_cold_s",
+    "compute_warm_s",
+    "preview_s",
+    "run_s",
+    "preview_peak_mb",
+    "preview_fs_calls",
+    "run_fs_calls",
+)
+
+
+@contextlib.contextmanager
+def count_fs_calls():
+    """Count calls to the os functions the rename paths use; each is one syscall (scandir: per directory)."""
+    counts: Counter = Counter()
+    originals = {name: getattr(os, name) for name in COUNTED_CALLS}
+
+    def wrap(name, fn):
+        def counted(*args, **kwargs):
+            counts[name] += 1
+            return fn(*args, **kwargs)
+
+        return counted
+
+    for name, fn in originals.items():
+        setattr(os, name, wrap(name, fn))
+    try:
+        yield counts
+    finally:
+        for name, fn in originals.items():
+            setattr(os, name, fn)
+
+
+def proc_io():
+    try:
+        with open("/proc/self/io", encoding="ascii") as fh:
+            return {k: int(v) for k, v in (line.split(": ") for line in fh.read().splitlines())}
+    except OSError:
+        return {}
+
+
+def io_delta(before, after):
+    return {key: after[key] - before[key] for key in ("syscr", "syscw") if key in before and key in after}
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "-C", str(REPO_ROOT), "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_case(client: TestClient, root: str, distribution: str, count: int, engine: str) -> dict:
+    folder = os.path.join(root, f"{distribution}_{count}")
+    names, ops = synthetic_folders.generate(distribution, count)
+    synthetic_folders.materialize(folder, names)
+    # let the folder age past the racy-mtime window so the listing is cached
+    time.sleep(RACY_WINDOW_NS / 1e9 + 0.1)
+    max_api.folder_index.invalidate()
+    # the step-column memo would otherwise carry warm results between phases
+    # and from the previous case
+    max_api.preview_memo.invalidate()
+    plan = max_api.RenamePlan([max_api.Operation(**op) for op in ops])
+    result = {"distribution": distribution, "count": len(names), "engine": engine}
+
+    start = time.perf_counter()
+    _, _, summary = max_api.compute_new_names(folder, plan)
+    result["compute_cold_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    max_api.compute_new_names(folder, plan)
+    result["compute_warm_s"] = time.perf_counter() - start
+    result["renamed"] = summary.renamed
+    result["collisions"] = summary.collisions
+
+    body = {"folder": folder, "operations": ops, "engine": engine}
+    max_api.preview_memo.invalidate()
+    before = proc_io()
+    with count_fs_calls() as counts:
+        start = time.perf_counter()
+        resp = client.post("/preview", json=body)
+        result["preview_s"] = time.perf_counter() - start
+    result["preview_fs_calls"] = sum(counts.values())
+    result["preview_syscalls"] = io_delta(before, proc_io())
+    assert resp.status_code == 200, resp.text
+    plan_id = resp.json()["plan_id"]
+    del resp
+
+    max_api.preview_memo.invalidate()
+    tracemalloc.start()
+    max_api.compute_new_names(folder, plan)
+    result["preview_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+
+    before = proc_io()
+    with count_fs_calls() as counts:
+        start = time.perf_counter()
+        resp = client.post("/run", json={"folder": folder, "plan_id": plan_id})
+        result["run_s"] = time.perf_counter() - start
+    result["run_fs_calls"] = sum(counts.values())
+    result["run_fs_calls_by_name"] = dict(counts)
+    result["run_syscalls"] = io_delta(before, proc_io())
+    assert resp.status_code == 200, resp.text
+    errors = resp.json()["errors"]
+    result["run_errors"] = len(errors)
+    result["run_files_per_s"] = summary.renamed / result["run_s"] if result["run_s"] else 0.0
+
+    shutil.rmtree(folder, ignore_errors=True)
+    max_api.folder_index.invalidate()
+    max_api.preview_memo.invalidate()
+    return result
+
+
+def compare(report: dict, baseline: dict) -> None:
+    old = {(r["distribution"], r["count"], r["engine"]): r for r in baseline.get("results", [])}
+    print(f"\ncompared with {baseline.get('revision', '?')} (ratio new/old, <1 is faster/smaller)")
+    for row in report["results"]:
+        prev = old.get((row["distribution"], row["count"], row["engine"]))
+        if prev is None:
+            continue
+        ratios = ", ".join(
+            f"{key}={row[key] / prev[key]:.2f}" for key in LOWER_IS_BETTER if prev.get(key)
+        )
+        print(f"{row['distribution']:>10} {row['count']:>8} {row['engine']:>8}: {ratios}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument(
+        "--distributions",
+        nargs="+",
+        choices=synthetic_folders.DISTRIBUTIONS,
+        default=list(synthetic_folders.DISTRIBUTIONS),
+    )
+    parser.add_argument("--engine", choices=["python", "columnar"], default="python")
+    parser.add_argument("--root", help="where to create the folders (default: a temp dir)")
+    parser.add_argument("--out", default="bench_report.json")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    root = args.root or tempfile.mkdtemp(prefix="rename-bench-")
+    client = TestClient(max_api.app)
+    report = {
+        "revision": git_revision(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "io_strategy": io_strategy(root).kind,
+        "results": [],
+    }
+    try:
+        for count in args.sizes:
+            for distribution in args.distributions:
+                row = bench_case(client, root, distribution, count, args.engine)
+                report["results"].append(row)
+                print(
+                    f"{distribution:>10} {row['count']:>8}: compute {row['compute_warm_s']:.3f}s, "
+                    f"preview {row['preview_s']:.3f}s, run {row['run_files_per_s']:.0f} files/s, "
+                    f"peak {row['preview_peak_mb']:.1f} MB, fs calls {row['preview_fs_calls']}/{row['run_fs_calls']}"
+                )
+    finally:
+        if not args.root:
+            shutil.rmtree(root, ignore_errors=True)
+    report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"report written to {args.out}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            compare(report, json.load(fh))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic folder generators for the rename benchmarks. Each distribution
+returns the file names to create plus the operations that exercise it.
+
+- uniform: distinct names, a prefix/suffix pass with no collisions.
+- collision: four throwaway tags on each take; stripping them sends every
+  take's files (and an untagged original) to one candidate name.
+- delimiter: prefixes/suffixes glued with every delimiter in DELIMS, plus
+  names where the value only appears mid-word, so the delimiter rules in
+  the apply_* helpers decide the outcome.
+"""
+
+import os
+import random
+from typing import Dict, List, Tuple
+
+DELIMS = ["_", "-", ".", ","]
+EXTS = [".png", ".jpg", ".exr", ".txt"]
+DISTRIBUTIONS = ("uniform", "collision", "delimiter")
+
+
+def uniform(count: int, rng: random.Random) -> Tuple[List[str], List[Dict]]:
+    names = [f"shot_{i:07d}{EXTS[i % len(EXTS)]}" for i in range(count)]
+    ops = [
+        {"step": 1, "type": "add_prefix", "value": "proj"},
+        {"step": 2, "type": "add_suffix", "value": "v2"},
+    ]
+    return names, ops
+
+
+def collision(count: int, rng: random.Random) -> Tuple[List[str], List[Dict]]:
+    tags = ["draft", "wip", "tmp", "old"]
+    takes = max(count // (len(tags) + 1), 1)
+    names = []
+    for i in range(count):
+        take, slot = divmod(i, len(tags) + 1)
+        base = f"take_{take % takes:06d}.png"
+        names.append(base if slot == len(tags) else f"{tags[slot]}-{base}")
+    ops = [{"step": n + 1, "type": "remove_prefix", "value": tag} for n, tag in enumerate(tags)]
+    return sorted(set(names)), ops
+
+
+def delimiter(count: int, rng: random.Random) -> Tuple[List[str], List[Dict]]:
+    names = set()
+    i = 0
+    while len(names) < count:
+        d1, d2, d3 = rng.choice(DELIMS), rng.choice(DELIMS), rng.choice(DELIMS)
+        ext = rng.choice(EXTS)
+        shape = i % 4
+        if shape == 0:
+            name = f"raw{d1}clip{d2}{i:07d}{d3}final{ext}"
+        elif shape == 1:
+            name = f"rawclip{d2}{i:07d}finalcut{ext}"
+        elif shape == 2:
+            name = f"{d1}raw{d2}{i:07d}{d3}final{d1}{ext}"
+        else:
+            name = f"clip{d1}{i:07d}{d2}{d3}{ext}"
+        names.add(name)
+        i += 1
+    ops = [
+        {"step": 1, "type": "remove_prefix", "value": "raw"},
+        {"step": 2, "type": "remove_suffix", "value": "final"},
+        {"step": 3, "type": "add_prefix", "value": "cut."},
+        {"step": 4, "type": "add_suffix", "value": ",v1"},
+    ]
+    return sorted(names), ops
+
+
+GENERATORS = {"uniform": uniform, "collision": collision, "delimiter": delimiter}
+
+
+def generate(distribution: str, count: int, seed: int = 0) -> Tuple[List[str], List[Dict]]:
+    return GENERATORS[distribution](count, random.Random(seed))
+
+
+def materialize(folder: str, names: List[str]) -> None:
+    """Create empty files; O_CREAT without writing keeps 1M-entry folders cheap."""
+    os.makedirs(folder, exist_ok=True)
+    flags = os.O_CREAT | os.O_WRONLY
+    for name in names:
+        os.close(os.open(os.path.join(folder, name), flags, 0o644))
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from folder_index import FolderListing
+from rename_core import RenamePlan, ResolvedNames, resolve_candidates
+
+# Folders whose step columns are kept, and the total names across them;
+# the least recently previewed folder is dropped first.
+MAX_MEMO_FOLDERS = 64
+MAX_MEMO_NAMES = 2_000_000
+
+StepKey = Tuple[str, str]
+
+
+class StepColumns:
+    """
+    One listing split into base names and extensions, plus the base-name
+    column after each step of the last plan previewed on it. A plan sharing
+    its first k steps with that one starts from column k.
+    """
+
+    def __init__(self, listing: FolderListing):
+        self.listing = listing
+        self.names: Sequence[str] = listing.files
+        split = [os.path.splitext(name) for name in self.names]
+        self.bases: List[str] = [base for base, _ in split]
+        self.exts: List[str] = [ext for _, ext in split]
+        self.columns: List[Tuple[StepKey, List[str]]] = []
+        self.last: Optional[Tuple[Tuple[StepKey, ...], List[str], ResolvedNames]] = None
+        self._lock = threading.Lock()
+        self.steps_reused = 0
+        self.steps_applied = 0
+
+    def candidates(self, plan: RenamePlan) -> List[str]:
+        with self._lock:
+            columns = self.columns
+        keys = plan.step_keys
+        reuse = 0
+        while reuse < len(keys) and reuse < len(columns) and columns[reuse][0] == keys[reuse]:
+            reuse += 1
+        new_columns = columns[:reuse]
+        column = new_columns[-1][1] if new_columns else self.bases
+        for key, transform in zip(keys[reuse:], plan.step_transforms[reuse:]):
+            if transform is not None:
+                column = [transform(base) for base in column]
+            new_columns.append((key, column))
+        with self._lock:
+            self.columns = new_columns
+            self.steps_reused += reuse
+            self.steps_applied += len(keys) - reuse
+        if not plan.transforms:
+            return list(self.names)
+        return [base + ext for base, ext in zip(column, self.exts)]
+
+    def resolve(self, plan: RenamePlan) -> ResolvedNames:
+        """
+        Final names for `plan`. When the candidates equal the previous
+        preview's, its collision resolution is reused as is; otherwise only
+        conflicted rows are resolved (rename_core.resolve_candidates).
+        """
+        last = self.last
+        if last is not None and last[0] == plan.step_keys:
+            return last[2]
+        candidates = self.candidates(plan)
+        if last is not None and last[1] == candidates:
+            result = last[2]
+        else:
+            result = resolve_candidates(self.names, candidates)
+        self.last = (plan.step_keys, candidates, result)
+        return result
+
+
+class PreviewMemo:
+    def __init__(self, max_folders: int = MAX_MEMO_FOLDERS, max_names: int = MAX_MEMO_NAMES):
+        self._entries: "OrderedDict[str, StepColumns]" = OrderedDict()
+        self._max_folders = max_folders
+        self._max_names = max_names
+        self._lock = threading.Lock()
+
+    def columns_for(self, folder: str, listing: FolderListing) -> StepColumns:
+        """Step columns for `folder`, rebuilt when its listing has changed."""
+        with self._lock:
+            cached = self._entries.get(folder)
+            if cached is not None and (cached.names is listing.files or cached.names == listing.files):
+                self._entries.move_to_end(folder)
+                return cached
+        columns = StepColumns(listing)
+        with self._lock:
+            self._entries[folder] = columns
+            self._entries.move_to_end(folder)
+            total = sum(len(entry.names) for entry in self._entries.values())
+            while len(self._entries) > 1 and (
+                len(self._entries) > self._max_folders or total > self._max_names
+            ):
+                _, dropped = self._entries.popitem(last=False)
+                total -= len(dropped.names)
+        return columns
+
+    def invalidate(self, folder: Optional[str] = None) -> None:
+        with self._lock:
+            if folder is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(folder, None)
+
+
+preview_memo = PreviewMemo()
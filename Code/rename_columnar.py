@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from typing import List, Sequence
+
+from rename_core import DELIMS, CollisionIndex, RenamePlan, ResolvedNames, resolve_sequential
+
+try:
+    import numpy as np
+except ImportError:  # optional: the per-name engine is used instead
+    np = None
+
+# Folders smaller than this are not worth converting to arrays.
+MIN_COLUMNAR_NAMES = 2048
+
+
+def columnar_available() -> bool:
+    """numpy >= 2.3 provides the np.strings ufuncs (including slice) used here."""
+    return np is not None and hasattr(np, "strings") and hasattr(np.strings, "slice")
+
+
+def _is_delim(chars):
+    mask = chars == DELIMS[0]
+    for delim in DELIMS[1:]:
+        mask |= chars == delim
+    return mask
+
+
+def _apply_operation(base, op_type: str, value: str):
+    """Whole-array version of the matching apply_* helper in rename_core."""
+    S = np.strings
+    if not value:
+        return base
+    if op_type == "add_prefix":
+        return S.add(value if value[-1] in DELIMS else value + "-", base)
+    if op_type == "add_suffix":
+        return S.add(base, value if value[0] in DELIMS else "-" + value)
+    cut = len(value)
+    length = S.str_len(base)
+    if op_type == "remove_prefix":
+        hit = S.startswith(base, value)
+        strip = hit & (length > cut) & _is_delim(S.slice(base, cut, cut + 1))
+        start = np.where(hit, cut + strip, 0)
+        return S.slice(base, start, length)
+    if op_type == "remove_suffix":
+        hit = S.endswith(base, value)
+        end = length - cut
+        before = S.slice(base, np.maximum(end - 1, 0), np.maximum(end, 0))
+        strip = hit & (end > 0) & _is_delim(before)
+        stop = np.where(hit, end - strip, length)
+        return S.slice(base, 0, stop)
+    return base
+
+
+def _split_ext(names):
+    """Whole-array os.path.splitext: the last dot starts the extension unless only dots precede it."""
+    S = np.strings
+    head, sep, tail = S.rpartition(names, np.array(".", dtype=np.dtypes.StringDType()))
+    has_ext = sep == "."
+    dotted = np.flatnonzero(has_ext & S.startswith(names, "."))
+    if dotted.size:
+        only_dots = S.str_len(S.lstrip(head[dotted], ".")) == 0
+        has_ext[dotted[only_dots]] = False
+    if has_ext.all():
+        return head, S.add(sep, tail)
+    return np.where(has_ext, head, names), np.where(has_ext, S.add(sep, tail), "")
+
+
+def _candidates(names, plan: RenamePlan):
+    """os.path.splitext, the plan's steps and the re-join, one array op each."""
+    base, ext = _split_ext(names)
+    for op in plan.operations:
+        base = _apply_operation(base, op.type, op.value)
+    return np.strings.add(base, ext)
+
+
+def _claimed_twice(cand):
+    """Mask of rows whose candidate appears more than once in the folder."""
+    ordered = np.sort(cand)
+    if not (ordered[1:] == ordered[:-1]).any():
+        return np.zeros(cand.shape, dtype=bool)
+    _, inverse, counts = np.unique(cand, return_inverse=True, return_counts=True)
+    return counts[inverse] > 1
+
+
+def resolve_columnar(names: Sequence[str], plan: RenamePlan) -> ResolvedNames:
+    """
+    Same result as running iter_new_names over `names`, computed on string
+    arrays. A sort/unique pass finds candidates claimed more than once; only
+    those rows go through CollisionIndex, in folder order. If a `_N` name it
+    hands out equals another row's candidate, ordering matters across the
+    whole folder and the full sequential pass is used instead.
+    """
+    arr = np.array(names, dtype=np.dtypes.StringDType())
+    cand = _candidates(arr, plan)
+    renamed = cand != arr
+    conflicted = renamed & _claimed_twice(cand)
+
+    new_names = cand.tolist()
+    if not conflicted.any():
+        return ResolvedNames(new_names=new_names, renamed=int(renamed.sum()), collisions=0)
+
+    name_list = list(names)
+    staying = set(arr[~renamed].tolist())
+    index = CollisionIndex(staying)
+    rows = np.flatnonzero(conflicted)
+    result = ResolvedNames(new_names=new_names, renamed=int((renamed & ~conflicted).sum()), collisions=0)
+    picked: List[str] = []
+    for row in rows.tolist():
+        fname = name_list[row]
+        final_name, collided = index.resolve(fname, new_names[row])
+        if collided:
+            result.collisions += 1
+            result.collided.add(fname)
+            picked.append(final_name)
+        if final_name != fname:
+            result.renamed += 1
+        new_names[row] = final_name
+
+    if picked and np.isin(
+        np.array(picked, dtype=np.dtypes.StringDType()), cand[renamed & ~conflicted]
+    ).any():
+        return resolve_sequential(name_list, cand.tolist())
+    return result
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Protocol, Sequence, Set, Tuple
+
+DELIMS = ['_', '-', '.', ',']
+
+
+class Step(Protocol):
+    """One rename operation as sent by the dashboard (the API's Operation model)."""
+
+    step: int
+    type: str
+    value: str
+
+
+def apply_add_prefix(base: str, prefix: str) -> str:
+    if not prefix:
+        return base
+    if prefix[-1] in DELIMS:
+        return prefix + base
+    return prefix + "-" + base
+
+
+def apply_remove_prefix(base: str, prefix: str) -> str:
+    if not prefix:
+        return base
+    if base.startswith(prefix):
+        new_base = base[len(prefix):]
+        if new_base and new_base[0] in DELIMS:
+            new_base = new_base[1:]
+        return new_base
+    return base
+
+
+def apply_add_suffix(base: str, suffix: str) -> str:
+    if not suffix:
+        return base
+    if suffix[0] in DELIMS:
+        return base + suffix
+    return base + "-" + suffix
+
+
+def apply_remove_suffix(base: str, suffix: str) -> str:
+    if not suffix:
+        return base
+    if base.endswith(suffix):
+        new_base = base[:-len(suffix)]
+        if new_base and new_base[-1] in DELIMS:
+            new_base = new_base[:-1]
+        return new_base
+    return base
+
+
+def _compile_operation(op_type: str, value: str) -> Optional[Callable[[str], str]]:
+    """
+    Bind one step to a single-argument transform with its delimiter check
+    resolved up front. Mirrors the apply_* helpers; None means a no-op step.
+    """
+    if not value:
+        return None
+    if op_type == "add_prefix":
+        head = value if value[-1] in DELIMS else value + "-"
+        return lambda base: head + base
+    if op_type == "add_suffix":
+        tail = value if value[0] in DELIMS else "-" + value
+        return lambda base: base + tail
+    if op_type == "remove_prefix":
+        cut = len(value)
+
+        def remove_prefix(base: str) -> str:
+            if not base.startswith(value):
+                return base
+            if len(base) > cut and base[cut] in DELIMS:
+                return base[cut + 1:]
+            return base[cut:]
+
+        return remove_prefix
+    if op_type == "remove_suffix":
+        cut = len(value)
+
+        def remove_suffix(base: str) -> str:
+            if not base.endswith(value):
+                return base
+            end = len(base) - cut
+            if end and base[end - 1] in DELIMS:
+                return base[:end - 1]
+            return base[:end]
+
+        return remove_suffix
+    return None
+
+
+class RenamePlan:
+    """
+    The operation list compiled once into an ordered chain of transforms so
+    preview and run apply it per file without re-sorting or re-dispatching.
+    """
+
+    def __init__(self, operations: Sequence[Step]):
+        ops_sorted = sorted(operations, key=lambda o: o.step)
+        self.operations = ops_sorted
+        # one (type, value) key and transform (None for a no-op) per step,
+        # so intermediate results can be memoized by step prefix
+        self.step_keys = tuple((op.type, op.value) for op in ops_sorted)
+        self.step_transforms = tuple(_compile_operation(op.type, op.value) for op in ops_sorted)
+        self.transforms = tuple(fn for fn in self.step_transforms if fn is not None)
+
+    def apply_base(self, base: str) -> str:
+        for transform in self.transforms:
+            base = transform(base)
+        return base
+
+    def candidate(self, fname: str) -> str:
+        if not self.transforms:
+            return fname
+        base, ext = os.path.splitext(fname)
+        for transform in self.transforms:
+            base = transform(base)
+        return base + ext
+
+
+class CollisionIndex:
+    """
+    Targets claimed so far in one folder plus, per (root, ext), the lowest
+    `_N` counter that may still be free, so a crowded root is never rescanned
+    from `_1`. Resolves to the same names as a fresh scan would.
+    """
+
+    def __init__(self, existing_names: Set[str]):
+        self.existing_names = existing_names
+        self.used_targets: Set[str] = set()
+        self._next_free: Dict[Tuple[str, str], int] = {}
+
+    def resolve(self, fname: str, candidate: str) -> Tuple[str, bool]:
+        """Return (final_name, collided) and claim final_name."""
+        final_name = candidate
+        collided = False
+        if candidate != fname and (
+            candidate in self.used_targets or candidate in self.existing_names
+        ):
+            collided = True
+            final_name = self._next_name(fname, candidate)
+        self.used_targets.add(final_name)
+        return final_name, collided
+
+    def _next_name(self, fname: str, candidate: str) -> str:
+        root, ex = os.path.splitext(candidate)
+        key = (root, ex)
+        counter = self._next_free.get(key, 1)
+        if counter > 1 and fname not in self.used_targets:
+            # Counters below the memo were only skipped for being taken; the
+            # one spelling this file's own name is free for it to keep.
+            own = _suffix_counter(fname, root, ex)
+            if own is not None and own < counter:
+                return fname
+        used_targets = self.used_targets
+        existing_names = self.existing_names
+        new_candidate = f"{root}_{counter}{ex}"
+        while new_candidate in used_targets or (
+            new_candidate in existing_names and new_candidate != fname
+        ):
+            counter += 1
+            new_candidate = f"{root}_{counter}{ex}"
+        self._next_free[key] = counter + 1
+        return new_candidate
+
+
+def _suffix_counter(name: str, root: str, ext: str) -> Optional[int]:
+    """N when `name` is exactly f"{root}_{N}{ext}", else None."""
+    head = len(root) + 1
+    tail = len(name) - len(ext)
+    if tail <= head or not name.startswith(root + "_") or not name.endswith(ext):
+        return None
+    digits = name[head:tail]
+    if not (digits.isascii() and digits.isdigit()) or digits[0] == "0":
+        return None
+    return int(digits)
+
+
+@dataclass
+class ResolvedNames:
+    new_names: List[str]
+    renamed: int
+    collisions: int
+    # original names that needed a `_N` suffix
+    collided: Set[str] = field(default_factory=set)
+
+
+def resolve_sequential(names: Sequence[str], candidates: Sequence[str]) -> ResolvedNames:
+    """CollisionIndex over every row in folder order, as iter_new_names does."""
+    staying = {n for n, c in zip(names, candidates) if n == c}
+    index = CollisionIndex(staying)
+    result = ResolvedNames(new_names=[], renamed=0, collisions=0)
+    for fname, candidate in zip(names, candidates):
+        final_name, collided = index.resolve(fname, candidate)
+        if collided:
+            result.collisions += 1
+            result.collided.add(fname)
+        if final_name != fname:
+            result.renamed += 1
+        result.new_names.append(final_name)
+    return result
+
+
+def resolve_candidates(names: Sequence[str], candidates: Sequence[str]) -> ResolvedNames:
+    """
+    Same result as resolve_sequential, resolving only conflicted rows: those
+    whose candidate is claimed more than once or by a file keeping its name.
+    Every other row keeps its candidate. If a `_N` name handed out equals
+    one of those clean candidates, ordering matters across the whole folder
+    and the sequential pass is used instead.
+    """
+    staying = {n for n, c in zip(names, candidates) if n == c}
+    counts = Counter(candidates)
+    conflicted = [
+        i for i, (fname, candidate) in enumerate(zip(names, candidates))
+        if candidate != fname and (counts[candidate] > 1 or candidate in staying)
+    ]
+    renamed = len(names) - len(staying)
+    new_names = list(candidates)
+    if not conflicted:
+        return ResolvedNames(new_names=new_names, renamed=renamed, collisions=0)
+
+    index = CollisionIndex(staying)
+    result = ResolvedNames(new_names=new_names, renamed=renamed - len(conflicted), collisions=0)
+    for row in conflicted:
+        fname = names[row]
+        final_name, collided = index.resolve(fname, candidates[row])
+        if collided:
+            if counts.get(final_name, 0) == 1 and final_name not in staying:
+                return resolve_sequential(names, candidates)
+            result.collisions += 1
+            result.collided.add(fname)
+        if final_name != fname:
+            result.renamed += 1
+        new_names[row] = final_name
+    return result
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AbstractSet, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fs_paths import io_strategy
+
+if TYPE_CHECKING:
+    from rename_journal import RenameJournal
+
+# Below this many renames the pool costs more than it saves.
+MIN_PARALLEL_RENAMES = 16
+TEMP_PREFIX = ".renametmp-"
+CANCELLED = "cancelled before this rename started"
+
+RenamePair = Tuple[str, str]
+
+
+@dataclass
+class RenameResult:
+    src: str
+    dst: str
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class RenameStep:
+    src: str
+    dst: str
+    # the requested rename this step carries out
+    pair: RenamePair
+    # False for the first half of a temp hop used to break a cycle
+    final: bool = True
+
+
+def _temp_name() -> str:
+    return f"{TEMP_PREFIX}{uuid.uuid4().hex}"
+
+
+def plan_chains(pairs: Sequence[RenamePair]) -> List[List[RenameStep]]:
+    """
+    Order renames by their dependency graph. A rename whose target is another
+    rename's source waits until that source has moved away, so each chain is
+    listed in execution order and chains are independent of each other.
+    Cycles (swaps, a->b->c->a) are broken with one hop through a temp name.
+    """
+    by_src: Dict[str, str] = dict(pairs)
+    by_dst: Dict[str, str] = {dst: src for src, dst in pairs}
+    chains: List[List[RenameStep]] = []
+    placed = set()
+
+    def walk_back(start: str, chain: List[RenameStep], stop: Optional[str] = None) -> None:
+        cur = start
+        while cur in by_dst and by_dst[cur] != stop:
+            prev = by_dst[cur]
+            chain.append(RenameStep(prev, cur, (prev, cur)))
+            placed.add(prev)
+            cur = prev
+
+    for src, dst in pairs:
+        if dst in by_src:
+            continue
+        chain = [RenameStep(src, dst, (src, dst))]
+        placed.add(src)
+        walk_back(src, chain)
+        chains.append(chain)
+
+    if len(placed) < len(pairs):
+        for src, dst in pairs:
+            if src in placed:
+                continue
+            # src -> dst is part of a cycle: park src, let the rest of the
+            # cycle shift into the freed name, then move the parked file in.
+            temp = _temp_name()
+            chain = [RenameStep(src, temp, (src, dst), final=False)]
+            placed.add(src)
+            walk_back(src, chain, stop=src)
+            chain.append(RenameStep(temp, dst, (src, dst)))
+            chains.append(chain)
+    return chains
+
+
+def _run_chain(
+    folder: str,
+    chain: List[RenameStep],
+    rename_fn: Callable[[str, str], None],
+    occupied: AbstractSet[str],
+    should_stop: Optional[Callable[[], bool]] = None,
+    chain_index: int = 0,
+    start: int = 0,
+    journal: Optional["RenameJournal"] = None,
+) -> List[RenameResult]:
+    results: Dict[RenamePair, RenameResult] = {}
+    for step in chain[:start]:
+        if step.final:
+            results[step.pair] = RenameResult(*step.pair)
+    if start < len(chain) and should_stop is not None and should_stop():
+        # Only whole chains are skipped, so a cycle is never left parked
+        # under its temp name.
+        for step in chain[start:]:
+            if step.final:
+                results.setdefault(step.pair, RenameResult(step.pair[0], step.pair[1], CANCELLED))
+        return list(results.values())
+    blocked_by: Optional[str] = None
+    for index, step in enumerate(chain[start:], start):
+        src, dst = step.pair
+        if blocked_by is None and index == start and step.dst in occupied:
+            blocked_by = f"target exists and is not being renamed: {step.dst}"
+            results[step.pair] = RenameResult(src, dst, blocked_by)
+            if journal is not None:
+                journal.step_failed(chain_index, index, blocked_by)
+            continue
+        if blocked_by is not None:
+            results.setdefault(
+                step.pair,
+                RenameResult(src, dst, f"skipped: {dst} was not moved out of the way ({blocked_by})"),
+            )
+            continue
+        try:
+            rename_fn(os.path.join(folder, step.src), os.path.join(folder, step.dst))
+        except OSError as exc:
+            results[step.pair] = RenameResult(src, dst, str(exc))
+            blocked_by = str(exc)
+            if journal is not None:
+                journal.step_failed(chain_index, index, blocked_by)
+            continue
+        if journal is not None:
+            journal.step_done(chain_index, index, step)
+        if step.final:
+            results.setdefault(step.pair, RenameResult(src, dst))
+    return list(results.values())
+
+
+def execute_renames(
+    folder: str,
+    pairs: Sequence[RenamePair],
+    workers: Optional[int] = None,
+    rename_fn: Optional[Callable[[str, str], None]] = None,
+    occupied: AbstractSet[str] = frozenset(),
+    progress: Optional[Callable[[int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> List[RenameResult]:
+    """
+    Rename `pairs` (names relative to `folder`) with independent chains
+    running concurrently on a bounded pool, sized by the folder's mount
+    (io_strategy) unless `workers` is given. Every pair gets a result, in the
+    order given; failures carry the OS error instead of being dropped.
+    `occupied` lists names present in the folder, so a rename into one that
+    is not itself being moved is refused instead of overwriting it.
+    `progress(count)` is called from the calling thread as chains finish.
+    Once `should_stop()` returns True, chains not yet started are skipped
+    and their pairs report CANCELLED.
+    """
+    chains = plan_chains(pairs)
+    results = execute_chains(
+        folder, chains, [0] * len(chains), workers, rename_fn, occupied, progress, should_stop
+    )
+    return [results[src] for src, _ in pairs]
+
+
+def execute_chains(
+    folder: str,
+    chains: List[List[RenameStep]],
+    starts: Sequence[int],
+    workers: Optional[int] = None,
+    rename_fn: Optional[Callable[[str, str], None]] = None,
+    occupied: AbstractSet[str] = frozenset(),
+    progress: Optional[Callable[[int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    journal: Optional["RenameJournal"] = None,
+) -> Dict[str, RenameResult]:
+    """
+    Run planned chains, each from its index in `starts` (steps before it
+    are already done, as when resuming a journal). Steps are recorded in
+    `journal` as they complete. Returns results keyed by requested source.
+    """
+    rename_fn = rename_fn or os.rename
+    if workers is None:
+        workers = io_strategy(folder).rename_workers
+    results: Dict[str, RenameResult] = {}
+
+    def run_chain(index: int) -> List[RenameResult]:
+        return _run_chain(
+            folder, chains[index], rename_fn, occupied, should_stop, index, starts[index], journal
+        )
+
+    remaining = sum(len(chain) - start for chain, start in zip(chains, starts))
+    if workers <= 1 or remaining < MIN_PARALLEL_RENAMES:
+        for index in range(len(chains)):
+            chain_results = run_chain(index)
+            for res in chain_results:
+                results[res.src] = res
+            if progress:
+                progress(len(chain_results))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            for chain_results in ex.map(run_chain, range(len(chains))):
+                for res in chain_results:
+                    results[res.src] = res
+                if progress:
+                    progress(len(chain_results))
+    return results
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from dataset_dirs import UNDO_DIR
+from rename_executor import TEMP_PREFIX, RenamePair, RenameStep
+
+# Journals live beside the dataset snapshots: <folder>/__undo/renames/<id>.jsonl
+JOURNAL_DIR = os.path.join(UNDO_DIR, "renames")
+# Completed-step records written between fsyncs. A crash can lose up to this
+# many records; resume recovers them by checking which files have moved.
+SYNC_EVERY = 1024
+
+
+def journal_dir(folder: str) -> str:
+    return os.path.join(folder, JOURNAL_DIR)
+
+
+def _new_journal_id() -> str:
+    return f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def _step_record(chain: int, seq: int, step: RenameStep) -> Dict:
+    record = {"op": "step", "chain": chain, "seq": seq, "src": step.src, "dst": step.dst}
+    if step.pair != (step.src, step.dst):
+        record["pair"] = list(step.pair)
+    if not step.final:
+        record["final"] = False
+    return record
+
+
+@dataclass
+class JournalState:
+    journal_id: str
+    folder: str
+    created_at: float
+    chains: List[List[RenameStep]]
+    # leading steps of each chain recorded as done
+    recorded: List[int]
+    # "running" until an end record is written (or the process died),
+    # then the status passed to RenameJournal.close
+    status: str = "running"
+    undo_of: Optional[str] = None
+    undone_by: Optional[str] = None
+    failed: Dict[Tuple[int, int], str] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(1 for chain in self.chains for step in chain if step.final)
+
+
+class RenameJournal:
+    """
+    Append-only write-ahead log of one rename run. The whole step plan is
+    written and fsynced before the first rename; completed steps are then
+    appended and fsynced every SYNC_EVERY records. The first half of a temp
+    hop is synced at once, because a finished cycle and an untouched one
+    look the same on disk.
+    """
+
+    def __init__(self, folder: str, journal_id: str):
+        self.folder = folder
+        self.journal_id = journal_id
+        self.path = os.path.join(journal_dir(folder), f"{journal_id}.jsonl")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._fh = None
+
+    @classmethod
+    def create(
+        cls,
+        folder: str,
+        chains: List[List[RenameStep]],
+        undo_of: Optional[str] = None,
+    ) -> "RenameJournal":
+        journal = cls(folder, _new_journal_id())
+        os.makedirs(journal_dir(folder), exist_ok=True)
+        journal._fh = open(journal.path, "x", encoding="utf-8")
+        header = {"op": "begin", "id": journal.journal_id, "created_at": time.time()}
+        if undo_of:
+            header["undo_of"] = undo_of
+        lines = [header]
+        for c, chain in enumerate(chains):
+            lines.extend(_step_record(c, i, step) for i, step in enumerate(chain))
+        lines.append({"op": "planned"})
+        journal._fh.write("".join(json.dumps(line) + "\n" for line in lines))
+        journal._sync()
+        return journal
+
+    @classmethod
+    def reopen(cls, folder: str, journal_id: str) -> "RenameJournal":
+        journal = cls(folder, journal_id)
+        journal._fh = open(journal.path, "a", encoding="utf-8")
+        return journal
+
+    def _append(self, record: Dict, sync: bool = False) -> None:
+        with self._lock:
+            self._fh.write(json.dumps(record) + "\n")
+            self._pending += 1
+            if sync or self._pending >= SYNC_EVERY:
+                self._sync()
+
+    def _sync(self) -> None:
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._pending = 0
+
+    def step_done(self, chain: int, seq: int, step: RenameStep) -> None:
+        self._append({"op": "done", "chain": chain, "seq": seq}, sync=not step.final)
+
+    def step_failed(self, chain: int, seq: int, error: str) -> None:
+        self._append({"op": "failed", "chain": chain, "seq": seq, "error": error})
+
+    def close(self, status: str = "completed") -> None:
+        self._append({"op": "end", "status": status}, sync=True)
+        self._fh.close()
+
+    def abandon(self) -> None:
+        """Close without an end record, for a run stopped by an error: it reads back as interrupted."""
+        with self._lock:
+            try:
+                self._sync()
+            finally:
+                self._fh.close()
+
+
+def mark_undone(folder: str, journal_id: str, undo_id: str) -> None:
+    journal = RenameJournal.reopen(folder, journal_id)
+    try:
+        journal._append({"op": "undone", "by": undo_id}, sync=True)
+    finally:
+        journal._fh.close()
+
+
+def list_journal_ids(folder: str) -> List[str]:
+    try:
+        names = os.listdir(journal_dir(folder))
+    except FileNotFoundError:
+        return []
+    return sorted(name[: -len(".jsonl")] for name in names if name.endswith(".jsonl"))
+
+
+def read_journal(folder: str, journal_id: str) -> JournalState:
+    """
+    Parse a journal. A torn last line (the process died mid-write) is
+    ignored; a journal whose plan was never completed holds no renames.
+    """
+    path = os.path.join(journal_dir(folder), f"{journal_id}.jsonl")
+    if os.path.basename(journal_id) != journal_id or not os.path.isfile(path):
+        raise FileNotFoundError(f"Journal not found: {journal_id}")
+    chains: List[List[RenameStep]] = []
+    state = JournalState(journal_id=journal_id, folder=folder, created_at=0.0, chains=chains, recorded=[])
+    planned = False
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            op = record.get("op")
+            if op == "begin":
+                state.created_at = record.get("created_at", 0.0)
+                state.undo_of = record.get("undo_of")
+            elif op == "step":
+                if record["chain"] == len(chains):
+                    chains.append([])
+                pair = tuple(record.get("pair", (record["src"], record["dst"])))
+                chains[record["chain"]].append(
+                    RenameStep(record["src"], record["dst"], pair, record.get("final", True))
+                )
+            elif op == "planned":
+                planned = True
+                state.recorded = [0] * len(chains)
+            elif op == "done":
+                chain = record["chain"]
+                state.recorded[chain] = max(state.recorded[chain], record["seq"] + 1)
+                state.failed.pop((chain, record["seq"]), None)
+            elif op == "failed":
+                state.failed[(record["chain"], record["seq"])] = record["error"]
+            elif op == "undone":
+                state.undone_by = record.get("by")
+            elif op == "end":
+                state.status = record.get("status", "completed")
+    if not planned:
+        state.chains = []
+        state.recorded = []
+    return state
+
+
+def _exists(folder: str, name: str) -> bool:
+    return os.path.lexists(os.path.join(folder, name))
+
+
+def resume_points(state: JournalState) -> List[int]:
+    """
+    Steps of each chain already carried out, from the journal plus the
+    files on disk. Within a chain step j+1 refills the name step j moved
+    away, so scanning from the end, the first step whose source is gone is
+    the last one done. A temp name only disappears again when the hop's
+    second half ran, which requires the (synced) first half record.
+    """
+    points: List[int] = []
+    for chain, recorded in zip(state.chains, state.recorded):
+        point = recorded
+        for j in range(len(chain) - 1, recorded - 1, -1):
+            step = chain[j]
+            if step.src.startswith(TEMP_PREFIX) and not chain[0].final:
+                done = recorded >= 1 and not _exists(state.folder, step.src)
+            else:
+                done = not _exists(state.folder, step.src)
+            if done:
+                point = j + 1
+                break
+        points.append(point)
+    return points
+
+
+def undo_pairs(state: JournalState, points: List[int]) -> List[RenamePair]:
+    """(current name, original name) for every file the run has moved."""
+    pairs: List[RenamePair] = []
+    for chain, point in zip(state.chains, points):
+        location: Dict[RenamePair, str] = {}
+        for step in chain[:point]:
+            location[step.pair] = step.dst
+        pairs.extend((current, pair[0]) for pair, current in location.items() if current != pair[0])
+    return pairs
+
+
+def touched_dirs(state: JournalState) -> Set[str]:
+    """Relative directories (with "" for the root) containing renamed files."""
+    return {
+        os.path.dirname(name)
+        for chain in state.chains
+        for step in chain
+        for name in (step.src, step.dst)
+    }
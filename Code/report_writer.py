@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Sequence, Tuple
+
+from dataset_dirs import REPORTS_DIR
+
+# Dataset actions write one CSV report each into <dataset>/__reports; that
+# file is the only copy, served by the report download endpoint.
+CSV_SUFFIX = ".csv"
+GZIP_SUFFIX = ".csv.gz"
+# A report is written under this suffix and renamed once complete, so a
+# download never sees half a report.
+PARTIAL_SUFFIX = ".part"
+GZIP_LEVEL = 6
+# Rows reach the file in blocks of about this size; memory does not grow
+# with the number of rows.
+REPORT_BUFFER_BYTES = 1 << 16
+
+
+def _open_new_report(reports: Path, name_prefix: str, compress: bool) -> Tuple[Path, Path, BinaryIO]:
+    """(report path, partial path, partial opened for writing) under a name no other report has."""
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = GZIP_SUFFIX if compress else CSV_SUFFIX
+    n = 1
+    while True:
+        # two actions in the same second must not share a report: the partial
+        # is created exclusively, then checked against every other report
+        # (finished or not, either suffix) under the same name
+        name = f"{name_prefix}_{stamp}" if n == 1 else f"{name_prefix}_{stamp}_{n}"
+        n += 1
+        path = reports / f"{name}{suffix}"
+        partial = path.with_name(path.name + PARTIAL_SUFFIX)
+        try:
+            binary = (
+                gzip.open(partial, "xb", compresslevel=GZIP_LEVEL)
+                if compress
+                else open(partial, "xb", buffering=REPORT_BUFFER_BYTES)
+            )
+        except FileExistsError:
+            continue
+        if any(p != partial for p in reports.glob(f"{name}.csv*")):
+            binary.close()
+            partial.unlink()
+            continue
+        return path, partial, binary
+
+
+class ReportWriter:
+    """
+    CSV report streamed to <base_dir>/__reports as rows are produced,
+    gzip-compressed with `compress`. Use as a context manager: the report
+    is published on a clean exit and discarded if the action raises.
+    """
+
+    def __init__(self, base_dir: Path, name_prefix: str, headers: Sequence[str], compress: bool = False):
+        reports = base_dir / REPORTS_DIR
+        reports.mkdir(parents=True, exist_ok=True)
+        self.path, self._partial, binary = _open_new_report(reports, name_prefix, compress)
+        self.rows = 0
+        self._text = io.TextIOWrapper(binary, encoding="utf-8", newline="")
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(headers)
+
+    @property
+    def report_id(self) -> str:
+        return self.path.name
+
+    def write(self, row: Sequence[str]) -> None:
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def close(self) -> None:
+        if self._text.closed:
+            return
+        self._text.close()
+        os.replace(self._partial, self.path)
+
+    def abort(self) -> None:
+        if not self._text.closed:
+            self._text.close()
+        try:
+            self._partial.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "ReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def resolve_report(base_dir: Path, report_id: str) -> Path:
+    """Path of a finished report in the dataset; ValueError for ids that are not report names."""
+    if not report_id.endswith((CSV_SUFFIX, GZIP_SUFFIX)) or report_id != Path(report_id).name or "\\" in report_id:
+        raise ValueError(f"Not a report id: {report_id}")
+    path = base_dir / REPORTS_DIR / report_id
+    if not path.is_file():
+        raise FileNotFoundError(f"Report not found: {report_id}")
+    return path
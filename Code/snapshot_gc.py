@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from snapshot_store import prune_snapshots
+
+# Datasets seen since startup are re-checked this often, so age limits apply
+# to datasets that are no longer being edited.
+GC_INTERVAL_SECONDS = 3600.0
+# A burst of runs on one dataset is collected once, this long after the last.
+GC_DELAY_SECONDS = 5.0
+
+
+class SnapshotCollector:
+    """
+    Background thread applying each dataset's retention policy to its
+    `__undo` folder: shortly after a run writes a snapshot there, and then
+    every `interval` seconds for every folder scheduled so far.
+    """
+
+    def __init__(self, delay: float = GC_DELAY_SECONDS, interval: float = GC_INTERVAL_SECONDS):
+        self._delay = delay
+        self._interval = interval
+        self._cond = threading.Condition()
+        # undo dir -> monotonic time it is due
+        self._due: Dict[Path, float] = {}
+        self._known: Set[Path] = set()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+    def schedule(self, undo_dir: Path) -> None:
+        with self._cond:
+            self._known.add(undo_dir)
+            self._due[undo_dir] = time.monotonic() + self._delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="snapshot-gc", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._due)
+
+    def _loop(self) -> None:
+        next_sweep = time.monotonic() + self._interval
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                if now >= next_sweep:
+                    next_sweep = now + self._interval
+                    for undo_dir in self._known:
+                        self._due.setdefault(undo_dir, now)
+                ready = [undo_dir for undo_dir, due in self._due.items() if due <= now]
+                for undo_dir in ready:
+                    del self._due[undo_dir]
+                if not ready:
+                    wake = min([next_sweep, *self._due.values()])
+                    self._cond.wait(max(wake - now, 0.01))
+                    continue
+            for undo_dir in ready:
+                if not undo_dir.is_dir():
+                    with self._cond:
+                        self._known.discard(undo_dir)
+                    continue
+                try:
+                    prune_snapshots(undo_dir)
+                except Exception as exc:  # keep collecting other datasets
+                    self.last_error = f"{undo_dir}: {exc}"
+
+
+snapshot_collector = SnapshotCollector()
@@ -0,0 +1,573 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fs_paths import io_strategy
+
+# Snapshot manifests written by this module; version 2 snapshots (plain
+# before/ and after/ trees) are still read by dataset_actions_core.
+SNAPSHOT_VERSION = 3
+MANIFEST_NAME = "manifest.json"
+# Packs live apart from the snapshot folders: a pack stays while any kept
+# snapshot references blobs in it.
+PACK_DIR = "packs"
+PACK_SUFFIX = ".z"
+COMPRESS_LEVEL = 6
+
+# Per-dataset index of the snapshots (counts, sizes, referenced packs) so
+# listing them and applying retention does not read every manifest.
+CATALOG_NAME = "catalog.json"
+CATALOG_VERSION = 1
+RETENTION_NAME = "retention.json"
+CREATED_AT_FORMAT = "%Y%m%d_%H%M%S"
+
+# hash -> (pack id, offset in the uncompressed pack, length in bytes)
+BlobRef = Tuple[str, int, int]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class SnapshotManifest:
+    snapshot_id: str
+    base: str
+    created_at: str
+    files: List[str]
+    # per file, the hash of its text before and after the run
+    before: List[str]
+    after: List[str]
+    # every blob the snapshot needs, including ones packed by earlier snapshots
+    blobs: Dict[str, BlobRef] = field(default_factory=dict)
+    # compressed size of this snapshot's own pack (0 when it had nothing new)
+    pack_bytes: int = 0
+    # uncompressed text bytes of the files captured, before and after
+    raw_bytes: int = 0
+
+    def to_json(self) -> Dict:
+        return {
+            "version": SNAPSHOT_VERSION,
+            "snapshot_id": self.snapshot_id,
+            "base": self.base,
+            "created_at": self.created_at,
+            "files": self.files,
+            "before": self.before,
+            "after": self.after,
+            "blobs": {h: list(ref) for h, ref in self.blobs.items()},
+            "pack_bytes": self.pack_bytes,
+            "raw_bytes": self.raw_bytes,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "SnapshotManifest":
+        return cls(
+            snapshot_id=data["snapshot_id"],
+            base=data.get("base", ""),
+            created_at=data.get("created_at", ""),
+            files=data["files"],
+            before=data["before"],
+            after=data["after"],
+            blobs={h: (ref[0], ref[1], ref[2]) for h, ref in data.get("blobs", {}).items()},
+            pack_bytes=data.get("pack_bytes", 0),
+            raw_bytes=data.get("raw_bytes", 0),
+        )
+
+
+def pack_path(undo_dir: Path, pack_id: str) -> Path:
+    return undo_dir / PACK_DIR / f"{pack_id}{PACK_SUFFIX}"
+
+
+def read_manifest_json(snap_dir: Path) -> Dict:
+    return json.loads((snap_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+
+
+def load_manifest(snap_dir: Path) -> Optional[SnapshotManifest]:
+    """The snapshot's manifest, or None for older (version 2) snapshots."""
+    data = read_manifest_json(snap_dir)
+    if data.get("version", 0) < SNAPSHOT_VERSION:
+        return None
+    return SnapshotManifest.from_json(data)
+
+
+@dataclass
+class SnapshotInfo:
+    snapshot_id: str
+    created_at: str
+    # seconds since the epoch, for age-based retention
+    created_ts: float
+    version: int
+    files: int
+    # bytes of the snapshot folder (the manifest; full copies for version 2)
+    bytes: int
+    # compressed size of the pack this snapshot wrote
+    pack_bytes: int = 0
+    raw_bytes: int = 0
+    # packs holding the blobs this snapshot needs
+    packs: List[str] = field(default_factory=list)
+
+    def to_json(self) -> Dict:
+        return {
+            "snapshot_id": self.snapshot_id,
+            "created_at": self.created_at,
+            "created_ts": self.created_ts,
+            "version": self.version,
+            "files": self.files,
+            "bytes": self.bytes,
+            "pack_bytes": self.pack_bytes,
+            "raw_bytes": self.raw_bytes,
+            "packs": self.packs,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "SnapshotInfo":
+        return cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+
+
+@dataclass
+class RetentionPolicy:
+    """
+    Limits on what `prune_snapshots` keeps; None disables a limit. The newest
+    snapshot is always kept. Nothing is limited until a dataset saves a policy.
+    """
+
+    keep_last: Optional[int] = None
+    max_bytes: Optional[int] = None
+    max_age_days: Optional[float] = None
+
+    def to_json(self) -> Dict:
+        return {"keep_last": self.keep_last, "max_bytes": self.max_bytes, "max_age_days": self.max_age_days}
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "RetentionPolicy":
+        return cls(**{key: data[key] for key in cls.__dataclass_fields__ if key in data})
+
+
+DEFAULT_RETENTION = RetentionPolicy()
+
+
+@dataclass
+class PruneResult:
+    removed: List[str]
+    removed_packs: List[str]
+    freed_bytes: int
+
+
+# Held while a snapshot is written or pruned, so the collector never drops a
+# pack that a snapshot being written has just decided to reference.
+_store_lock = threading.RLock()
+
+
+def list_snapshot_ids(undo_dir: Path) -> List[str]:
+    """Ids of complete snapshots (manifest written), oldest first."""
+    if not undo_dir.is_dir():
+        return []
+    ids = []
+    with os.scandir(undo_dir) as it:
+        for entry in it:
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, MANIFEST_NAME)):
+                ids.append(entry.name)
+    return sorted(ids)
+
+
+def _latest_blobs(undo_dir: Path) -> Dict[str, BlobRef]:
+    """
+    Blobs of the newest version-3 snapshot whose packs still exist. Its map
+    already includes what it reused from earlier snapshots, so consecutive
+    runs (one run's after is the next one's before) share their texts.
+    """
+    for snapshot_id in reversed(list_snapshot_ids(undo_dir)):
+        try:
+            manifest = load_manifest(undo_dir / snapshot_id)
+        except (OSError, ValueError, KeyError):
+            continue
+        if manifest is None:
+            continue
+        packs = {ref[0] for ref in manifest.blobs.values()}
+        present = {pack for pack in packs if pack_path(undo_dir, pack).exists()}
+        return {h: ref for h, ref in manifest.blobs.items() if ref[0] in present}
+    return {}
+
+
+def _new_snapshot_id(undo_dir: Path) -> str:
+    """
+    A timestamp, with a zero-padded suffix when the second is taken. Ids
+    always sort after every existing snapshot and pack (pruned ids are
+    never reused: their packs may still be referenced).
+    """
+    stamp = time.strftime(CREATED_AT_FORMAT)
+    taken = [name for name in os.listdir(undo_dir) if name.startswith(stamp)]
+    taken += [pack for pack in pack_sizes(undo_dir) if pack.startswith(stamp)]
+    if not taken:
+        return stamp
+    n = 1
+    for name in taken:
+        suffix = name[len(stamp) + 1 :]
+        if suffix.isdigit():
+            n = max(n, int(suffix))
+    return f"{stamp}_{n + 1:03d}"
+
+
+def _replace_atomic(tmp: Path, dst: Path) -> None:
+    with open(tmp, "rb+") as fh:
+        os.fsync(fh.fileno())
+    os.replace(tmp, dst)
+
+
+def write_snapshot(
+    undo_dir: Path,
+    base: Path,
+    rels: Sequence[str],
+    before_texts: Sequence[str],
+    after_texts: Sequence[str],
+) -> SnapshotManifest:
+    """
+    Store the before/after texts of `rels` as one snapshot: the texts are
+    hashed, blobs already held by the latest snapshot are referenced, and
+    the remaining unique ones are packed into a single zlib stream. The
+    manifest is written last, so a snapshot without one is incomplete.
+    """
+    with _store_lock:
+        manifest = _write_snapshot(undo_dir, base, rels, before_texts, after_texts)
+        try:
+            catalog = _read_catalog(undo_dir)
+            manifest_file = undo_dir / manifest.snapshot_id / MANIFEST_NAME
+            catalog[manifest.snapshot_id] = _info_from_manifest(
+                manifest, manifest_file.stat().st_size, _created_ts(manifest.snapshot_id, manifest_file)
+            )
+            _write_catalog(undo_dir, catalog)
+        except OSError:
+            pass  # the catalog is rebuilt from the manifests on the next read
+    return manifest
+
+
+def _write_snapshot(
+    undo_dir: Path,
+    base: Path,
+    rels: Sequence[str],
+    before_texts: Sequence[str],
+    after_texts: Sequence[str],
+) -> SnapshotManifest:
+    undo_dir.mkdir(parents=True, exist_ok=True)
+    snapshot_id = _new_snapshot_id(undo_dir)
+    snap_dir = undo_dir / snapshot_id
+    snap_dir.mkdir()
+    (undo_dir / PACK_DIR).mkdir(exist_ok=True)
+
+    known = _latest_blobs(undo_dir)
+    blobs: Dict[str, BlobRef] = {}
+    hashes: List[List[str]] = [[], []]
+    raw_bytes = 0
+    offset = 0
+    packed = False
+    pack = pack_path(undo_dir, snapshot_id)
+    tmp_pack = pack.with_name(pack.name + ".tmp")
+    compressor = zlib.compressobj(COMPRESS_LEVEL)
+    with open(tmp_pack, "wb") as fh:
+        for side, texts in enumerate((before_texts, after_texts)):
+            for text in texts:
+                data = text.encode("utf-8")
+                raw_bytes += len(data)
+                digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+                hashes[side].append(digest)
+                if digest in blobs:
+                    continue
+                if digest in known:
+                    blobs[digest] = known[digest]
+                    continue
+                fh.write(compressor.compress(data))
+                blobs[digest] = (snapshot_id, offset, len(data))
+                offset += len(data)
+                packed = True
+        fh.write(compressor.flush())
+    pack_bytes = 0
+    # an empty caption is still a blob in this pack, even if it adds no bytes
+    if packed:
+        _replace_atomic(tmp_pack, pack)
+        pack_bytes = pack.stat().st_size
+    else:
+        tmp_pack.unlink()
+
+    manifest = SnapshotManifest(
+        snapshot_id=snapshot_id,
+        base=str(base),
+        created_at=snapshot_id[:15],
+        files=list(rels),
+        before=hashes[0],
+        after=hashes[1],
+        blobs=blobs,
+        pack_bytes=pack_bytes,
+        raw_bytes=raw_bytes,
+    )
+    tmp_manifest = snap_dir / (MANIFEST_NAME + ".tmp")
+    tmp_manifest.write_text(json.dumps(manifest.to_json(), separators=(",", ":")), encoding="utf-8")
+    _replace_atomic(tmp_manifest, snap_dir / MANIFEST_NAME)
+    return manifest
+
+
+def read_blobs(
+    undo_dir: Path, manifest: SnapshotManifest, hashes: Iterable[str], chunk_bytes: Optional[int] = None
+) -> Dict[str, str]:
+    """
+    Texts for `hashes`, reading each pack involved once from start to end,
+    `chunk_bytes` at a time (the mount's read_chunk_bytes by default), and
+    keeping only the wanted byte ranges. Blobs whose pack is missing,
+    truncated or corrupt are left out of the result.
+    """
+    if chunk_bytes is None:
+        chunk_bytes = io_strategy(str(undo_dir)).read_chunk_bytes
+    by_pack: Dict[str, List[Tuple[int, int, str]]] = {}
+    for digest in set(hashes):
+        ref = manifest.blobs.get(digest)
+        if ref is not None:
+            by_pack.setdefault(ref[0], []).append((ref[1], ref[2], digest))
+
+    texts: Dict[str, str] = {}
+    for pack_id, wanted in by_pack.items():
+        wanted.sort()
+        try:
+            fh = open(pack_path(undo_dir, pack_id), "rb")
+        except FileNotFoundError:
+            continue
+        with fh:
+            try:
+                _read_pack(fh, wanted, chunk_bytes, texts)
+            except (zlib.error, UnicodeDecodeError):
+                pass  # corrupt pack: keep the blobs read before the damage
+    return texts
+
+
+def _read_pack(fh: BinaryIO, wanted: List[Tuple[int, int, str]], chunk_bytes: int, texts: Dict[str, str]) -> None:
+    """Add the (offset, length, digest) ranges of `wanted`, sorted by offset, to `texts`."""
+    decompressor = zlib.decompressobj()
+    buf = bytearray()
+    pos = 0  # uncompressed offset of buf[0]
+    eof = False
+    for offset, length, digest in wanted:
+        while pos + len(buf) < offset + length and not eof:
+            # drop bytes before the wanted range before reading more
+            skip = min(offset - pos, len(buf))
+            if skip > 0:
+                del buf[:skip]
+                pos += skip
+            chunk = fh.read(chunk_bytes)
+            if chunk:
+                buf += decompressor.decompress(chunk)
+            else:
+                buf += decompressor.flush()
+                eof = True
+        if pos + len(buf) < offset + length:
+            return  # truncated pack
+        start = offset - pos
+        texts[digest] = buf[start : start + length].decode("utf-8")
+        del buf[: start + length]
+        pos = offset + length
+
+
+def _created_ts(created_at: str, fallback: Path) -> float:
+    try:
+        return time.mktime(time.strptime(created_at[:15], CREATED_AT_FORMAT))
+    except ValueError:
+        return fallback.stat().st_mtime
+
+
+def _info_from_manifest(manifest: SnapshotManifest, manifest_bytes: int, created_ts: float) -> SnapshotInfo:
+    return SnapshotInfo(
+        snapshot_id=manifest.snapshot_id,
+        created_at=manifest.created_at,
+        created_ts=created_ts,
+        version=SNAPSHOT_VERSION,
+        files=len(manifest.files),
+        bytes=manifest_bytes,
+        pack_bytes=manifest.pack_bytes,
+        raw_bytes=manifest.raw_bytes,
+        packs=sorted({ref[0] for ref in manifest.blobs.values()}),
+    )
+
+
+def _tree_bytes(path: Path) -> int:
+    total = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _scan_info(undo_dir: Path, snapshot_id: str) -> SnapshotInfo:
+    snap_dir = undo_dir / snapshot_id
+    manifest_file = snap_dir / MANIFEST_NAME
+    data = read_manifest_json(snap_dir)
+    if data.get("version", 0) >= SNAPSHOT_VERSION:
+        manifest = SnapshotManifest.from_json(data)
+        return _info_from_manifest(
+            manifest, manifest_file.stat().st_size, _created_ts(manifest.snapshot_id, manifest_file)
+        )
+    # version 2: the folder holds full before/ and after/ copies
+    return SnapshotInfo(
+        snapshot_id=snapshot_id,
+        created_at=data.get("created_at", ""),
+        created_ts=_created_ts(snapshot_id, manifest_file),
+        version=data.get("version", 2),
+        files=len(data.get("files", [])),
+        bytes=_tree_bytes(snap_dir),
+    )
+
+
+def _read_catalog(undo_dir: Path) -> Dict[str, SnapshotInfo]:
+    try:
+        data = json.loads((undo_dir / CATALOG_NAME).read_text(encoding="utf-8"))
+        if data.get("version") != CATALOG_VERSION:
+            return {}
+        return {sid: SnapshotInfo.from_json(info) for sid, info in data.get("snapshots", {}).items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def _write_catalog(undo_dir: Path, catalog: Dict[str, SnapshotInfo]) -> None:
+    payload = {"version": CATALOG_VERSION, "snapshots": {sid: catalog[sid].to_json() for sid in sorted(catalog)}}
+    tmp = undo_dir / (CATALOG_NAME + ".tmp")
+    tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    _replace_atomic(tmp, undo_dir / CATALOG_NAME)
+
+
+def load_catalog(undo_dir: Path) -> List[SnapshotInfo]:
+    """
+    Every complete snapshot, oldest first, from the cached catalog. One
+    listing of `undo_dir` reconciles it: manifests are read only for
+    snapshots the catalog has not seen (written by older versions or
+    copied in), and folders deleted by hand are dropped.
+    """
+    with _store_lock:
+        ids = list_snapshot_ids(undo_dir)
+        catalog = _read_catalog(undo_dir)
+        changed = set(catalog) != set(ids)
+        for snapshot_id in ids:
+            if snapshot_id not in catalog:
+                try:
+                    catalog[snapshot_id] = _scan_info(undo_dir, snapshot_id)
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue  # unreadable manifest: neither listed nor pruned
+        catalog = {sid: info for sid, info in catalog.items() if sid in ids}
+        if changed:
+            try:
+                _write_catalog(undo_dir, catalog)
+            except OSError:
+                pass
+        return [catalog[sid] for sid in sorted(catalog)]
+
+
+def pack_sizes(undo_dir: Path) -> Dict[str, int]:
+    """Compressed size of every finished pack, by pack id."""
+    sizes: Dict[str, int] = {}
+    try:
+        with os.scandir(undo_dir / PACK_DIR) as it:
+            for entry in it:
+                if entry.name.endswith(PACK_SUFFIX) and entry.is_file():
+                    sizes[entry.name[: -len(PACK_SUFFIX)]] = entry.stat().st_size
+    except FileNotFoundError:
+        pass
+    return sizes
+
+
+def load_retention(undo_dir: Path) -> RetentionPolicy:
+    try:
+        return RetentionPolicy.from_json(json.loads((undo_dir / RETENTION_NAME).read_text(encoding="utf-8")))
+    except (OSError, ValueError, TypeError):
+        return DEFAULT_RETENTION
+
+
+def save_retention(undo_dir: Path, policy: RetentionPolicy) -> None:
+    undo_dir.mkdir(parents=True, exist_ok=True)
+    tmp = undo_dir / (RETENTION_NAME + ".tmp")
+    tmp.write_text(json.dumps(policy.to_json()), encoding="utf-8")
+    _replace_atomic(tmp, undo_dir / RETENTION_NAME)
+
+
+def select_expired(
+    infos: Sequence[SnapshotInfo], policy: RetentionPolicy, sizes: Dict[str, int], now: float
+) -> List[str]:
+    """
+    Ids to prune from `infos` (oldest first). Snapshots are kept newest
+    first until one breaks a limit; it and everything older go. Bytes count
+    each kept snapshot's folder plus every pack a kept snapshot needs, once,
+    which is what stays on disk after pruning.
+    """
+    kept_packs: set = set()
+    total = 0
+    newest_first = list(reversed(infos))
+    for n, info in enumerate(newest_first):
+        cost = info.bytes + sum(sizes.get(pack, 0) for pack in info.packs if pack not in kept_packs)
+        if n > 0:
+            too_many = policy.keep_last is not None and n >= policy.keep_last
+            too_old = policy.max_age_days is not None and now - info.created_ts > policy.max_age_days * 86400
+            too_big = policy.max_bytes is not None and total + cost > policy.max_bytes
+            if too_many or too_old or too_big:
+                return sorted(other.snapshot_id for other in newest_first[n:])
+        kept_packs.update(info.packs)
+        total += cost
+    return []
+
+
+def prune_snapshots(
+    undo_dir: Path, policy: Optional[RetentionPolicy] = None, now: Optional[float] = None
+) -> PruneResult:
+    """
+    Apply `policy` (default: the dataset's saved one) to `undo_dir`: drop
+    expired snapshots, manifest first so a half-deleted one is never
+    listed, then every pack no remaining manifest references. Packs of
+    snapshots still being written (folder present, no manifest yet) stay.
+    """
+    if policy is None:
+        policy = load_retention(undo_dir)
+    with _store_lock:
+        infos = load_catalog(undo_dir)
+        sizes = pack_sizes(undo_dir)
+        expired = set(select_expired(infos, policy, sizes, time.time() if now is None else now))
+        freed = 0
+        removed: List[str] = []
+        kept = []
+        for info in infos:
+            if info.snapshot_id not in expired:
+                kept.append(info)
+                continue
+            snap_dir = undo_dir / info.snapshot_id
+            try:
+                (snap_dir / MANIFEST_NAME).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                kept.append(info)
+                continue
+            shutil.rmtree(snap_dir, ignore_errors=True)
+            removed.append(info.snapshot_id)
+            freed += info.bytes
+
+        referenced = {pack for info in kept for pack in info.packs}
+        removed_packs: List[str] = []
+        for pack_id, size in sorted(sizes.items()):
+            if pack_id in referenced or (undo_dir / pack_id).exists():
+                continue
+            try:
+                pack_path(undo_dir, pack_id).unlink()
+            except OSError:
+                continue
+            removed_packs.append(pack_id)
+            freed += size
+        if removed:
+            try:
+                _write_catalog(undo_dir, {info.snapshot_id: info for info in kept})
+            except OSError:
+                pass
+    return PruneResult(removed=removed, removed_packs=removed_packs, freed_bytes=freed)